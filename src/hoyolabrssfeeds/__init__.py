@@ -1,29 +1,91 @@
 """RSS feed generator for official game news from Hoyolab."""
 
-from . import configs
-from . import errors
-from . import feeds
-from . import hoyolab
-from . import loaders
-from . import models
-from . import writers
-
-# quick access
-from .configs import FeedConfigLoader
-from .feeds import GameFeed
-from .feeds import GameFeedCollection
-from .models import Game
+import importlib
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import List
 
+if TYPE_CHECKING:
+    from . import backfills
+    from . import blobs
+    from . import caches
+    from . import cassettes
+    from . import compressors
+    from . import configs
+    from . import deltas
+    from . import errors
+    from . import events
+    from . import feeds
+    from . import hoyolab
+    from . import loaders
+    from . import metrics
+    from . import models
+    from . import pages
+    from . import profiling
+    from . import servers
+    from . import tracing
+    from . import websub
+    from . import writers
+
+    # quick access
+    from .configs import FeedConfigLoader
+    from .feeds import GameFeed
+    from .feeds import GameFeedCollection
+    from .models import Game
+
+# development tools (e.g. simulator and benchmarks) are not part of the public api,
+# but can still be imported explicitly as submodules
 __all__ = [
+    "FeedConfigLoader",
+    "Game",
+    "GameFeed",
+    "GameFeedCollection",
+    "backfills",
+    "blobs",
+    "caches",
+    "cassettes",
+    "compressors",
     "configs",
+    "deltas",
     "errors",
+    "events",
     "feeds",
     "hoyolab",
     "loaders",
+    "metrics",
     "models",
+    "pages",
+    "profiling",
+    "servers",
+    "tracing",
+    "websub",
     "writers",
-    "FeedConfigLoader",
-    "GameFeed",
-    "GameFeedCollection",
-    "Game",
 ]
+
+# modules of the quick access names
+_QUICK_ACCESS = {
+    "FeedConfigLoader": "configs",
+    "GameFeed": "feeds",
+    "GameFeedCollection": "feeds",
+    "Game": "models",
+}
+
+
+def __getattr__(name: str) -> Any:
+    # submodules are only imported on first access (PEP 562), so the startup of
+    # the CLI does not pay for aiohttp or pydantic until they are actually needed
+    if name in _QUICK_ACCESS:
+        value = getattr(
+            importlib.import_module("." + _QUICK_ACCESS[name], __name__), name
+        )
+        globals()[name] = value
+        return value
+
+    if name in __all__:
+        return importlib.import_module("." + name, __name__)
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
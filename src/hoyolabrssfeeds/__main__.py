@@ -1,28 +1,286 @@
 import argparse
 import asyncio
 import logging
+import sys
+from datetime import datetime
 from pathlib import Path
 from platform import system
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
 
-from .configs import FeedConfigLoader
-from .feeds import GameFeedCollection
+# heavy modules (aiohttp, pydantic) are imported when they are needed, so that
+# e.g. --help or the creation of the default config file start fast
+if TYPE_CHECKING:
+    from .blobs import BlobStore
+    from .cassettes import CassetteSession
+    from .feeds import GameFeed
+    from .feeds import GameFeedCollection
+    from .models import FeedItemCategory
+    from .models import Game
+    from .profiling import Profiler
+    from .tracing import Tracer
 
 logger = logging.getLogger(__package__)
 
+DEFAULT_INTERVAL = 600
+DEFAULT_HOST = "localhost"
+
+# exit status of the check mode if any feed needs an update (or the check failed),
+# distinct from crashes (1) and invalid arguments (2)
+EXIT_UPDATE_NEEDED = 3
+
+
+async def load_feed_collection(
+    config_path: Optional[Path] = None, content_path: Optional[Path] = None
+) -> Optional["GameFeedCollection"]:
+    """Create the feed collection or a default config file if none exists."""
+
+    from .configs import FeedConfigLoader
 
-async def create_feeds(config_path: Optional[Path] = None) -> None:
     # fallback path defined in config loader if no path given
     config_loader = FeedConfigLoader(config_path)
 
     if not config_loader.path.exists():
         await config_loader.create_default_config_file()
         logger.info("Default config file created at %s.", config_loader.path.resolve())
+        return None
+
+    from . import tracing
+    from .feeds import GameFeedCollection
+
+    with tracing.span("load_config"):
+        config = await config_loader.load_config()
+        feed_configs = await config_loader.get_all_feed_configs(config)
+        view_configs = await config_loader.get_all_view_configs(config)
+        hook_configs = await config_loader.get_all_hook_configs(config)
+
+    content_store: Optional[BlobStore] = None
+    if content_path is not None:
+        from .blobs import BlobStore
+
+        content_store = BlobStore(content_path)
+
+    return GameFeedCollection.from_configs(
+        feed_configs, view_configs, hook_configs, content_store
+    )
+
+
+async def create_feeds(
+    config_path: Optional[Path] = None,
+    metrics_path: Optional[Path] = None,
+    cassette_session: Optional["CassetteSession"] = None,
+) -> None:
+    game_feed = await load_feed_collection(config_path)
+
+    if game_feed is None:
+        return
+
+    try:
+        if cassette_session is None:
+            await game_feed.create_feeds()
+        else:
+            async with cassette_session as session:
+                await game_feed.create_feeds(session)
+    finally:
+        if metrics_path is not None:
+            await write_metrics(metrics_path)
+
+
+async def check_feeds(
+    config_path: Optional[Path] = None,
+    metrics_path: Optional[Path] = None,
+    cassette_session: Optional["CassetteSession"] = None,
+) -> bool:
+    """Check if any feed needs an update (only the news lists are requested)."""
+
+    game_feed = await load_feed_collection(config_path)
+
+    # the feeds of the created default config do not exist yet
+    if game_feed is None:
+        return True
+
+    try:
+        if cassette_session is None:
+            return await game_feed.check_feeds()
+
+        async with cassette_session as session:
+            return await game_feed.check_feeds(session)
+    finally:
+        if metrics_path is not None:
+            await write_metrics(metrics_path)
+
+
+async def backfill_feed(
+    game: "Game",
+    config_path: Optional[Path] = None,
+    restart: bool = False,
+    **options: Any,
+) -> None:
+    """Backfill the history of the feed of a game (see Backfiller for the options)."""
+
+    from .backfills import Backfiller
+    from .configs import FeedConfigLoader
+
+    config_loader = FeedConfigLoader(config_path)
+    feed_config = await config_loader.get_feed_config(game)
+
+    backfiller = Backfiller.from_config(feed_config, **options)
+    await backfiller.run(restart=restart)
+
+
+async def write_metrics(metrics_path: Path) -> None:
+    """Write the metrics to a textfile without failing the run."""
+
+    from . import metrics
+
+    try:
+        await metrics.REGISTRY.write_textfile(metrics_path)
+    except IOError:
+        logger.warning('Could not write metrics to "%s"!', metrics_path)
+
+
+async def run_daemon(
+    config_path: Optional[Path] = None,
+    interval: int = DEFAULT_INTERVAL,
+    address: Optional[Tuple[str, int]] = None,
+    serve_metrics: bool = False,
+    metrics_path: Optional[Path] = None,
+    content_path: Optional[Path] = None,
+) -> None:
+    """Periodically update the feeds and optionally serve them via HTTP.
+
+    Modifications of the config file are applied without restart. Only added or
+    changed feeds are created right away, the others keep their state and schedule.
+    """
+
+    game_feed = await load_feed_collection(config_path, content_path)
+
+    if game_feed is None:
         return
 
-    feed_configs = await config_loader.get_all_feed_configs()
-    game_feed = GameFeedCollection.from_configs(feed_configs)
-    await game_feed.create_feeds()
+    import aiohttp
+
+    from . import metrics
+    from .configs import FeedConfigLoader
+    from .errors import ConfigFormatError
+    from .errors import ConfigIOError
+    from .servers import FeedServer
+
+    config_loader = FeedConfigLoader(config_path)
+
+    server = (
+        FeedServer(
+            game_feed.feed_writers,
+            *address,
+            metrics_registry=metrics.REGISTRY if serve_metrics else None,
+        )
+        if address
+        else None
+    )
+
+    # scheduled and reloaded updates must not write the same files concurrently
+    update_lock = asyncio.Lock()
+
+    async def update_feeds(
+        session: aiohttp.ClientSession, game_feeds: Optional[List["GameFeed"]] = None
+    ) -> None:
+        async with update_lock:
+            try:
+                await game_feed.create_feeds(session, game_feeds)
+            except Exception:
+                logger.exception("Could not update all feeds!")
+
+            if server is not None:
+                await server.refresh()
+
+            if metrics_path is not None:
+                await write_metrics(metrics_path)
+
+    async def reload_config(session: aiohttp.ClientSession) -> None:
+        async for _ in config_loader.watch():
+            logger.info("Reloading modified config file %s.", config_loader.path)
+
+            try:
+                config = await config_loader.load_config()
+                feed_configs = await config_loader.get_all_feed_configs(config)
+                view_configs = await config_loader.get_all_view_configs(config)
+                hook_configs = await config_loader.get_all_hook_configs(config)
+            except (ConfigIOError, ConfigFormatError) as err:
+                logger.error("Keeping the previous config: %s", err)
+                continue
+
+            try:
+                async with update_lock:
+                    changed_feeds = await game_feed.reload_configs(
+                        feed_configs, view_configs, hook_configs
+                    )
+
+                    if server is not None:
+                        server.set_writers(game_feed.feed_writers)
+                        await server.load_files()
+            except Exception:
+                logger.exception("Could not reload the config!")
+                continue
+
+            await update_feeds(session, changed_feeds)
+
+    if server is not None:
+        await server.start()
+
+    try:
+        # the session is kept to reuse connections between the runs
+        async with aiohttp.ClientSession() as session:
+            reload_task = asyncio.ensure_future(reload_config(session))
+
+            try:
+                while True:
+                    await update_feeds(session)
+                    await asyncio.sleep(interval)
+            finally:
+                reload_task.cancel()
+    finally:
+        if server is not None:
+            await server.stop()
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Parse an address in the format [HOST:]PORT."""
+
+    host, _, port = address.rpartition(":")
+
+    try:
+        return host or DEFAULT_HOST, int(port)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(
+            'Invalid address "{}"!'.format(address)
+        ) from err
+
+
+def parse_positive_int(value: str) -> int:
+    """Parse an integer of at least 1."""
+
+    try:
+        number = int(value)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError('Invalid number "{}"!'.format(value)) from err
+
+    if number < 1:
+        raise argparse.ArgumentTypeError("Number must be at least 1!")
+
+    return number
+
+
+def parse_date(date: str) -> datetime:
+    """Parse an ISO date (in local time if no timezone is given)."""
+
+    try:
+        return datetime.fromisoformat(date).astimezone()
+    except ValueError as err:
+        raise argparse.ArgumentTypeError('Invalid date "{}"!'.format(date)) from err
 
 
 def cli() -> None:
@@ -47,8 +305,211 @@ def cli() -> None:
         type=Path,
     )
 
+    arg_parser.add_argument(
+        "-d",
+        "--daemon",
+        action="store_true",
+        help="Keep running and update the feeds periodically",
+    )
+
+    arg_parser.add_argument(
+        "-i",
+        "--interval",
+        default=DEFAULT_INTERVAL,
+        help="Seconds between the feed updates in daemon mode",
+        type=parse_positive_int,
+    )
+
+    arg_parser.add_argument(
+        "-s",
+        "--serve",
+        metavar="[HOST:]PORT",
+        default=None,
+        help="Serve the feeds via HTTP in daemon mode",
+        type=parse_address,
+    )
+
+    arg_parser.add_argument(
+        "--content-store",
+        metavar="DIR",
+        default=None,
+        help="Keep the item contents on disk between updates in daemon mode",
+        type=Path,
+    )
+
+    arg_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only check if an update is needed (exit status {} if so)".format(
+            EXIT_UPDATE_NEEDED
+        ),
+    )
+
+    arg_parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Serve Prometheus metrics at /metrics (requires --serve)",
+    )
+
+    arg_parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help="Path to a Prometheus textfile written after each update",
+        type=Path,
+    )
+
+    arg_parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        default=None,
+        help="Path to a Chrome trace file (e.g. for Perfetto) of the update",
+        type=Path,
+    )
+
+    arg_parser.add_argument(
+        "--record",
+        metavar="DIR",
+        default=None,
+        help="Record the API responses of the update to a cassette directory",
+        type=Path,
+    )
+
+    arg_parser.add_argument(
+        "--replay",
+        metavar="DIR",
+        default=None,
+        help="Replay the API responses of a cassette directory (no network)",
+        type=Path,
+    )
+
+    arg_parser.add_argument(
+        "--replay-timing",
+        action="store_true",
+        help="Replay the responses with their recorded latency (requires --replay)",
+    )
+
+    arg_parser.add_argument(
+        "--profile",
+        metavar="PREFIX",
+        default=None,
+        help="Path prefix of the CPU profile files (.pstats, .collapsed, .txt)",
+        type=Path,
+    )
+
+    arg_parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Add tracemalloc snapshots to the profile (requires --profile)",
+    )
+
+    subparsers = arg_parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    backfill_parser = subparsers.add_parser(
+        "backfill",
+        help="Fetch the history of a feed page by page",
+        description="Fetch the history of the feed of a game page by page. An "
+        "interrupted backfill is resumed when it is started again.",
+    )
+
+    backfill_parser.add_argument("game", help="Game of the feed (e.g. genshin)")
+
+    backfill_parser.add_argument(
+        "--category",
+        dest="categories",
+        action="append",
+        default=None,
+        help="Category to backfill (repeatable, default: categories of the feed)",
+    )
+
+    backfill_parser.add_argument(
+        "--until",
+        metavar="DATE",
+        default=None,
+        help="Backfill posts published since this ISO date",
+        type=parse_date,
+    )
+
+    backfill_parser.add_argument(
+        "--count",
+        default=None,
+        help="Maximum number of posts per category (default: category_size if "
+        "no date is given)",
+        type=int,
+    )
+
+    backfill_parser.add_argument(
+        "--page-size",
+        default=None,
+        help="Posts per news list request",
+        type=int,
+    )
+
+    backfill_parser.add_argument(
+        "--concurrency",
+        default=None,
+        help="Maximum number of concurrent post requests",
+        type=int,
+    )
+
+    backfill_parser.add_argument(
+        "--rate",
+        default=None,
+        help="Maximum number of requests per second",
+        type=float,
+    )
+
+    backfill_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint of an interrupted backfill",
+    )
+
     args = arg_parser.parse_args()
 
+    if args.command == "backfill" and (args.daemon or args.check):
+        arg_parser.error("backfill is not available with --daemon or --check")
+
+    if args.command == "backfill" and any(
+        value is not None and value <= 0
+        for value in (args.count, args.page_size, args.concurrency, args.rate)
+    ):
+        backfill_parser.error("numeric options must be positive")
+
+    if args.serve is not None and not args.daemon:
+        arg_parser.error("--serve requires --daemon")
+
+    if args.metrics and args.serve is None:
+        arg_parser.error("--metrics requires --serve")
+
+    if args.content_store is not None and not args.daemon:
+        arg_parser.error("--content-store requires --daemon")
+
+    if args.check and args.daemon:
+        arg_parser.error("--check is not available in daemon mode")
+
+    if args.trace is not None and args.daemon:
+        arg_parser.error("--trace is not available in daemon mode")
+
+    if args.record is not None and args.replay is not None:
+        arg_parser.error("--record and --replay are mutually exclusive")
+
+    if (args.record is not None or args.replay is not None) and args.daemon:
+        arg_parser.error("--record and --replay are not available in daemon mode")
+
+    if args.replay_timing and args.replay is None:
+        arg_parser.error("--replay-timing requires --replay")
+
+    if args.profile is not None and args.daemon:
+        arg_parser.error("--profile is not available in daemon mode")
+
+    if args.profile_memory and args.profile is None:
+        arg_parser.error("--profile-memory requires --profile")
+
+    from . import metrics
+
+    # instrumentation is a no-op unless the metrics are used
+    metrics.REGISTRY.enabled = args.metrics or args.metrics_file is not None
+
     logging.basicConfig(
         filename=args.log_path,
         filemode="a",
@@ -56,7 +517,94 @@ def cli() -> None:
         level=logging.INFO,
     )
 
-    asyncio.run(create_feeds(args.config_path))
+    if args.command == "backfill":
+        from .models import FeedItemCategory
+        from .models import Game
+
+        try:
+            game = Game.from_str(args.game)
+            categories: Optional[List[FeedItemCategory]] = (
+                [FeedItemCategory.from_str(c) for c in args.categories]
+                if args.categories
+                else None
+            )
+        except ValueError as err:
+            backfill_parser.error(str(err))
+
+        # unset options keep the defaults of the backfiller
+        options: Dict[str, Any] = {
+            key: getattr(args, key)
+            for key in ("until", "count", "page_size", "concurrency", "rate")
+            if getattr(args, key) is not None
+        }
+
+        asyncio.run(
+            backfill_feed(
+                game,
+                args.config_path,
+                args.restart,
+                categories=categories,
+                **options,
+            )
+        )
+    elif args.daemon:
+        asyncio.run(
+            run_daemon(
+                args.config_path,
+                args.interval,
+                args.serve,
+                args.metrics,
+                args.metrics_file,
+                args.content_store,
+            )
+        )
+    else:
+        cassette_session: Optional[CassetteSession] = None
+        tracer: Optional[Tracer] = None
+        profiler: Optional[Profiler] = None
+
+        if args.record is not None or args.replay is not None:
+            from .cassettes import Cassette
+            from .cassettes import CassetteSession
+
+            cassette_session = CassetteSession(
+                Cassette(args.record or args.replay),
+                replay=args.replay is not None,
+                timing=args.replay_timing,
+            )
+
+        if args.trace is not None:
+            from . import tracing
+
+            tracer = tracing.enable()
+
+        if args.profile is not None:
+            from . import profiling
+
+            profiler = profiling.Profiler(args.profile_memory)
+            profiler.start()
+
+        update_needed = False
+
+        try:
+            if args.check:
+                update_needed = asyncio.run(
+                    check_feeds(args.config_path, args.metrics_file, cassette_session)
+                )
+            else:
+                asyncio.run(
+                    create_feeds(args.config_path, args.metrics_file, cassette_session)
+                )
+        finally:
+            if profiler is not None:
+                profiler.stop()
+                profiler.write_results(args.profile)
+
+            if tracer is not None:
+                tracer.write(args.trace)
+
+        if update_needed:
+            sys.exit(EXIT_UPDATE_NEEDED)
 
 
 if __name__ == "__main__":
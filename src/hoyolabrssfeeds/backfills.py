@@ -0,0 +1,586 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Type
+from typing import TypeVar
+
+import aiofiles
+import aiofiles.os
+import aiofiles.ospath
+import aiohttp
+
+from . import tracing
+from .caches import FeedIndex
+from .hoyolab import HoyolabNews
+from .loaders import AbstractFeedFileLoader
+from .loaders import FeedFileLoaderFactory
+from .models import FeedConfig
+from .models import FeedItem
+from .models import FeedItemCategory
+from .models import FeedMeta
+from .pages import FeedPageIndex
+from .writers import AbstractFeedFileWriter
+from .writers import FeedFileWriterFactory
+
+# used for class-methods
+_B = TypeVar("_B", bound="Backfiller")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_CONCURRENCY = 4
+
+# requests per second (news lists and posts)
+DEFAULT_RATE = 5.0
+
+
+class RateLimiter:
+    """Limit the rate of requests by spacing their starts evenly."""
+
+    __slots__ = ("_interval", "_lock", "_next_start")
+
+    def __init__(self, rate: Optional[float] = None) -> None:
+        self._interval = 1 / rate if rate else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """Wait until the next request may be started."""
+
+        if self._interval == 0:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self._interval
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CategoryState:
+    """Crawling state of a category of a backfill."""
+
+    __slots__ = ("collected", "done", "last_id", "oldest")
+
+    def __init__(
+        self,
+        last_id: Optional[str] = None,
+        collected: int = 0,
+        oldest: Optional[datetime] = None,
+        done: bool = False,
+    ) -> None:
+        self.last_id = last_id
+        self.collected = collected
+        self.oldest = oldest
+        self.done = done
+
+
+class BackfillCheckpoint:
+    """Progress of a backfill, so it can be resumed after an interruption.
+
+    The checkpoint contains the position in the news lists and the failed posts. The
+    fetched items are appended to a separate file after each page, because the feed
+    files are only written once the backfill is completed.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path = path
+        self.params: Dict[str, Any] = {}
+        self.categories: Dict[FeedItemCategory, CategoryState] = {}
+        self.failed_ids: Set[int] = set()
+
+    @property
+    def path(self) -> Optional[Path]:
+        """Path of the checkpoint file or None if it is not persisted."""
+        return self._path
+
+    @property
+    def items_path(self) -> Optional[Path]:
+        """Path of the file with the fetched items or None if it is not persisted."""
+        return self._path.with_suffix(".items.jsonl") if self._path else None
+
+    def get_state(self, category: FeedItemCategory) -> CategoryState:
+        """Crawling state of a category (created if missing)."""
+        return self.categories.setdefault(category, CategoryState())
+
+    def reset(self, params: Dict[str, Any]) -> None:
+        """Start a new backfill with the given parameters."""
+
+        self.params = params
+        self.categories = {}
+        self.failed_ids = set()
+
+    async def load(self) -> None:
+        """Load the checkpoint from file (if persisted and existing)."""
+
+        if self._path is None or not await aiofiles.ospath.exists(self._path):
+            return
+
+        try:
+            async with aiofiles.open(self._path, "r") as fd:
+                checkpoint_dict: Dict[str, Any] = json.loads(await fd.read())
+
+            categories = {
+                FeedItemCategory.from_str(name): CategoryState(
+                    state["last_id"],
+                    int(state["collected"]),
+                    datetime.fromisoformat(state["oldest"])
+                    if state["oldest"] is not None
+                    else None,
+                    bool(state["done"]),
+                )
+                for name, state in checkpoint_dict["categories"].items()
+            }
+
+            self.params = dict(checkpoint_dict["params"])
+            self.categories = categories
+            self.failed_ids = {int(i) for i in checkpoint_dict["failed_ids"]}
+        except (IOError, AttributeError, KeyError, TypeError, ValueError):
+            # the backfill is only started from the beginning again
+            logger.warning('Could not load backfill checkpoint "%s"!', self._path)
+
+    async def save(self) -> None:
+        """Save the checkpoint to file (if persisted)."""
+
+        if self._path is None:
+            return
+
+        checkpoint_dict = {
+            "params": self.params,
+            "categories": {
+                category.name.lower(): {
+                    "last_id": state.last_id,
+                    "collected": state.collected,
+                    "oldest": state.oldest.isoformat() if state.oldest else None,
+                    "done": state.done,
+                }
+                for category, state in self.categories.items()
+            },
+            "failed_ids": sorted(self.failed_ids),
+        }
+
+        try:
+            async with aiofiles.open(self._path, "w") as fd:
+                await fd.write(json.dumps(checkpoint_dict))
+        except IOError:
+            logger.warning('Could not save backfill checkpoint "%s"!', self._path)
+
+    async def add_items(self, feed_items: List[FeedItem]) -> None:
+        """Append fetched items to the items file (if persisted)."""
+
+        if self.items_path is None or len(feed_items) == 0:
+            return
+
+        try:
+            async with aiofiles.open(self.items_path, "a") as fd:
+                await fd.write("".join(item.json() + "\n" for item in feed_items))
+        except IOError:
+            logger.warning('Could not save backfill items "%s"!', self.items_path)
+
+    async def load_items(self) -> List[FeedItem]:
+        """Load the fetched items of an interrupted backfill (newest versions last)."""
+
+        if self.items_path is None or not await aiofiles.ospath.exists(self.items_path):
+            return []
+
+        try:
+            async with aiofiles.open(self.items_path, "r") as fd:
+                lines = (await fd.read()).splitlines()
+
+            return [FeedItem.parse_raw(line) for line in lines if line]
+        except (IOError, ValueError):
+            # the missing items are fetched again
+            logger.warning('Could not load backfill items "%s"!', self.items_path)
+            return []
+
+    async def remove(self) -> None:
+        """Remove the checkpoint and items files of a backfill."""
+
+        for path in [self._path, self.items_path]:
+            if path is not None and await aiofiles.ospath.exists(path):
+                await aiofiles.os.remove(path)
+
+    @staticmethod
+    def get_default_path(feed_path: Path) -> Path:
+        """Default checkpoint path next to a feed file."""
+        return feed_path.with_name(".{}.backfill.json".format(feed_path.name))
+
+
+class BackfillProgress:
+    """Throughput and estimated remaining time of a backfill."""
+
+    __slots__ = ("_start", "_start_fraction", "failed", "fetched", "fraction")
+
+    def __init__(self, fraction: float = 0) -> None:
+        self.fetched = 0
+        self.failed = 0
+        self.fraction = fraction
+        self._start = time.monotonic()
+        self._start_fraction = fraction
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the start (of this session)."""
+        return time.monotonic() - self._start
+
+    @property
+    def throughput(self) -> float:
+        """Fetched posts per second."""
+
+        elapsed = self.elapsed
+        return self.fetched / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until the backfill is completed (None if unknown)."""
+
+        progress = self.fraction - self._start_fraction
+        if progress <= 0:
+            return None
+
+        return self.elapsed * (1 - self.fraction) / progress
+
+    def __str__(self) -> str:
+        eta = self.eta
+
+        return (
+            "{:.0%} done, {} posts fetched ({} failed), {:.1f} posts/s, ETA {}".format(
+                self.fraction,
+                self.fetched,
+                self.failed,
+                self.throughput,
+                timedelta(seconds=round(eta)) if eta is not None else "unknown",
+            )
+        )
+
+
+class Backfiller:
+    """Fetch the history of a feed page by page instead of in one large update.
+
+    The news lists are crawled back to a date or up to a number of posts per
+    category. Posts are fetched with bounded concurrency and rate limiting. Only the
+    checkpoint is saved after each page, so an interrupted backfill resumes from it,
+    and the feed files are written once at the end.
+    """
+
+    def __init__(
+        self,
+        feed_meta: FeedMeta,
+        feed_writers: List[AbstractFeedFileWriter],
+        feed_loader: Optional[AbstractFeedFileLoader] = None,
+        categories: Optional[List[FeedItemCategory]] = None,
+        until: Optional[datetime] = None,
+        count: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rate: Optional[float] = DEFAULT_RATE,
+        checkpoint: Optional[BackfillCheckpoint] = None,
+    ) -> None:
+        if feed_loader is None:
+            loader_factory = FeedFileLoaderFactory()
+            feed_loader = loader_factory.create_fallback_loader(feed_writers)
+
+        if checkpoint is None:
+            checkpoint = BackfillCheckpoint(
+                BackfillCheckpoint.get_default_path(feed_loader.config.path)
+            )
+
+        # without a date, the posts of the feed are backfilled
+        if until is None and count is None:
+            count = feed_meta.category_size
+
+        self._feed_meta = feed_meta
+        self._feed_writers = feed_writers
+        self._feed_loader = feed_loader
+        self._feed_index = FeedIndex(
+            FeedIndex.get_default_path(feed_loader.config.path)
+        )
+        self._page_index = FeedPageIndex(feed_loader.config.path)
+        self._categories = (
+            categories or feed_meta.categories or [c for c in FeedItemCategory]
+        )
+        self._until = until
+        self._count = count
+        self._page_size = page_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._rate_limiter = RateLimiter(rate)
+        self._checkpoint = checkpoint
+        self._hoyolab = HoyolabNews(feed_meta.game, feed_meta.language)
+        self._items: Dict[int, FeedItem] = {}
+        self._fingerprints: Dict[int, str] = {}
+        self._progress = BackfillProgress()
+
+    @property
+    def checkpoint(self) -> BackfillCheckpoint:
+        """Checkpoint of the backfill."""
+        return self._checkpoint
+
+    @property
+    def progress(self) -> BackfillProgress:
+        """Progress of the last run."""
+        return self._progress
+
+    @classmethod
+    def from_config(cls: Type[_B], feed_config: FeedConfig, **options: Any) -> _B:
+        """Create an instance via a feed config and the options of the backfill."""
+
+        writer_factory = FeedFileWriterFactory()
+        writers = [
+            writer_factory.create_writer(writer_config)
+            for writer_config in feed_config.writer_configs
+        ]
+
+        loader = (
+            FeedFileLoaderFactory().create_loader(feed_config.loader_config)
+            if feed_config.loader_config
+            else None
+        )
+
+        return cls(feed_config.feed_meta, writers, loader, **options)
+
+    async def run(
+        self, session: Optional[aiohttp.ClientSession] = None, restart: bool = False
+    ) -> None:
+        """Run (or resume) the backfill until all categories are completed."""
+
+        local_session = session or aiohttp.ClientSession(
+            trace_configs=tracing.get_trace_configs()
+        )
+
+        try:
+            with tracing.span("backfill"):
+                await self._run(local_session, restart)
+        finally:
+            if session is None:
+                await local_session.close()
+
+    async def _run(self, session: aiohttp.ClientSession, restart: bool) -> None:
+        """Run the backfill (without tracing)."""
+
+        title = self._feed_meta.title or self._feed_meta.game.name.title()
+        params = self._get_params()
+
+        await self._checkpoint.load()
+
+        self._items = {
+            item.id: item for item in await self._feed_loader.get_feed_items()
+        }
+
+        if restart or self._checkpoint.params != params:
+            await self._checkpoint.remove()
+            self._checkpoint.reset(params)
+        else:
+            logger.info('Resuming backfill of "%s" feed.', title)
+
+            for item in await self._checkpoint.load_items():
+                self._items[item.id] = item
+                self._fingerprints[item.id] = item.get_fingerprint()
+
+        await self._feed_index.load()
+        await self._page_index.load()
+
+        self._progress = BackfillProgress(self._get_fraction())
+
+        # posts which failed before are retried first
+        if len(self._checkpoint.failed_ids) > 0:
+            retry_ids = sorted(self._checkpoint.failed_ids, reverse=True)
+            self._checkpoint.failed_ids.clear()
+
+            await self._fetch_items(session, retry_ids)
+            await self._checkpoint.save()
+
+        for category in self._categories:
+            state = self._checkpoint.get_state(category)
+
+            while not state.done:
+                await self._backfill_page(session, category, state)
+                await self._checkpoint.save()
+
+                logger.info(
+                    'Backfill of "%s" feed (%s): %s',
+                    title,
+                    category.name.title(),
+                    self._progress,
+                )
+
+        if len(self._checkpoint.failed_ids) > 0:
+            logger.warning(
+                'Backfill of "%s" feed is missing %d failed posts (run it again to '
+                "retry them).",
+                title,
+                len(self._checkpoint.failed_ids),
+            )
+
+        await self._write_feeds()
+
+        if len(self._checkpoint.failed_ids) == 0:
+            await self._checkpoint.remove()
+
+            logger.info(
+                'Backfill of "%s" feed completed with %d items.',
+                title,
+                len(self._items),
+            )
+
+    async def _backfill_page(
+        self,
+        session: aiohttp.ClientSession,
+        category: FeedItemCategory,
+        state: CategoryState,
+    ) -> None:
+        """Fetch the missing posts of the next page of a category."""
+
+        page_size = self._page_size
+        if self._count is not None:
+            page_size = min(page_size, self._count - state.collected)
+
+        await self._rate_limiter.wait()
+
+        item_metas, next_id = await self._hoyolab.get_news_page(
+            session, category, page_size, state.last_id
+        )
+
+        fetch_ids: List[int] = []
+        state.done = next_id is None
+
+        for item_meta in item_metas:
+            published = item_meta.published or item_meta.last_modified
+
+            if self._until is not None and published < self._until:
+                state.done = True
+                break
+
+            state.collected += 1
+            state.oldest = published
+
+            # known posts are skipped (e.g. of a previous run or update)
+            if self._page_index.is_archived(item_meta.id, item_meta.last_modified):
+                continue
+
+            known_item = self._items.get(item_meta.id)
+            if known_item is None or item_meta.last_modified > max(
+                known_item.published, known_item.updated or known_item.published
+            ):
+                fetch_ids.append(item_meta.id)
+
+        if self._count is not None and state.collected >= self._count:
+            state.done = True
+
+        if len(fetch_ids) > 0:
+            await self._fetch_items(session, fetch_ids)
+
+        state.last_id = next_id
+        self._progress.fraction = self._get_fraction()
+
+    async def _fetch_items(
+        self, session: aiohttp.ClientSession, post_ids: List[int]
+    ) -> None:
+        """Fetch posts with bounded concurrency and add them to the items."""
+
+        async def fetch(post_id: int) -> FeedItem:
+            async with self._semaphore:
+                await self._rate_limiter.wait()
+                return await self._hoyolab.get_feed_item(session, post_id)
+
+        results = await asyncio.gather(
+            *[fetch(post_id) for post_id in post_ids], return_exceptions=True
+        )
+
+        fetched_items: List[FeedItem] = []
+        for post_id, result in zip(post_ids, results):
+            if isinstance(result, FeedItem):
+                fetched_items.append(result)
+                self._items[result.id] = result
+                self._fingerprints[result.id] = result.get_fingerprint()
+                self._progress.fetched += 1
+            elif isinstance(result, Exception):
+                # failed posts are retried when the backfill is resumed
+                logger.warning("Could not fetch post %d: %s", post_id, result)
+                self._checkpoint.failed_ids.add(post_id)
+                self._progress.failed += 1
+            else:
+                raise result
+
+        # only appended, so a checkpoint does not rewrite the previous pages
+        await self._checkpoint.add_items(fetched_items)
+
+    async def _write_feeds(self) -> None:
+        """Write the feed files with all items of the backfill."""
+
+        feed_items = sorted(self._items.values(), key=lambda i: i.id, reverse=True)
+
+        # the regular updates keep the newest items of each category, so the older
+        # ones are moved to archive pages (if the writers are paged)
+        head_ids: Set[int] = set()
+        for category in FeedItemCategory:
+            category_ids = [item.id for item in feed_items if item.category == category]
+            head_ids.update(category_ids[: self._feed_meta.category_size])
+
+        archive_ids = {item.id for item in feed_items} - head_ids
+
+        if len(archive_ids) > 0 and any(
+            writer.config.page_size is None for writer in self._feed_writers
+        ):
+            logger.warning(
+                "%d backfilled items exceed the category size and are removed by "
+                "the next update of feeds without a page size!",
+                len(archive_ids),
+            )
+
+        with tracing.span("write_feeds"):
+            await asyncio.gather(
+                *[
+                    writer.write_feed(self._feed_meta, feed_items, archive_ids)
+                    for writer in self._feed_writers
+                ]
+            )
+
+        # the index of the --check mode has to know the backfilled items
+        self._feed_index.update(feed_items, self._fingerprints)
+        await self._feed_index.save()
+
+    def _get_params(self) -> Dict[str, Any]:
+        """Parameters which must match to resume a backfill from a checkpoint."""
+
+        return {
+            "game": self._feed_meta.game.name.lower(),
+            "language": str(self._feed_meta.language),
+            "categories": [c.name.lower() for c in self._categories],
+            "until": self._until.isoformat() if self._until else None,
+            "count": self._count,
+        }
+
+    def _get_fraction(self) -> float:
+        """Completed fraction of the backfill (by count or date)."""
+
+        now = datetime.now(timezone.utc)
+        fractions = []
+
+        for category in self._categories:
+            state = self._checkpoint.get_state(category)
+            fraction = 1.0 if state.done else 0.0
+
+            if not state.done and self._count is not None and self._count > 0:
+                fraction = max(fraction, state.collected / self._count)
+
+            if not state.done and self._until is not None and state.oldest is not None:
+                span = (now - self._until).total_seconds()
+                if span > 0:
+                    covered = (now - state.oldest).total_seconds()
+                    fraction = max(fraction, min(covered / span, 1.0))
+
+            fractions.append(fraction)
+
+        return sum(fractions) / len(fractions)
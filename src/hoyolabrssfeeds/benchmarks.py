@@ -0,0 +1,544 @@
+import argparse
+import asyncio
+import copy
+import fnmatch
+import functools
+import gc
+import inspect
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+import aiohttp
+import pydantic
+from aiohttp import web
+
+from .feeds import GameFeedCollection
+from .hoyolab import API_BASE_URL_ENV
+from .hoyolab import HoyolabNews
+from .loaders import AtomFeedFileLoader
+from .loaders import JSONFeedFileLoader
+from .models import FeedConfig
+from .models import FeedFileConfig
+from .models import FeedFileWriterConfig
+from .models import FeedItem
+from .models import FeedMeta
+from .models import FeedType
+from .models import Game
+from .models import Language
+from .simulator import API_PATH
+from .simulator import HoyolabSimulator
+from .writers import AtomFeedFileWriter
+from .writers import JSONFeedFileWriter
+
+logger = logging.getLogger(__name__)
+
+RESULTS_VERSION = 1
+
+# relative slowdown of the median before a benchmark counts as regression
+DEFAULT_THRESHOLD = 0.1
+
+# number of feeds of the macro benchmarks (at most one feed per game and language)
+DEFAULT_FEED_COUNTS = (1, 10, 100)
+
+# a round runs the code once and returns nothing (or an awaitable)
+_RoundFunc = Callable[[], Any]
+
+
+class BenchmarkResult:
+    """Measured times (in seconds) of the rounds of a benchmark."""
+
+    __slots__ = ("name", "times")
+
+    def __init__(self, name: str, times: List[float]) -> None:
+        self.name = name
+        self.times = times
+
+    @property
+    def min(self) -> float:
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def mean(self) -> float:
+        return statistics.mean(self.times)
+
+    @property
+    def stdev(self) -> float:
+        return statistics.stdev(self.times) if len(self.times) > 1 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rounds": len(self.times),
+            "min": self.min,
+            "median": self.median,
+            "mean": self.mean,
+            "stdev": self.stdev,
+            "times": self.times,
+        }
+
+
+class BenchmarkComparison:
+    """Comparison of the median of a benchmark with its baseline."""
+
+    __slots__ = ("baseline", "current", "name", "threshold")
+
+    def __init__(
+        self, name: str, baseline: float, current: float, threshold: float
+    ) -> None:
+        self.name = name
+        self.baseline = baseline
+        self.current = current
+        self.threshold = threshold
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline > 0 else 1.0
+
+    @property
+    def is_regression(self) -> bool:
+        return self.ratio > 1 + self.threshold
+
+
+class BenchmarkSuite:
+    """Micro- and macro-benchmarks of the feed generation.
+
+    The micro-benchmarks measure the CPU-bound steps on a batch of synthetic posts.
+    The macro-benchmarks measure complete cold runs of a feed collection against a
+    local API simulator, i.e. every round fetches all posts and writes new feeds.
+    """
+
+    def __init__(
+        self,
+        rounds: int = 5,
+        warmup: int = 1,
+        posts_per_category: int = 5,
+        paragraphs: int = 10,
+        feed_counts: Sequence[int] = DEFAULT_FEED_COUNTS,
+    ) -> None:
+        self._rounds = rounds
+        self._warmup = warmup
+        self._simulator = HoyolabSimulator(
+            posts_per_category=posts_per_category, paragraphs=paragraphs
+        )
+        self._feed_counts = feed_counts
+        self._runner: Optional[web.AppRunner] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._temp_dir: Optional[tempfile.TemporaryDirectory[str]] = None
+        self._previous_base_url: Optional[str] = None
+
+    @property
+    def names(self) -> List[str]:
+        """Names of all benchmarks of the suite."""
+        return list(self._get_benchmarks())
+
+    def _get_benchmarks(self) -> Dict[str, Callable[[], Awaitable[_RoundFunc]]]:
+        """Setup functions (called before every round) of the benchmarks by name."""
+
+        benchmarks: Dict[str, Callable[[], Awaitable[_RoundFunc]]] = {
+            "micro.transform": self._setup_transform,
+            "micro.structured_content": self._setup_structured_content,
+            "micro.validate_items": self._setup_validate_items,
+            "micro.encode_json": self._setup_encode_json,
+            "micro.encode_atom": self._setup_encode_atom,
+            "micro.decode_json": self._setup_decode_json,
+            "micro.decode_atom": self._setup_decode_atom,
+        }
+
+        for feed_count in self._feed_counts:
+            benchmarks["macro.create_feeds.{}".format(feed_count)] = functools.partial(
+                self._setup_create_feeds, feed_count
+            )
+
+        return benchmarks
+
+    async def run(self, patterns: Optional[List[str]] = None) -> List[BenchmarkResult]:
+        """Run all benchmarks (matching one of the name patterns)."""
+
+        results = []
+
+        await self._start()
+
+        try:
+            for name, setup in self._get_benchmarks().items():
+                if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+                    continue
+
+                logger.info("Running benchmark %s...", name)
+
+                times = []
+                for round_index in range(self._warmup + self._rounds):
+                    elapsed = await self._run_round(await setup())
+
+                    if round_index >= self._warmup:
+                        times.append(elapsed)
+
+                results.append(BenchmarkResult(name, times))
+        finally:
+            await self._stop()
+
+        return results
+
+    @staticmethod
+    async def _run_round(round_func: _RoundFunc) -> float:
+        """Run a round and return its duration."""
+
+        gc.collect()
+
+        start = time.perf_counter()
+        result = round_func()
+        if inspect.isawaitable(result):
+            await result
+
+        return time.perf_counter() - start
+
+    async def _start(self) -> None:
+        """Start the simulator and create the temporary directory."""
+
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="hoyolabrssfeeds-bench-")
+
+        self._runner = web.AppRunner(self._simulator.create_app(), access_log=None)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+
+        host, port = self._runner.addresses[0][:2]
+
+        # the feeds of a collection create their api clients from the environment
+        self._previous_base_url = os.environ.get(API_BASE_URL_ENV)
+        os.environ[API_BASE_URL_ENV] = "http://{}:{}{}".format(host, port, API_PATH)
+
+        self._session = aiohttp.ClientSession(raise_for_status=True)
+
+    async def _stop(self) -> None:
+        """Stop the simulator and remove the temporary directory."""
+
+        if self._previous_base_url is None:
+            os.environ.pop(API_BASE_URL_ENV, None)
+        else:
+            os.environ[API_BASE_URL_ENV] = self._previous_base_url
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+
+    def _create_path(self, name: str) -> Path:
+        """Create a new (empty) directory in the temporary directory."""
+
+        assert self._temp_dir is not None
+
+        return Path(tempfile.mkdtemp(prefix=name, dir=self._temp_dir.name))
+
+    def _get_posts(self) -> List[Dict[str, Any]]:
+        """Full posts of all games as returned by the API (structured in English)."""
+
+        posts: List[Dict[str, Any]] = []
+        for game in Game:
+            posts.extend(self._simulator.get_posts(game).values())
+
+        for i, post in enumerate(posts):
+            if post["post"]["content"] == "":
+                posts[i] = {**post, "post": {**post["post"], "content": "en-us"}}
+
+        return posts
+
+    def _get_items(self) -> List[FeedItem]:
+        """Feed items of the transformed posts."""
+
+        hoyolab = HoyolabNews(Game.GENSHIN)
+
+        return [
+            pydantic.parse_obj_as(
+                FeedItem, hoyolab._create_item_dict(hoyolab._transform_post(post))
+            )
+            for post in copy.deepcopy(self._get_posts())
+        ]
+
+    async def _setup_transform(self) -> _RoundFunc:
+        hoyolab = HoyolabNews(Game.GENSHIN)
+
+        # the posts are transformed in place
+        posts = copy.deepcopy(self._get_posts())
+
+        def transform() -> None:
+            for post in posts:
+                hoyolab._transform_post(post)
+
+        return transform
+
+    async def _setup_structured_content(self) -> _RoundFunc:
+        contents = [
+            post["post"]["structured_content"]
+            for post in self._get_posts()
+            if post["post"]["view_type"] == 1
+        ]
+
+        def parse() -> None:
+            for content in contents:
+                HoyolabNews._parse_structured_content(content)
+
+        return parse
+
+    async def _setup_validate_items(self) -> _RoundFunc:
+        hoyolab = HoyolabNews(Game.GENSHIN)
+        item_dicts = [
+            hoyolab._create_item_dict(hoyolab._transform_post(post))
+            for post in copy.deepcopy(self._get_posts())
+        ]
+
+        def validate() -> None:
+            pydantic.parse_obj_as(List[FeedItem], item_dicts)
+
+        return validate
+
+    async def _setup_encode_json(self) -> _RoundFunc:
+        writer = JSONFeedFileWriter(
+            FeedFileWriterConfig(
+                feed_type=FeedType.JSON, path=self._create_path("json") / "feed.json"
+            )
+        )
+        feed_meta = FeedMeta(game=Game.GENSHIN)
+        items = self._get_items()
+
+        return lambda: writer.encode_feed(feed_meta, items)
+
+    async def _setup_encode_atom(self) -> _RoundFunc:
+        writer = AtomFeedFileWriter(
+            FeedFileWriterConfig(
+                feed_type=FeedType.ATOM, path=self._create_path("atom") / "feed.xml"
+            )
+        )
+        feed_meta = FeedMeta(game=Game.GENSHIN)
+        items = self._get_items()
+
+        return lambda: writer.encode_feed(feed_meta, items)
+
+    async def _setup_decode_json(self) -> _RoundFunc:
+        path = self._create_path("json") / "feed.json"
+        config = FeedFileWriterConfig(feed_type=FeedType.JSON, path=path)
+
+        await JSONFeedFileWriter(config).write_feed(
+            FeedMeta(game=Game.GENSHIN), self._get_items()
+        )
+
+        loader = JSONFeedFileLoader(FeedFileConfig(feed_type=FeedType.JSON, path=path))
+
+        return loader.get_feed_items
+
+    async def _setup_decode_atom(self) -> _RoundFunc:
+        path = self._create_path("atom") / "feed.xml"
+        config = FeedFileWriterConfig(feed_type=FeedType.ATOM, path=path)
+
+        await AtomFeedFileWriter(config).write_feed(
+            FeedMeta(game=Game.GENSHIN), self._get_items()
+        )
+
+        loader = AtomFeedFileLoader(FeedFileConfig(feed_type=FeedType.ATOM, path=path))
+
+        return loader.get_feed_items
+
+    async def _setup_create_feeds(self, feed_count: int) -> _RoundFunc:
+        path = self._create_path("feeds")
+        feed_configs = [
+            FeedConfig(
+                feed_meta=FeedMeta(game=game, language=language),
+                writer_configs=[
+                    FeedFileWriterConfig(
+                        feed_type=FeedType.JSON,
+                        path=path / "{}-{}.json".format(game.name.lower(), language),
+                    ),
+                    FeedFileWriterConfig(
+                        feed_type=FeedType.ATOM,
+                        path=path / "{}-{}.xml".format(game.name.lower(), language),
+                    ),
+                ],
+            )
+            for game, language in itertools.islice(
+                itertools.product(Game, Language), feed_count
+            )
+        ]
+
+        collection = GameFeedCollection.from_configs(feed_configs)
+        session = self._session
+
+        return lambda: collection.create_feeds(session)
+
+
+def results_to_dict(results: List[BenchmarkResult]) -> Dict[str, Any]:
+    """Machine-readable results with info about the environment."""
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {result.name: result.to_dict() for result in results},
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[BenchmarkComparison]:
+    """Compare the medians of the benchmarks found in both results."""
+
+    return [
+        BenchmarkComparison(
+            name,
+            float(baseline["benchmarks"][name]["median"]),
+            float(result["median"]),
+            threshold,
+        )
+        for name, result in current["benchmarks"].items()
+        if name in baseline["benchmarks"]
+    ]
+
+
+def format_results(
+    results: List[BenchmarkResult],
+    comparisons: Optional[List[BenchmarkComparison]] = None,
+) -> str:
+    """Human-readable table of the results (and the comparison with a baseline)."""
+
+    compared = {comparison.name: comparison for comparison in comparisons or []}
+
+    lines = [
+        "{:<28} {:>11} {:>11} {:>11}   {}".format(
+            "benchmark", "min", "median", "stdev", "baseline"
+        )
+    ]
+
+    for result in results:
+        comparison = compared.get(result.name)
+        change = ""
+
+        if comparison is not None:
+            change = "{:+.1%}{}".format(
+                comparison.ratio - 1,
+                " REGRESSION" if comparison.is_regression else "",
+            )
+
+        lines.append(
+            "{:<28} {:>9.3f}ms {:>9.3f}ms {:>9.3f}ms   {}".format(
+                result.name,
+                result.min * 1000,
+                result.median * 1000,
+                result.stdev * 1000,
+                change,
+            )
+        )
+
+    return "\n".join(lines)
+
+
+def cli() -> None:
+    arg_parser = argparse.ArgumentParser(
+        prog="hoyolabrssfeeds.benchmarks",
+        description="Benchmark the feed generation and compare it to a baseline.",
+    )
+
+    arg_parser.add_argument(
+        "-f",
+        "--filter",
+        action="append",
+        metavar="PATTERN",
+        help='Run only benchmarks matching the pattern (e.g. "micro.*")',
+    )
+    arg_parser.add_argument(
+        "--rounds", default=5, help="Measured rounds per benchmark", type=int
+    )
+    arg_parser.add_argument(
+        "--warmup", default=1, help="Unmeasured rounds per benchmark", type=int
+    )
+    arg_parser.add_argument(
+        "--posts", default=5, help="Simulated posts per game and category", type=int
+    )
+    arg_parser.add_argument(
+        "-o",
+        "--output",
+        metavar="PATH",
+        default=None,
+        help="Write the results as JSON (e.g. to use them as baseline)",
+        type=Path,
+    )
+    arg_parser.add_argument(
+        "-b",
+        "--baseline",
+        metavar="PATH",
+        default=None,
+        help="Compare the results to a baseline and fail on regressions",
+        type=Path,
+    )
+    arg_parser.add_argument(
+        "-t",
+        "--threshold",
+        default=DEFAULT_THRESHOLD,
+        help="Relative slowdown of the median counted as regression",
+        type=float,
+    )
+
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(
+        format="%(asctime)s | %(levelname)-8s | %(message)s", level=logging.WARNING
+    )
+
+    baseline = None
+    if args.baseline is not None:
+        try:
+            baseline = json.loads(args.baseline.read_text())
+        except (IOError, ValueError) as err:
+            arg_parser.error(
+                'Could not load baseline "{}": {}'.format(args.baseline, err)
+            )
+
+    suite = BenchmarkSuite(
+        rounds=args.rounds, warmup=args.warmup, posts_per_category=args.posts
+    )
+    results = asyncio.run(suite.run(args.filter))
+    results_dict = results_to_dict(results)
+
+    comparisons = None
+    if baseline is not None:
+        comparisons = compare_results(baseline, results_dict, args.threshold)
+
+    print(format_results(results, comparisons))
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results_dict, indent=2))
+
+    if comparisons is not None and any(c.is_regression for c in comparisons):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,177 @@
+import gzip
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import List
+from typing import Set
+
+import aiofiles
+import aiofiles.os
+import aiofiles.ospath
+
+from .compressors import compress_gzip
+from .errors import FeedIOError
+from .models import FeedItem
+from .models import OffloadedFeedItem
+
+logger = logging.getLogger(__name__)
+
+# number of recently used contents which are kept in memory
+DEFAULT_LRU_SIZE = 64
+
+BLOB_SUFFIX = ".html.gz"
+
+
+class BlobStore:
+    """Content-addressed store of item contents on disk.
+
+    Items are offloaded to the store after a run, so only their meta data stays in
+    memory. The contents are materialized again only while a writer encodes them,
+    with a small LRU cache of the recently used contents. This does not cover the
+    encoded feeds, which the writers (and the server) keep in memory.
+    """
+
+    def __init__(self, directory: Path, lru_size: int = DEFAULT_LRU_SIZE) -> None:
+        self._directory = directory
+        self._lru_size = lru_size
+        self._hot: OrderedDict[str, str] = OrderedDict()
+        self._stored: Set[str] = set()
+
+    @property
+    def directory(self) -> Path:
+        """Directory of the blob files."""
+        return self._directory
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._stored
+
+    @staticmethod
+    def get_key(content: str) -> str:
+        """Key (i.e. SHA-256 hash) of a content."""
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get_path(self, key: str) -> Path:
+        """Path of the blob of a key (sharded by the first two characters)."""
+        return self._directory / key[:2] / (key + BLOB_SUFFIX)
+
+    async def put(self, content: str) -> str:
+        """Store a content (if not already stored) and return its key."""
+
+        key = self.get_key(content)
+
+        if key not in self._stored:
+            path = self.get_path(key)
+
+            try:
+                if not await aiofiles.ospath.exists(path):
+                    await aiofiles.os.makedirs(path.parent, exist_ok=True)
+
+                    # written to a temporary file first to never leave partial blobs
+                    tmp_path = path.with_name(path.name + ".tmp")
+                    async with aiofiles.open(tmp_path, "wb") as fd:
+                        await fd.write(compress_gzip(content.encode()))
+
+                    await aiofiles.os.replace(tmp_path, path)
+            except IOError as err:
+                raise FeedIOError(
+                    'Could not store content in "{}"!'.format(self._directory)
+                ) from err
+
+            self._stored.add(key)
+
+        self._remember(key, content)
+
+        return key
+
+    async def get(self, key: str) -> str:
+        """Load the content of a key."""
+
+        content = self._hot.get(key)
+
+        if content is not None:
+            self._hot.move_to_end(key)
+            return content
+
+        try:
+            async with aiofiles.open(self.get_path(key), "rb") as fd:
+                content = gzip.decompress(await fd.read()).decode()
+        except (IOError, EOFError, UnicodeDecodeError) as err:
+            raise FeedIOError(
+                'Could not load content "{}" from "{}"!'.format(key, self._directory)
+            ) from err
+
+        self._stored.add(key)
+        self._remember(key, content)
+
+        return content
+
+    async def offload(self, feed_items: List[FeedItem]) -> List[FeedItem]:
+        """Replace the contents of items with references to the store."""
+
+        offloaded_items: List[FeedItem] = []
+
+        for item in feed_items:
+            if not isinstance(item, OffloadedFeedItem):
+                key = await self.put(item.content)
+                item = OffloadedFeedItem.from_trusted(
+                    {**item.dict(), "content": "", "content_key": key}
+                )
+
+            offloaded_items.append(item)
+
+        return offloaded_items
+
+    async def materialize(self, feed_items: List[FeedItem]) -> List[FeedItem]:
+        """Replace the offloaded items with items including their contents."""
+
+        materialized_items: List[FeedItem] = []
+
+        for item in feed_items:
+            if isinstance(item, OffloadedFeedItem):
+                content = await self.get(item.content_key)
+                item = FeedItem.from_trusted(
+                    {**item.dict(exclude={"content_key"}), "content": content}
+                )
+
+            materialized_items.append(item)
+
+        return materialized_items
+
+    async def prune(self, keys: Set[str]) -> int:
+        """Remove all blobs except those of the given keys and return their number."""
+
+        if not await aiofiles.ospath.exists(self._directory):
+            return 0
+
+        removed = 0
+
+        try:
+            for shard in await aiofiles.os.listdir(self._directory):
+                shard_path = self._directory / shard
+
+                for file_name in await aiofiles.os.listdir(shard_path):
+                    key = file_name.removesuffix(BLOB_SUFFIX)
+
+                    if key not in keys:
+                        await aiofiles.os.remove(shard_path / file_name)
+                        self._stored.discard(key)
+                        self._hot.pop(key, None)
+                        removed += 1
+
+                if len(await aiofiles.os.listdir(shard_path)) == 0:
+                    await aiofiles.os.rmdir(shard_path)
+        except IOError:
+            # stale blobs only waste disk space until the next run
+            logger.warning('Could not prune blob store "%s"!', self._directory)
+
+        return removed
+
+    def _remember(self, key: str, content: str) -> None:
+        """Add a content to the LRU cache (and evict the least recently used)."""
+
+        self._hot[key] = content
+        self._hot.move_to_end(key)
+
+        while len(self._hot) > self._lru_size:
+            self._hot.popitem(last=False)
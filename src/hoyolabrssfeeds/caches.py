@@ -0,0 +1,344 @@
+import json
+import logging
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import aiofiles
+import aiofiles.os
+import aiofiles.ospath
+
+from .models import FeedItem
+from .models import FeedItemMeta
+from .models import Game
+from .models import Language
+
+logger = logging.getLogger(__name__)
+
+# game, language, post id and last modification of the post
+NegativeCacheKey = Tuple[Game, Language, int, datetime]
+
+DEFAULT_NEGATIVE_CACHE_TTL = timedelta(days=7)
+DEFAULT_NEGATIVE_CACHE_DELAY = timedelta(minutes=30)
+
+
+class NegativeCacheEntry:
+    """Failure record of a single post."""
+
+    __slots__ = ("failures", "first_failed", "last_failed")
+
+    def __init__(
+        self, failures: int, first_failed: datetime, last_failed: datetime
+    ) -> None:
+        self.failures = failures
+        self.first_failed = first_failed
+        self.last_failed = last_failed
+
+
+class NegativeCache:
+    """Cache of posts that could not be fetched (e.g. deleted or broken posts).
+
+    A failed post is skipped until it was modified on Hoyolab, the next re-probe is
+    due or the entry expired. The delay between re-probes doubles after each
+    failure and is limited by the TTL.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl: timedelta = DEFAULT_NEGATIVE_CACHE_TTL,
+        delay: timedelta = DEFAULT_NEGATIVE_CACHE_DELAY,
+    ) -> None:
+        self._path = path
+        self._ttl = ttl
+        self._delay = delay
+        self._entries: Dict[NegativeCacheKey, NegativeCacheEntry] = {}
+        self._loaded = False
+
+    @property
+    def path(self) -> Optional[Path]:
+        """Path of the cache file or None if the cache is not persisted."""
+        return self._path
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def is_blocked(self, key: NegativeCacheKey, now: Optional[datetime] = None) -> bool:
+        """Check if the post should be skipped for now."""
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+
+        now = now or datetime.now(timezone.utc)
+
+        if now >= entry.first_failed + self._ttl:
+            del self._entries[key]
+            return False
+
+        return now < self._next_probe(entry)
+
+    def add_failure(
+        self, key: NegativeCacheKey, now: Optional[datetime] = None
+    ) -> None:
+        """Record a failed request of a post."""
+
+        now = now or datetime.now(timezone.utc)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self._entries[key] = NegativeCacheEntry(1, now, now)
+        else:
+            entry.failures += 1
+            entry.last_failed = now
+
+    def discard(self, game: Game, language: Language, post_id: int) -> None:
+        """Remove all entries of a post (e.g. after it was fetched successfully)."""
+
+        for key in [k for k in self._entries if k[:3] == (game, language, post_id)]:
+            del self._entries[key]
+
+    def prune(self, now: Optional[datetime] = None) -> None:
+        """Remove expired entries."""
+
+        now = now or datetime.now(timezone.utc)
+
+        for key, entry in list(self._entries.items()):
+            if now >= entry.first_failed + self._ttl:
+                del self._entries[key]
+
+    def _next_probe(self, entry: NegativeCacheEntry) -> datetime:
+        """Calculate the time of the next re-probe of an entry."""
+
+        # limit exponent to avoid overflows of timedelta
+        delay: timedelta = min(
+            self._delay * 2 ** min(entry.failures - 1, 32), self._ttl
+        )
+
+        return entry.last_failed + delay
+
+    async def load(self) -> None:
+        """Load the cache from file (only once and if persisted)."""
+
+        if self._loaded or self._path is None:
+            return
+
+        self._loaded = True
+
+        if not await aiofiles.ospath.exists(self._path):
+            return
+
+        try:
+            async with aiofiles.open(self._path, "r") as fd:
+                cache_dict: Dict[str, Any] = json.loads(await fd.read())
+
+            for entry in cache_dict["entries"]:
+                key = (
+                    Game(entry["game"]),
+                    Language(entry["language"]),
+                    int(entry["id"]),
+                    datetime.fromisoformat(entry["last_modified"]),
+                )
+
+                self._entries[key] = NegativeCacheEntry(
+                    int(entry["failures"]),
+                    datetime.fromisoformat(entry["first_failed"]),
+                    datetime.fromisoformat(entry["last_failed"]),
+                )
+        except (IOError, KeyError, TypeError, ValueError):
+            # the cache is only an optimization, so it is simply rebuilt
+            logger.warning('Could not load negative cache from "%s"!', self._path)
+            self._entries.clear()
+
+    async def save(self) -> None:
+        """Save the cache to file (if persisted)."""
+
+        if self._path is None:
+            return
+
+        self.prune()
+
+        entries: List[Dict[str, Any]] = [
+            {
+                "game": game.value,
+                "language": language.value,
+                "id": post_id,
+                "last_modified": last_modified.isoformat(),
+                "failures": entry.failures,
+                "first_failed": entry.first_failed.isoformat(),
+                "last_failed": entry.last_failed.isoformat(),
+            }
+            for (game, language, post_id, last_modified), entry in self._entries.items()
+        ]
+
+        try:
+            if len(entries) > 0:
+                async with aiofiles.open(self._path, "w") as fd:
+                    await fd.write(json.dumps({"entries": entries}))
+            elif await aiofiles.ospath.exists(self._path):
+                await aiofiles.os.remove(self._path)
+        except IOError:
+            logger.warning('Could not save negative cache to "%s"!', self._path)
+
+    @staticmethod
+    def get_default_path(feed_path: Path) -> Path:
+        """Default cache path next to a feed file."""
+        return feed_path.with_name(".{}.failed.json".format(feed_path.name))
+
+
+class FeedIndex:
+    """Index of the revisions (last modification) and fingerprints of feed items.
+
+    The index is saved after every run, so a check of the news lists can tell if an
+    update is needed without loading the feed file.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path = path
+        self._revisions: Optional[Dict[int, datetime]] = None
+        self._fingerprints: Dict[int, str] = {}
+
+    @property
+    def path(self) -> Optional[Path]:
+        """Path of the index file or None if the index is not persisted."""
+        return self._path
+
+    @property
+    def exists(self) -> bool:
+        """Flag if the index was loaded or updated (i.e. the feed was indexed)."""
+        return self._revisions is not None
+
+    def __len__(self) -> int:
+        return len(self._revisions or {})
+
+    def update(
+        self,
+        feed_items: Iterable[FeedItem],
+        fetched_fingerprints: Optional[Dict[int, str]] = None,
+    ) -> None:
+        """Replace the indexed revisions with those of the items.
+
+        Fingerprints are only taken from fetched items, because loaded items might
+        have been transformed by a writer (e.g. minified). The other items keep
+        their indexed fingerprint.
+        """
+
+        fetched_fingerprints = fetched_fingerprints or {}
+        revisions: Dict[int, datetime] = {}
+        fingerprints: Dict[int, str] = {}
+
+        for item in feed_items:
+            revision = (
+                item.published
+                if item.updated is None
+                else max(item.published, item.updated)
+            )
+
+            # unchanged items keep a revision that was raised by touch
+            if self._revisions is not None and item.id in self._revisions:
+                revision = max(revision, self._revisions[item.id])
+
+            revisions[item.id] = revision
+
+            fingerprint = fetched_fingerprints.get(item.id) or self._fingerprints.get(
+                item.id
+            )
+            if fingerprint is not None:
+                fingerprints[item.id] = fingerprint
+
+        self._revisions = revisions
+        self._fingerprints = fingerprints
+
+    def touch(self, revisions: Dict[int, datetime]) -> None:
+        """Raise the revisions of indexed items whose content did not change."""
+
+        if self._revisions is None:
+            return
+
+        for item_id, revision in revisions.items():
+            if item_id in self._revisions:
+                self._revisions[item_id] = max(self._revisions[item_id], revision)
+
+    def get_revision(self, item_id: int) -> Optional[datetime]:
+        """Indexed revision of an item (None if unknown)."""
+        return (self._revisions or {}).get(item_id)
+
+    def get_fingerprint(self, item_id: int) -> Optional[str]:
+        """Indexed fingerprint of an item (None if unknown)."""
+        return self._fingerprints.get(item_id)
+
+    def is_outdated(self, item_meta: FeedItemMeta) -> bool:
+        """Check if a post is missing in the index or was modified since."""
+
+        if self._revisions is None or item_meta.id not in self._revisions:
+            return True
+
+        return item_meta.last_modified > self._revisions[item_meta.id]
+
+    async def load(self) -> None:
+        """Load the index from file (if persisted and not already loaded)."""
+
+        if self._revisions is not None or self._path is None:
+            return
+
+        if not await aiofiles.ospath.exists(self._path):
+            return
+
+        try:
+            async with aiofiles.open(self._path, "r") as fd:
+                index_dict: Dict[str, Any] = json.loads(await fd.read())
+
+            self._revisions = {
+                int(item_id): datetime.fromisoformat(revision)
+                for item_id, revision in index_dict["revisions"].items()
+            }
+
+            # older indexes have no fingerprints
+            self._fingerprints = {
+                int(item_id): str(fingerprint)
+                for item_id, fingerprint in index_dict.get("fingerprints", {}).items()
+            }
+        except (IOError, AttributeError, KeyError, TypeError, ValueError):
+            # a missing index only means that the next check requests an update
+            logger.warning('Could not load feed index from "%s"!', self._path)
+            self._revisions = None
+            self._fingerprints = {}
+
+    async def save(self) -> None:
+        """Save the index to file (if persisted)."""
+
+        if self._path is None or self._revisions is None:
+            return
+
+        revisions = {
+            str(item_id): revision.isoformat()
+            for item_id, revision in self._revisions.items()
+        }
+
+        fingerprints = {
+            str(item_id): fingerprint
+            for item_id, fingerprint in self._fingerprints.items()
+        }
+
+        try:
+            async with aiofiles.open(self._path, "w") as fd:
+                await fd.write(
+                    json.dumps({"revisions": revisions, "fingerprints": fingerprints})
+                )
+        except IOError:
+            logger.warning('Could not save feed index to "%s"!', self._path)
+
+    @staticmethod
+    def get_default_path(feed_path: Path) -> Path:
+        """Default index path next to a feed file."""
+        return feed_path.with_name(".{}.index.json".format(feed_path.name))
@@ -0,0 +1,309 @@
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Type
+
+import aiofiles
+import aiofiles.os
+import aiofiles.ospath
+import aiohttp
+from aiohttp import web
+from yarl import URL
+
+from . import tracing
+from .compressors import compress_gzip
+from .errors import CassetteError
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+CASSETTE_FILE_NAME = "cassette.json.gz"
+
+# request headers which select different responses of the same URL
+MATCH_HEADERS = ("X-Rpc-Language",)
+
+# header of the replayed requests to the local replay server
+KEY_HEADER = "X-Cassette-Key"
+
+
+class CassetteEntry:
+    """Recorded response of a single request."""
+
+    __slots__ = ("body", "content_type", "elapsed", "status")
+
+    def __init__(
+        self, status: int, content_type: str, body: bytes, elapsed: float
+    ) -> None:
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.elapsed = elapsed
+
+
+class Cassette:
+    """Gzipped file of recorded responses in a directory.
+
+    Responses are replayed in the order they were recorded for the same request.
+    If a request is sent more often than it was recorded, its last response is
+    repeated.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self._directory = directory
+        self._entries: Dict[str, Deque[CassetteEntry]] = {}
+
+    @property
+    def path(self) -> Path:
+        """Path of the cassette file."""
+        return self._directory / CASSETTE_FILE_NAME
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    @staticmethod
+    def get_key(method: str, url: URL, headers: Mapping[str, str]) -> str:
+        """Key of a request (independent of the order of the query params)."""
+
+        url = url.with_query(sorted(url.query.items()))
+        selectors = ["{}={}".format(h, headers.get(h, "")) for h in MATCH_HEADERS]
+
+        return " ".join([method.upper(), str(url)] + selectors)
+
+    def add(self, key: str, entry: CassetteEntry) -> None:
+        """Record the response of a request."""
+        self._entries.setdefault(key, deque()).append(entry)
+
+    def next(self, key: str) -> Optional[CassetteEntry]:
+        """Next recorded response of a request (None if it was never recorded)."""
+
+        entries = self._entries.get(key)
+
+        if entries is None:
+            return None
+
+        return entries.popleft() if len(entries) > 1 else entries[0]
+
+    async def load(self) -> None:
+        """Load the recorded responses from file."""
+
+        try:
+            async with aiofiles.open(self.path, "rb") as fd:
+                cassette_dict: Dict[str, Any] = json.loads(
+                    gzip.decompress(await fd.read())
+                )
+
+            self._entries.clear()
+
+            for interaction in cassette_dict["interactions"]:
+                body = (
+                    interaction["body"].encode()
+                    if "body" in interaction
+                    else base64.b64decode(interaction["body_base64"])
+                )
+
+                self.add(
+                    interaction["key"],
+                    CassetteEntry(
+                        int(interaction["status"]),
+                        interaction["content_type"],
+                        body,
+                        float(interaction["elapsed"]),
+                    ),
+                )
+        except (IOError, EOFError) as err:
+            raise CassetteError(
+                'Could not load cassette from "{}"!'.format(self.path)
+            ) from err
+        except (KeyError, TypeError, ValueError) as err:
+            raise CassetteError(
+                'Invalid cassette file "{}"!'.format(self.path)
+            ) from err
+
+    async def save(self) -> None:
+        """Save the recorded responses to file."""
+
+        interactions: List[Dict[str, Any]] = []
+
+        for key, entries in self._entries.items():
+            for entry in entries:
+                interaction: Dict[str, Any] = {
+                    "key": key,
+                    "status": entry.status,
+                    "content_type": entry.content_type,
+                    "elapsed": round(entry.elapsed, 6),
+                }
+
+                # the api responses are text, so they are stored readable
+                try:
+                    interaction["body"] = entry.body.decode()
+                except UnicodeDecodeError:
+                    interaction["body_base64"] = base64.b64encode(entry.body).decode()
+
+                interactions.append(interaction)
+
+        data = json.dumps(
+            {"version": CASSETTE_VERSION, "interactions": interactions},
+            separators=(",", ":"),
+        )
+
+        try:
+            await aiofiles.os.makedirs(self._directory, exist_ok=True)
+
+            async with aiofiles.open(self.path, "wb") as fd:
+                await fd.write(compress_gzip(data.encode()))
+        except IOError as err:
+            raise CassetteError(
+                'Could not save cassette to "{}"!'.format(self.path)
+            ) from err
+
+
+class CassetteSession:
+    """Client session which records or replays the responses of a cassette.
+
+    Recorded responses are replayed by a local server, so the session behaves
+    exactly like a normal client session (e.g. for raise_for_status or tracing).
+    """
+
+    def __init__(
+        self, cassette: Cassette, replay: bool = False, timing: bool = False
+    ) -> None:
+        self._cassette = cassette
+        self._replay = replay
+        self._timing = timing
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._server_url = URL()
+
+    @property
+    def cassette(self) -> Cassette:
+        """Cassette of the session."""
+        return self._cassette
+
+    async def __aenter__(self) -> aiohttp.ClientSession:
+        return await self.start()
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    async def start(self) -> aiohttp.ClientSession:
+        """Create the client session (and start the replay server)."""
+
+        if self._replay:
+            await self._cassette.load()
+
+            app = web.Application()
+            app.router.add_route("*", "/{path:.*}", self._handle_replay)
+
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            await site.start()
+
+            host, port = self._runner.addresses[0][:2]
+            self._server_url = URL.build(scheme="http", host=host, port=port)
+
+            logger.info(
+                'Replaying %d responses from "%s".',
+                len(self._cassette),
+                self._cassette.path,
+            )
+
+        middleware = self._replay_request if self._replay else self._record_request
+        self._session = aiohttp.ClientSession(
+            middlewares=(middleware,), trace_configs=tracing.get_trace_configs()
+        )
+
+        return self._session
+
+    async def close(self) -> None:
+        """Close the client session and save the recorded responses."""
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+        if not self._replay:
+            await self._cassette.save()
+
+            logger.info(
+                'Recorded %d responses to "%s".',
+                len(self._cassette),
+                self._cassette.path,
+            )
+
+    async def _record_request(
+        self, request: aiohttp.ClientRequest, handler: aiohttp.ClientHandlerType
+    ) -> aiohttp.ClientResponse:
+        """Send a request and record its response."""
+
+        start = time.perf_counter()
+        response = await handler(request)
+
+        # the body is cached by the response, so the caller can still read it
+        body = await response.read()
+
+        self._cassette.add(
+            self._cassette.get_key(request.method, request.url, request.headers),
+            CassetteEntry(
+                response.status,
+                response.headers.get("Content-Type", "application/octet-stream"),
+                body,
+                time.perf_counter() - start,
+            ),
+        )
+
+        return response
+
+    async def _replay_request(
+        self, request: aiohttp.ClientRequest, handler: aiohttp.ClientHandlerType
+    ) -> aiohttp.ClientResponse:
+        """Get the recorded response of a request from the replay server."""
+
+        assert self._session is not None
+
+        key = self._cassette.get_key(request.method, request.url, request.headers)
+
+        return await self._session.get(
+            self._server_url, headers={KEY_HEADER: key}, middlewares=()
+        )
+
+    async def _handle_replay(self, request: web.Request) -> web.Response:
+        """Serve the next recorded response of a request."""
+
+        key = request.headers.get(KEY_HEADER, "")
+        entry = self._cassette.next(key)
+
+        if entry is None:
+            logger.warning("No recorded response for %s!", key)
+            return web.Response(status=404, text="No recorded response")
+
+        if self._timing:
+            await asyncio.sleep(entry.elapsed)
+
+        return web.Response(
+            status=entry.status,
+            body=entry.body,
+            headers={"Content-Type": entry.content_type},
+        )
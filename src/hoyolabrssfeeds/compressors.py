@@ -0,0 +1,50 @@
+import gzip
+from typing import Dict
+from typing import Optional
+
+try:
+    from compression import zstd  # type: ignore
+except ImportError:
+    try:
+        import zstandard as zstd  # type: ignore[import-not-found, unused-ignore]
+    except ImportError:
+        zstd = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+# file suffixes of precompressed files (e.g. for "gzip_static" of nginx)
+ENCODING_SUFFIXES = {GZIP: ".gz", ZSTD: ".zst"}
+
+
+def is_zstd_available() -> bool:
+    """Check if the optional zstd compression is available."""
+    return zstd is not None
+
+
+def compress_gzip(data: bytes) -> bytes:
+    """Compress data with gzip (reproducible by omitting the timestamp)."""
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_zstd(data: bytes) -> Optional[bytes]:
+    """Compress data with zstd or return None if zstd is not available."""
+
+    if zstd is None:
+        return None
+
+    zstd_bytes: bytes = zstd.compress(data, 19)
+
+    return zstd_bytes
+
+
+def compress_all(data: bytes) -> Dict[str, bytes]:
+    """Compress data with all available encodings."""
+
+    encoded = {GZIP: compress_gzip(data)}
+
+    zstd_bytes = compress_zstd(data)
+    if zstd_bytes is not None:
+        encoded[ZSTD] = zstd_bytes
+
+    return encoded
@@ -1,10 +1,14 @@
+import asyncio
 from pathlib import Path
 from typing import Any
+from typing import AsyncGenerator
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 import aiofiles
+import aiofiles.os
 import pydantic
 
 try:
@@ -14,12 +18,25 @@ except ImportError:
 
 from .errors import ConfigIOError
 from .errors import ConfigFormatError
+from .models import EventHookConfig
 from .models import FeedConfig
+from .models import FeedDeltaConfig
 from .models import FeedFileWriterConfig
 from .models import FeedItemCategory
 from .models import FeedMeta
+from .models import FeedViewConfig
+from .models import FeedViewMeta
 from .models import Game
 
+# root keys which are no defaults for the game sections
+RESERVED_ROOT_KEYS = {"feed", "view", "delta", "hook"}
+
+# keys of the possible sinks of an event hook
+HOOK_SINK_KEYS = ("webhook", "command", "socket")
+
+# seconds between the checks of the config file for modifications
+DEFAULT_WATCH_INTERVAL = 5.0
+
 
 class FeedConfigLoader:
     """TOML config file loader."""
@@ -32,6 +49,36 @@ class FeedConfigLoader:
         """TOML config file path."""
         return self._path
 
+    async def get_file_signature(self) -> Optional[Tuple[int, int]]:
+        """Modification time and size of the config file (None if missing)."""
+
+        try:
+            stat = await aiofiles.os.stat(self._path)
+        except IOError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    async def watch(
+        self, interval: float = DEFAULT_WATCH_INTERVAL
+    ) -> AsyncGenerator[None, None]:
+        """Yield after every modification of the config file (polled)."""
+
+        signature = await self.get_file_signature()
+
+        while True:
+            await asyncio.sleep(interval)
+            current_signature = await self.get_file_signature()
+
+            # a missing file is most likely replaced by an editor right now
+            if current_signature is not None and current_signature != signature:
+                signature = current_signature
+                yield
+
+    async def load_config(self) -> Dict[str, Any]:
+        """Load and parse the config file once for all of the config getters."""
+        return await self._load_from_file()
+
     async def _load_from_file(self) -> Dict[str, Any]:
         """Load and parse config from TOML file."""
 
@@ -59,15 +106,17 @@ class FeedConfigLoader:
         games = {g.name.lower() for g in Game}
 
         try:
-            game_config_dict = config_dict[game.name.lower()]
+            # copied, because the parsed config might be shared by multiple getters
+            game_config_dict = dict(config_dict[game.name.lower()])
 
             # merge root keys into game config dict
             for key, val in config_dict.items():
-                if key not in games and key != "feed":
+                if key not in games and key not in RESERVED_ROOT_KEYS:
                     # only set key if not already exists
                     game_config_dict.setdefault(key, val)
 
             feed_config_dict = game_config_dict.pop("feed")
+            delta_config_dict = game_config_dict.pop("delta", None)
 
             writer_configs = [
                 FeedFileWriterConfig(feed_type=feed_type, **feed_config)
@@ -82,26 +131,42 @@ class FeedConfigLoader:
                     )
                 )
 
+            delta_config = (
+                FeedDeltaConfig(**delta_config_dict)
+                if delta_config_dict is not None
+                else None
+            )
+
             feed_meta = FeedMeta(game=game, **game_config_dict)
-            feed_config = FeedConfig(feed_meta=feed_meta, writer_configs=writer_configs)
+            feed_config = FeedConfig(
+                feed_meta=feed_meta,
+                writer_configs=writer_configs,
+                delta_config=delta_config,
+            )
         except KeyError as err:
             raise ConfigFormatError("Could not find required key in config!") from err
-        except (pydantic.ValidationError, ValueError) as err:
+        except (pydantic.ValidationError, TypeError, ValueError) as err:
             raise ConfigFormatError("Invalid config value!") from err
 
         return feed_config
 
-    async def get_feed_config(self, game: Game) -> FeedConfig:
-        """Load and create a feed config for a given game."""
+    async def get_feed_config(
+        self, game: Game, config: Optional[Dict[str, Any]] = None
+    ) -> FeedConfig:
+        """Load (if not given) and create a feed config for a given game."""
 
-        config = await self._load_from_file()
+        if config is None:
+            config = await self._load_from_file()
 
         return self._create_feed_config(game, config)
 
-    async def get_all_feed_configs(self) -> List[FeedConfig]:
-        """Load and create feed configs for all games found in file."""
+    async def get_all_feed_configs(
+        self, config: Optional[Dict[str, Any]] = None
+    ) -> List[FeedConfig]:
+        """Load (if not given) and create feed configs for all games found in file."""
 
-        config = await self._load_from_file()
+        if config is None:
+            config = await self._load_from_file()
 
         return [
             self._create_feed_config(Game.from_str(key), config)
@@ -109,6 +174,84 @@ class FeedConfigLoader:
             if key in {g.name.lower() for g in Game}
         ]
 
+    @staticmethod
+    def _create_view_config(view_dict: Dict[str, Any]) -> FeedViewConfig:
+        """Create a view config from a TOML dict of a view table."""
+
+        try:
+            view_dict = dict(view_dict)
+            feed_config_dict = view_dict.pop("feed")
+
+            writer_configs = [
+                FeedFileWriterConfig(feed_type=feed_type, **feed_config)
+                for feed_type, feed_config in feed_config_dict.items()
+            ]
+
+            if "games" in view_dict:
+                view_dict["games"] = [Game.from_str(g) for g in view_dict["games"]]
+
+            if "categories" in view_dict:
+                view_dict["categories"] = [
+                    FeedItemCategory.from_str(c) for c in view_dict["categories"]
+                ]
+
+            view_meta = FeedViewMeta(**view_dict)
+            view_config = FeedViewConfig(
+                view_meta=view_meta, writer_configs=writer_configs
+            )
+        except KeyError as err:
+            raise ConfigFormatError("Could not find required key in config!") from err
+        except (pydantic.ValidationError, TypeError, ValueError) as err:
+            raise ConfigFormatError("Invalid config value!") from err
+
+        return view_config
+
+    async def get_all_view_configs(
+        self, config: Optional[Dict[str, Any]] = None
+    ) -> List[FeedViewConfig]:
+        """Load (if not given) and create configs for all derived views in file."""
+
+        if config is None:
+            config = await self._load_from_file()
+        view_dicts = config.get("view", [])
+
+        if not isinstance(view_dicts, list):
+            raise ConfigFormatError("Views must be defined as array of tables!")
+
+        return [self._create_view_config(view_dict) for view_dict in view_dicts]
+
+    @staticmethod
+    def _create_hook_config(hook_dict: Dict[str, Any]) -> EventHookConfig:
+        """Create an event hook config from a TOML dict of a hook table."""
+
+        sink_keys = [key for key in HOOK_SINK_KEYS if key in hook_dict]
+
+        if len(sink_keys) != 1:
+            raise ConfigFormatError(
+                "Hooks need exactly one of {}!".format(", ".join(HOOK_SINK_KEYS))
+            )
+
+        try:
+            hook_config = EventHookConfig(**hook_dict)
+        except (pydantic.ValidationError, TypeError) as err:
+            raise ConfigFormatError("Invalid config value!") from err
+
+        return hook_config
+
+    async def get_all_hook_configs(
+        self, config: Optional[Dict[str, Any]] = None
+    ) -> List[EventHookConfig]:
+        """Load (if not given) and create configs for all event hooks in file."""
+
+        if config is None:
+            config = await self._load_from_file()
+        hook_dicts = config.get("hook", [])
+
+        if not isinstance(hook_dicts, list):
+            raise ConfigFormatError("Hooks must be defined as array of tables!")
+
+        return [self._create_hook_config(hook_dict) for hook_dict in hook_dicts]
+
     async def create_default_config_file(self) -> None:
         """Create an initial example config file."""
 
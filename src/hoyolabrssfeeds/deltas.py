@@ -0,0 +1,171 @@
+import json
+import logging
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import aiofiles
+import aiofiles.os
+import aiofiles.ospath
+
+from .errors import FeedIOError
+from .models import FeedDeltaConfig
+from .models import FeedItemChange
+from .models import FeedItemChangeType
+from .models import FeedMeta
+
+logger = logging.getLogger(__name__)
+
+DELTA_VERSION = 1
+LATEST_FILE_NAME = "latest.json"
+
+
+class DeltaPublisher:
+    """Publisher of per-run delta manifests of a feed.
+
+    Every update of a feed with changed items gets a manifest with the next sequence
+    number (e.g. "42.json") in the delta directory. The small "latest.json" index
+    points to the newest manifest, so consumers only need to poll this file and
+    fetch the manifests since their last known sequence number.
+    """
+
+    def __init__(self, config: FeedDeltaConfig) -> None:
+        self._config = config
+        self._sequence: Optional[int] = None
+
+    @property
+    def config(self) -> FeedDeltaConfig:
+        """Config of the delta publisher."""
+        return self._config
+
+    @property
+    def latest_path(self) -> Path:
+        """Path of the latest index file."""
+        return self._config.path / LATEST_FILE_NAME
+
+    def get_manifest_path(self, sequence: int) -> Path:
+        """Path of the manifest of a sequence number."""
+        return self._config.path / "{}.json".format(sequence)
+
+    async def publish(
+        self,
+        feed_meta: FeedMeta,
+        changes: List[FeedItemChange],
+        now: Optional[datetime] = None,
+    ) -> Optional[int]:
+        """Publish a manifest of the changes and return its sequence number."""
+
+        if len(changes) == 0:
+            return None
+
+        now = now or datetime.now(timezone.utc)
+        sequence = await self._get_sequence() + 1
+
+        manifest: Dict[str, Any] = {
+            "version": DELTA_VERSION,
+            "sequence": sequence,
+            "created": now.isoformat(),
+            "feed": {
+                "game": feed_meta.game.name.lower(),
+                "language": str(feed_meta.language),
+                "title": feed_meta.title
+                or "{} News".format(feed_meta.game.name.title()),
+            },
+        }
+
+        for change_type in FeedItemChangeType:
+            manifest[str(change_type)] = [
+                {
+                    "id": str(change.id),
+                    "category": change.category.name.title(),
+                    "revision": change.revision.isoformat(),
+                }
+                for change in changes
+                if change.change_type == change_type
+            ]
+
+        oldest = max(1, sequence - self._config.keep + 1)
+        latest = {
+            "version": DELTA_VERSION,
+            "sequence": sequence,
+            "created": now.isoformat(),
+            "manifest": self.get_manifest_path(sequence).name,
+            "oldest": oldest,
+        }
+
+        try:
+            await aiofiles.os.makedirs(self._config.path, exist_ok=True)
+
+            # the manifest has to exist before the index points to it
+            await self._write_file(self.get_manifest_path(sequence), manifest)
+            await self._write_file(self.latest_path, latest)
+        except IOError as err:
+            raise FeedIOError(
+                'Could not write delta manifest to "{}"!'.format(self._config.path)
+            ) from err
+
+        self._sequence = sequence
+        await self._prune(oldest)
+
+        return sequence
+
+    async def _get_sequence(self) -> int:
+        """Get the sequence number of the latest manifest (0 if none exists)."""
+
+        if self._sequence is not None:
+            return self._sequence
+
+        self._sequence = 0
+
+        if await aiofiles.ospath.exists(self.latest_path):
+            try:
+                async with aiofiles.open(self.latest_path, "r") as fd:
+                    self._sequence = int(json.loads(await fd.read())["sequence"])
+            except (IOError, KeyError, TypeError, ValueError):
+                logger.warning(
+                    'Could not load latest delta index from "%s"!', self.latest_path
+                )
+
+        # never reuse sequence numbers of existing manifests (e.g. broken index)
+        self._sequence = max([self._sequence] + await self._get_manifest_sequences())
+
+        return self._sequence
+
+    async def _get_manifest_sequences(self) -> List[int]:
+        """Sequence numbers of all existing manifest files."""
+
+        if not await aiofiles.ospath.isdir(self._config.path):
+            return []
+
+        stems = [
+            file_name.removesuffix(".json")
+            for file_name in await aiofiles.os.listdir(self._config.path)
+            if file_name.endswith(".json")
+        ]
+
+        return [int(stem) for stem in stems if stem.isdigit()]
+
+    async def _prune(self, oldest: int) -> None:
+        """Remove manifests older than the oldest kept sequence number."""
+
+        for sequence in await self._get_manifest_sequences():
+            if sequence < oldest:
+                try:
+                    await aiofiles.os.remove(self.get_manifest_path(sequence))
+                except IOError:
+                    logger.warning("Could not remove delta manifest %d!", sequence)
+
+    @staticmethod
+    async def _write_file(path: Path, data: Dict[str, Any]) -> None:
+        """Write a JSON file via a temporary file."""
+
+        tmp_path = path.with_name(".{}.tmp".format(path.name))
+
+        async with aiofiles.open(tmp_path, "w") as fd:
+            await fd.write(json.dumps(data))
+
+        await aiofiles.os.replace(tmp_path, path)
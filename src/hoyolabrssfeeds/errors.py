@@ -14,9 +14,17 @@ class HoyolabApiError(HoyolabRssFeedsBaseError):
     """Raised if interaction with the Hoyolab API failed."""
 
 
+class HoyolabTemporaryError(HoyolabApiError):
+    """Raised if the Hoyolab API failed temporarily (e.g. server error or rate limit)."""
+
+
 class ConfigFormatError(HoyolabRssFeedsBaseError):
     """Raised if an invalid config syntax or value is found."""
 
 
 class FeedFormatError(HoyolabRssFeedsBaseError):
     """Raised if an invalid feed syntax or value is found."""
+
+
+class CassetteError(HoyolabRssFeedsBaseError):
+    """Raised if a cassette of recorded responses could not be loaded or saved."""
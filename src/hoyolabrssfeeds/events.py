@@ -0,0 +1,259 @@
+import asyncio
+import json
+import logging
+import subprocess
+from abc import ABCMeta
+from abc import abstractmethod
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Type
+from typing import TypeVar
+
+import aiohttp
+
+from .models import EventHookConfig
+from .models import FeedItem
+from .models import FeedItemChange
+from .models import FeedMeta
+from .writers import JSONFeedFileWriter
+
+# used for class-methods
+_EH = TypeVar("_EH", bound="EventHook")
+
+logger = logging.getLogger(__name__)
+
+
+class FeedEvent:
+    """Event of an added, updated or removed feed item."""
+
+    __slots__ = ("change", "feed_meta", "item")
+
+    def __init__(
+        self,
+        feed_meta: FeedMeta,
+        change: FeedItemChange,
+        item: Optional[FeedItem] = None,
+    ) -> None:
+        self.feed_meta = feed_meta
+        self.change = change
+        self.item = item
+
+    @property
+    def event_type(self) -> str:
+        """Type of the event (e.g. "item_added")."""
+        return "item_{}".format(self.change.change_type.value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the event to a JSON serializable dict."""
+
+        event: Dict[str, Any] = {
+            "type": self.event_type,
+            "game": self.feed_meta.game.name.lower(),
+            "language": str(self.feed_meta.language),
+            "category": self.change.category.name.title(),
+            "id": str(self.change.id),
+            "revision": self.change.revision.isoformat(),
+        }
+
+        # removed items are not part of the feed anymore
+        if self.item is not None:
+            event["item"] = JSONFeedFileWriter.create_json_feed_item(self.item)
+
+        return event
+
+
+def encode_events(events: List[FeedEvent]) -> bytes:
+    """Encode a batch of events to JSON."""
+    return json.dumps({"events": [event.to_dict() for event in events]}).encode()
+
+
+class AbstractEventSink(metaclass=ABCMeta):
+    """ABC for receivers of event batches."""
+
+    @abstractmethod
+    async def send(self, events: List[FeedEvent]) -> None:
+        """Send a batch of events."""
+        pass
+
+
+class WebhookEventSink(AbstractEventSink):
+    """Send event batches as JSON via POST requests."""
+
+    def __init__(self, url: str) -> None:
+        self._url = url
+
+    def __repr__(self) -> str:
+        return "WebhookEventSink({!r})".format(self._url)
+
+    async def send(self, events: List[FeedEvent]) -> None:
+        """Post the events to the webhook URL."""
+
+        headers = {"Content-Type": "application/json"}
+
+        async with (
+            aiohttp.ClientSession() as session,
+            session.post(
+                self._url, data=encode_events(events), headers=headers
+            ) as response,
+        ):
+            response.raise_for_status()
+
+
+class CommandEventSink(AbstractEventSink):
+    """Pass event batches as JSON to the stdin of a command."""
+
+    def __init__(self, command: List[str]) -> None:
+        self._command = command
+
+    def __repr__(self) -> str:
+        return "CommandEventSink({!r})".format(self._command)
+
+    async def send(self, events: List[FeedEvent]) -> None:
+        """Run the command with the events."""
+
+        process = await asyncio.create_subprocess_exec(
+            *self._command, stdin=asyncio.subprocess.PIPE
+        )
+
+        try:
+            await process.communicate(encode_events(events))
+        except asyncio.CancelledError:
+            # e.g. after a timeout
+            process.kill()
+            raise
+
+        if process.returncode != 0:
+            raise OSError(
+                "Command exited with return code {}!".format(process.returncode)
+            )
+
+
+class UnixSocketEventSink(AbstractEventSink):
+    """Write event batches as JSON lines to a Unix socket."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+
+    def __repr__(self) -> str:
+        return "UnixSocketEventSink({!r})".format(str(self._path))
+
+    async def send(self, events: List[FeedEvent]) -> None:
+        """Write the events to the socket."""
+
+        _, writer = await asyncio.open_unix_connection(str(self._path))
+
+        try:
+            writer.write(encode_events(events) + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+
+class EventHook:
+    """Bounded queue which passes events in batches to a sink.
+
+    Emitting waits if the queue is full, so a slow sink slows down the feed updates
+    instead of buffering an unlimited amount of events.
+    """
+
+    def __init__(
+        self,
+        sink: AbstractEventSink,
+        queue_size: int = 1000,
+        batch_size: int = 100,
+        timeout: float = 10,
+    ) -> None:
+        self._sink = sink
+        self._queue: asyncio.Queue[FeedEvent] = asyncio.Queue(queue_size)
+        self._batch_size = batch_size
+        self._timeout = timeout
+        self._worker: Optional[asyncio.Task[None]] = None
+
+    @property
+    def sink(self) -> AbstractEventSink:
+        """Sink of the hook."""
+        return self._sink
+
+    @classmethod
+    def from_config(cls: Type[_EH], hook_config: EventHookConfig) -> _EH:
+        """Create an instance via a hook config."""
+
+        sink: AbstractEventSink
+        if hook_config.webhook is not None:
+            sink = WebhookEventSink(str(hook_config.webhook))
+        elif hook_config.command is not None:
+            sink = CommandEventSink(hook_config.command)
+        elif hook_config.socket is not None:
+            sink = UnixSocketEventSink(hook_config.socket)
+        else:
+            raise ValueError("Could not create hook without sink!")
+
+        return cls(
+            sink, hook_config.queue_size, hook_config.batch_size, hook_config.timeout
+        )
+
+    async def emit(self, events: List[FeedEvent]) -> None:
+        """Queue events for the sink (waits if the queue is full)."""
+
+        if len(events) == 0:
+            return
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._process_queue())
+
+        for event in events:
+            await self._queue.put(event)
+
+    async def flush(self) -> None:
+        """Wait until all queued events were passed to the sink."""
+
+        if self._worker is None:
+            return
+
+        await self._queue.join()
+
+        # hooks are shared by feeds, so another feed might have emitted meanwhile
+        if self._worker is None or not self._queue.empty():
+            return await self.flush()
+
+        # the worker is restarted by the next emit, so no task is left behind
+        # when the event loop is closed between runs
+        worker, self._worker = self._worker, None
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+    async def _process_queue(self) -> None:
+        """Pass the queued events in batches to the sink."""
+
+        while True:
+            events = [await self._queue.get()]
+
+            while len(events) < self._batch_size and not self._queue.empty():
+                events.append(self._queue.get_nowait())
+
+            # hooks are only notifications, so they never break the feeds
+            try:
+                await asyncio.wait_for(self._sink.send(events), self._timeout)
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                OSError,
+                subprocess.SubprocessError,
+            ) as err:
+                logger.warning(
+                    "Could not send %d events to %r: %r", len(events), self._sink, err
+                )
+            except Exception:
+                # e.g. bugs of a sink, which should be visible with the traceback
+                logger.exception(
+                    "Unexpected error while sending %d events to %r!",
+                    len(events),
+                    self._sink,
+                )
+            finally:
+                for _ in events:
+                    self._queue.task_done()
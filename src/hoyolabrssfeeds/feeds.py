@@ -1,25 +1,59 @@
 import asyncio
+import heapq
+import itertools
 import logging
+import re
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Awaitable
+from typing import Dict
+from typing import Iterable
 from typing import List
 from typing import Optional
+from typing import Set
+from typing import Tuple
 from typing import Type
 from typing import TypeVar
 
+import aiofiles.ospath
 import aiohttp
 
+from . import metrics
+from . import tracing
+from .blobs import BlobStore
+from .caches import FeedIndex
+from .caches import NegativeCache
+from .caches import NegativeCacheKey
+from .deltas import DeltaPublisher
+from .errors import ConfigFormatError
+from .errors import HoyolabApiError
+from .errors import HoyolabTemporaryError
+from .events import EventHook
+from .events import FeedEvent
 from .hoyolab import HoyolabNews
 from .loaders import AbstractFeedFileLoader
 from .loaders import FeedFileLoaderFactory
+from .models import EventHookConfig
 from .models import FeedConfig
 from .models import FeedItem
 from .models import FeedItemCategory
+from .models import FeedItemChange
+from .models import FeedItemChangeType
+from .models import FeedItemMeta
 from .models import FeedMeta
+from .models import FeedViewConfig
+from .models import FeedViewMeta
+from .models import OffloadedFeedItem
+from .pages import FeedPageIndex
+from .websub import WebSubPublisher
 from .writers import AbstractFeedFileWriter
 from .writers import FeedFileWriterFactory
 
 # used for class-methods
 _GF = TypeVar("_GF", bound="GameFeed")
 _GFC = TypeVar("_GFC", bound="GameFeedCollection")
+_FV = TypeVar("_FV", bound="FeedView")
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +66,10 @@ class GameFeed:
         feed_meta: FeedMeta,
         feed_writers: List[AbstractFeedFileWriter],
         feed_loader: Optional[AbstractFeedFileLoader] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        delta_publisher: Optional[DeltaPublisher] = None,
+        event_hooks: Optional[List[EventHook]] = None,
+        feed_index: Optional[FeedIndex] = None,
     ) -> None:
         # warn if identical paths for writers are found
         writer_paths = [str(writer.config.path) for writer in feed_writers]
@@ -43,21 +81,84 @@ class GameFeed:
 
         if feed_loader is None:
             loader_factory = FeedFileLoaderFactory()
-            feed_loader = loader_factory.create_any_loader(feed_writers)
+            feed_loader = loader_factory.create_fallback_loader(feed_writers)
+
+        if negative_cache is None:
+            cache_path = NegativeCache.get_default_path(feed_loader.config.path)
+            negative_cache = NegativeCache(cache_path)
+
+        if feed_index is None:
+            feed_index = FeedIndex(FeedIndex.get_default_path(feed_loader.config.path))
 
         self._feed_meta = feed_meta
         self._feed_writers = feed_writers
         self._feed_loader = feed_loader
+        self._negative_cache = negative_cache
+        self._feed_index = feed_index
+        self._delta_publisher = delta_publisher
+        # the hooks might be shared with a collection which replaces them on reloads
+        self._event_hooks = event_hooks if event_hooks is not None else []
         self._hoyolab = HoyolabNews(feed_meta.game, feed_meta.language)
         self._was_updated = False
+        self._failed_ids: Set[int] = set()
+        self._skipped_ids: Set[int] = set()
+        self._category_feeds: Dict[FeedItemCategory, List[FeedItem]] = {}
+        self._changes: List[FeedItemChange] = []
+        self._pending_events: List[FeedEvent] = []
+        self._touched_revisions: Dict[int, datetime] = {}
+        self._fetched_fingerprints: Dict[int, str] = {}
+        self._page_index = FeedPageIndex(feed_loader.config.path)
+
+    @property
+    def feed_meta(self) -> FeedMeta:
+        """Meta info of the feed."""
+        return self._feed_meta
+
+    @property
+    def feed_writers(self) -> List[AbstractFeedFileWriter]:
+        """Writers of the feed."""
+        return self._feed_writers
+
+    @property
+    def category_feeds(self) -> Dict[FeedItemCategory, List[FeedItem]]:
+        """Items (sorted descending by id) per category after a create_feed() call."""
+        return self._category_feeds
+
+    def reset_updated(self) -> None:
+        """Reset the updated flag (e.g. before a run which skips the feed)."""
+        self._was_updated = False
 
     @property
     def was_updated(self) -> bool:
         """Flag if the feed has been updated after a create_feed() call."""
         return self._was_updated
 
+    @property
+    def failed_ids(self) -> Set[int]:
+        """Ids of posts that could not be fetched in the last create_feed() call."""
+        return self._failed_ids
+
+    @property
+    def skipped_ids(self) -> Set[int]:
+        """Ids of known broken posts that were skipped in the last create_feed() call."""
+        return self._skipped_ids
+
+    @property
+    def event_hooks(self) -> List[EventHook]:
+        """Hooks which receive the events of added, updated and removed items."""
+        return self._event_hooks
+
+    @property
+    def changes(self) -> List[FeedItemChange]:
+        """Added, updated and removed items of the last create_feed() call."""
+        return self._changes
+
     @classmethod
-    def from_config(cls: Type[_GF], feed_config: FeedConfig) -> _GF:
+    def from_config(
+        cls: Type[_GF],
+        feed_config: FeedConfig,
+        event_hooks: Optional[List[EventHook]] = None,
+    ) -> _GF:
         """Create an instance via a feed config."""
 
         writer_factory = FeedFileWriterFactory()
@@ -71,97 +172,309 @@ class GameFeed:
         if feed_config.loader_config:
             loader = loader_factory.create_loader(feed_config.loader_config)
         else:
-            loader = loader_factory.create_any_loader(writers)
+            loader = loader_factory.create_fallback_loader(writers)
 
-        return cls(feed_config.feed_meta, writers, loader)
+        delta_publisher = (
+            DeltaPublisher(feed_config.delta_config)
+            if feed_config.delta_config
+            else None
+        )
+
+        return cls(
+            feed_config.feed_meta,
+            writers,
+            loader,
+            delta_publisher=delta_publisher,
+            event_hooks=event_hooks,
+        )
 
     async def create_feed(
         self, session: Optional[aiohttp.ClientSession] = None
     ) -> None:
         """Create or update a feed and write it to files."""
 
-        logger.info(
-            '%s "%s" feed in %s format...',
-            "Updating" if self._feed_loader.config.path.exists() else "Creating",
-            self._feed_meta.title or self._feed_meta.game.name.title(),
-            " & ".join([w.config.feed_type.title() for w in self._feed_writers]),
-        )
+        game = self._feed_meta.game.name.lower()
+        language = str(self._feed_meta.language)
+
+        with (
+            tracing.span("create_feed", feed="{}/{}".format(game, language)),
+            metrics.FEED_UPDATE_SECONDS.time(game, language),
+        ):
+            await self._create_feed(session)
 
-        local_session = session or aiohttp.ClientSession()
+    async def _create_feed(self, session: Optional[aiohttp.ClientSession]) -> None:
+        """Create or update a feed and write it to files (without metrics)."""
+
+        local_session = session or aiohttp.ClientSession(
+            trace_configs=tracing.get_trace_configs()
+        )
         feed_categories = self._feed_meta.categories or [c for c in FeedItemCategory]
         self._was_updated = False
+        self._failed_ids = set()
+        self._skipped_ids = set()
+        self._changes = []
+        self._pending_events = []
+        self._touched_revisions = {}
+        self._fetched_fingerprints = {}
 
-        feed_items = await self._feed_loader.get_feed_items()
+        # the local feed is not needed for the list requests, so it is loaded
+        # concurrently and each category diff waits for both sides to be ready
+        feed_items = asyncio.ensure_future(self._load_feed_items())
 
         try:
-            category_feeds = await asyncio.gather(
+            category_results = await asyncio.gather(
                 *[
-                    self._update_category_feed(
-                        local_session,
-                        category,
-                        [item for item in feed_items if item.category == category],
-                    )
+                    self._update_category_feed(local_session, category, feed_items)
                     for category in feed_categories
-                ]
+                ],
+                return_exceptions=True,
             )
         finally:
+            if not feed_items.done():
+                feed_items.cancel()
+
             if session is None:
                 await local_session.close()
 
-        if self._was_updated:
-            combined_feed: List[FeedItem] = []
-            for feed in category_feeds:
-                combined_feed.extend(feed)
+        category_feeds: Dict[FeedItemCategory, List[FeedItem]] = {}
+        category_errors: List[Exception] = []
+        for category, result in zip(feed_categories, category_results):
+            if isinstance(result, list):
+                category_feeds[category] = result
+            elif isinstance(result, Exception):
+                category_errors.append(result)
 
-            # sort feed items descending by id -> latest at the top
-            combined_feed.sort(key=lambda item: item.id, reverse=True)
+                # keep the previous state of a failed category, so that the updates
+                # of the other categories can still be saved
+                if (
+                    feed_items.done()
+                    and not feed_items.cancelled()
+                    and feed_items.exception() is None
+                ):
+                    category_feeds[category] = [
+                        i for i in feed_items.result() if i.category == category
+                    ]
+            else:
+                raise result
 
-            await asyncio.gather(
-                *[
-                    writer.write_feed(self._feed_meta, combined_feed)
-                    for writer in self._feed_writers
-                ]
+        self._category_feeds = category_feeds
+
+        # feeds recovered from another output are written to repair the broken files
+        was_recovered = feed_items.done() and self._feed_loader.was_recovered
+        if was_recovered:
+            for writer in self._feed_writers:
+                writer.invalidate()
+
+        if self._was_updated or was_recovered:
+            # category feeds are sorted descending by id, so they only need to be
+            # merged to keep the latest items at the top
+            combined_feed = list(
+                heapq.merge(
+                    *category_feeds.values(), key=lambda item: item.id, reverse=True
+                )
             )
 
+            with tracing.span("write_feeds"):
+                await asyncio.gather(
+                    *[
+                        writer.write_feed(self._feed_meta, combined_feed)
+                        for writer in self._feed_writers
+                    ]
+                )
+
+            # the manifest is published after the feed files, so consumers can
+            # always fetch the announced changes
+            if self._delta_publisher is not None:
+                with tracing.span("publish_delta"):
+                    await self._delta_publisher.publish(self._feed_meta, self._changes)
+
             logger.info(
                 'The "%s" feed was successfully updated.',
                 self._feed_meta.title or self._feed_meta.game.name.title(),
             )
-        else:
+        elif len(category_errors) == 0:
             logger.info(
                 'The "%s" feed is still uptodate.',
                 self._feed_meta.title or self._feed_meta.game.name.title(),
             )
 
+        # events are only emitted after the feed files were written, so consumers
+        # never see changes which are missing in the files
+        if len(self._pending_events) > 0:
+            await asyncio.gather(
+                *[hook.emit(self._pending_events) for hook in self._event_hooks]
+            )
+
+        if len(self._failed_ids) + len(self._skipped_ids) > 0:
+            logger.warning(
+                'The "%s" feed is missing %d failed and %d skipped posts.',
+                self._feed_meta.title or self._feed_meta.game.name.title(),
+                len(self._failed_ids),
+                len(self._skipped_ids),
+            )
+
+        await self._negative_cache.save()
+
+        # the index reflects the written feed, so a failed write leaves it outdated
+        self._feed_index.update(
+            itertools.chain.from_iterable(category_feeds.values()),
+            self._fetched_fingerprints,
+        )
+        self._feed_index.touch(self._touched_revisions)
+        await self._feed_index.save()
+
+        # the sinks process the events in the background, so wait for the rest
+        with tracing.span("flush_hooks"):
+            await asyncio.gather(*[hook.flush() for hook in self._event_hooks])
+
+        if len(category_errors) > 0:
+            raise category_errors[0]
+
+    async def offload_contents(self, content_store: BlobStore) -> None:
+        """Move the contents of the last items to a blob store (to bound memory)."""
+
+        self._category_feeds = {
+            category: await content_store.offload(items)
+            for category, items in self._category_feeds.items()
+        }
+
+    async def check_feed(self, session: Optional[aiohttp.ClientSession] = None) -> bool:
+        """Check via the news lists (without the feed file) if an update is needed."""
+
+        local_session = session or aiohttp.ClientSession(
+            trace_configs=tracing.get_trace_configs()
+        )
+        feed_categories = self._feed_meta.categories or [c for c in FeedItemCategory]
+
+        try:
+            await self._feed_index.load()
+
+            # a feed without index was never created or is from an older version
+            if not self._feed_index.exists:
+                return True
+
+            await self._negative_cache.load()
+
+            category_metas = await asyncio.gather(
+                *[
+                    self._hoyolab.get_latest_item_metas(
+                        local_session, category, self._feed_meta.category_size
+                    )
+                    for category in feed_categories
+                ]
+            )
+        finally:
+            if session is None:
+                await local_session.close()
+
+        return any(
+            self._feed_index.is_outdated(item_meta)
+            and not self._negative_cache.is_blocked(
+                self._get_cache_key(item_meta.id, item_meta.last_modified)
+            )
+            for item_meta in itertools.chain.from_iterable(category_metas)
+        )
+
+    async def _load_feed_items(self) -> List[FeedItem]:
+        """Load the items of the local feed file (if it exists)."""
+
+        feed_exists = await aiofiles.ospath.exists(self._feed_loader.config.path)
+
+        logger.info(
+            '%s "%s" feed in %s format...',
+            "Updating" if feed_exists else "Creating",
+            self._feed_meta.title or self._feed_meta.game.name.title(),
+            " & ".join([w.config.feed_type.title() for w in self._feed_writers]),
+        )
+
+        with tracing.span("load_feed"):
+            await self._negative_cache.load()
+            await self._feed_index.load()
+
+            # archived items are only looked up in the page index of the feed
+            page_index = FeedPageIndex(self._feed_loader.config.path)
+            await page_index.load()
+            self._page_index = page_index
+
+            return await self._feed_loader.get_feed_items()
+
     async def _update_category_feed(
         self,
         session: aiohttp.ClientSession,
         category: FeedItemCategory,
-        category_items: List[FeedItem],
+        feed_items: Awaitable[List[FeedItem]],
     ) -> List[FeedItem]:
         """Create or update a specific category feed."""
 
-        known_ids = {
-            item.id: (
+        with tracing.span("update_category", category=category.name.lower()):
+            return await self._update_category_items(session, category, feed_items)
+
+    async def _update_category_items(
+        self,
+        session: aiohttp.ClientSession,
+        category: FeedItemCategory,
+        feed_items: Awaitable[List[FeedItem]],
+    ) -> List[FeedItem]:
+        """Create or update a specific category feed (without tracing)."""
+
+        latest_item_metas = await self._hoyolab.get_latest_item_metas(
+            session, category, self._feed_meta.category_size
+        )
+
+        category_items = [
+            item for item in await feed_items if item.category == category
+        ]
+
+        known_ids: Dict[int, datetime] = {}
+        for item in category_items:
+            revision = (
                 item.published
                 if item.updated is None
                 else max(item.published, item.updated)
             )
-            for item in category_items
-            if item.category == category
-        }
 
-        latest_item_metas = await self._hoyolab.get_latest_item_metas(
-            session, category, self._feed_meta.category_size
-        )
+            # trivial edits of posts are only recorded in the index
+            indexed_revision = self._feed_index.get_revision(item.id)
+            if indexed_revision is not None:
+                revision = max(revision, indexed_revision)
+
+            known_ids[item.id] = revision
+
+        archived_ids = self._get_archived_revisions(latest_item_metas, known_ids)
+        known_revisions = {**archived_ids, **known_ids}
 
         new_or_outdated_ids = {
             item_meta.id
             for item_meta in latest_item_metas
-            if item_meta.id not in known_ids
-            or item_meta.last_modified > known_ids[item_meta.id]
+            if item_meta.id not in known_revisions
+            or item_meta.last_modified > known_revisions[item_meta.id]
+        }
+
+        last_modified = {meta.id: meta.last_modified for meta in latest_item_metas}
+
+        # skip posts which failed recently and were not modified since
+        skipped_ids = {
+            item_id
+            for item_id in new_or_outdated_ids
+            if self._negative_cache.is_blocked(
+                self._get_cache_key(item_id, last_modified[item_id])
+            )
         }
 
+        if len(skipped_ids) > 0:
+            logger.info(
+                'Skipping %d known broken posts for "%s" category.',
+                len(skipped_ids),
+                category.name.title(),
+            )
+
+            self._skipped_ids.update(skipped_ids)
+            new_or_outdated_ids -= skipped_ids
+
+            metrics.FEED_ITEMS.inc(
+                *self._get_metric_labels(category), "skipped", amount=len(skipped_ids)
+            )
+
         if len(new_or_outdated_ids) > 0:
             logger.info(
                 'Found %d new or outdated posts for "%s" category.',
@@ -169,28 +482,406 @@ class GameFeed:
                 category.name.title(),
             )
 
-            # remove outdated items from feed because they will be re-fetched
-            category_items = list(
-                filter(lambda item: item.id not in new_or_outdated_ids, category_items)
-            )
-
-            fetched_items = await asyncio.gather(
+            fetch_ids = sorted(new_or_outdated_ids, reverse=True)
+            fetch_results = await asyncio.gather(
                 *[
                     self._hoyolab.get_feed_item(session, item_id)
-                    for item_id in new_or_outdated_ids
-                ]
+                    for item_id in fetch_ids
+                ],
+                return_exceptions=True,
             )
 
-            category_items.extend(fetched_items)
+            fetched_items: List[FeedItem] = []
+            for item_id, result in zip(fetch_ids, fetch_results):
+                if isinstance(result, FeedItem):
+                    fetched_items.append(result)
+                    self._negative_cache.discard(
+                        self._feed_meta.game, self._feed_meta.language, item_id
+                    )
+                elif isinstance(result, Exception):
+                    # a single broken post should not discard the other posts
+                    logger.warning(
+                        'Could not fetch post %d of "%s" category: %s',
+                        item_id,
+                        category.name.title(),
+                        result,
+                    )
+                    self._failed_ids.add(item_id)
 
-            # cut off older items that exceed category_size
-            category_items.sort(key=lambda item: item.id, reverse=True)
-            category_items = category_items[: self._feed_meta.category_size]
+                    # network errors are retried in the next run, so only broken
+                    # (e.g. deleted) posts are skipped for a while
+                    if isinstance(result, HoyolabApiError) and not isinstance(
+                        result, HoyolabTemporaryError
+                    ):
+                        self._negative_cache.add_failure(
+                            self._get_cache_key(item_id, last_modified[item_id])
+                        )
 
-            self._was_updated = True
+                    metrics.FEED_ITEMS.inc(*self._get_metric_labels(category), "failed")
+                else:
+                    raise result
+
+            fetched_items = self._filter_changed_items(
+                category, category_items, fetched_items
+            )
+
+            if len(fetched_items) > 0:
+                # replace outdated items; failed posts keep their previous version
+                # and are retried in the next run because they are still outdated
+                fetched_ids = {item.id for item in fetched_items}
+                category_items = [
+                    item for item in category_items if item.id not in fetched_ids
+                ]
+                category_items.extend(fetched_items)
+
+                # cut off older items that exceed category_size
+                category_items.sort(key=lambda item: item.id, reverse=True)
+                category_items = category_items[: self._feed_meta.category_size]
+
+                self._was_updated = True
+
+        # loaded feeds are already sorted, but foreign files might not be
+        category_items.sort(key=lambda item: item.id, reverse=True)
+
+        changes = self._get_changes(category, known_ids, category_items, archived_ids)
+        self._changes.extend(changes)
+        self._count_items(category, changes, len(category_items))
+
+        # the events are emitted after the feed files are written
+        if len(changes) > 0 and len(self._event_hooks) > 0:
+            items = {item.id: item for item in category_items}
+            self._pending_events.extend(
+                FeedEvent(self._feed_meta, change, items.get(change.id))
+                for change in changes
+            )
 
         return category_items
 
+    def _filter_changed_items(
+        self,
+        category: FeedItemCategory,
+        category_items: List[FeedItem],
+        fetched_items: List[FeedItem],
+    ) -> List[FeedItem]:
+        """Filter the fetched items whose fingerprint changed (or which are new).
+
+        Items with a bumped modification time but the same fingerprint keep their
+        previous version, so the feed is not written again. Only their revision is
+        updated in the index.
+        """
+
+        previous_items = {item.id: item for item in category_items}
+        changed_items: List[FeedItem] = []
+
+        for item in fetched_items:
+            # fetched items are not transformed by writers yet (e.g. minified)
+            fingerprint = item.get_fingerprint()
+            self._fetched_fingerprints[item.id] = fingerprint
+
+            previous_item = previous_items.get(item.id)
+
+            if previous_item is None:
+                changed_items.append(item)
+                continue
+
+            # items of older indexes have no fingerprint, so the loaded one is used
+            previous_fingerprint = (
+                self._feed_index.get_fingerprint(item.id)
+                or previous_item.get_fingerprint()
+            )
+
+            if fingerprint != previous_fingerprint:
+                changed_items.append(item)
+                continue
+
+            self._touched_revisions[item.id] = (
+                item.published
+                if item.updated is None
+                else max(item.published, item.updated)
+            )
+
+        unchanged = len(fetched_items) - len(changed_items)
+        if unchanged > 0:
+            logger.info(
+                'Ignoring %d posts of "%s" category without content changes.',
+                unchanged,
+                category.name.title(),
+            )
+
+        return changed_items
+
+    def _get_archived_revisions(
+        self, latest_item_metas: List[FeedItemMeta], known_ids: Dict[int, datetime]
+    ) -> Dict[int, datetime]:
+        """Revisions of the latest posts which are only on archive pages."""
+
+        archived_ids: Dict[int, datetime] = {}
+
+        for item_meta in latest_item_metas:
+            if (
+                item_meta.id in known_ids
+                or item_meta.id not in self._page_index.archived_ids
+            ):
+                continue
+
+            # pages of older indexes have no revisions, so they are never outdated
+            revision = self._page_index.get_revision(item_meta.id)
+            if revision is None:
+                revision = item_meta.last_modified
+
+            indexed_revision = self._feed_index.get_revision(item_meta.id)
+            if indexed_revision is not None:
+                revision = max(revision, indexed_revision)
+
+            archived_ids[item_meta.id] = revision
+
+        return archived_ids
+
+    def _count_items(
+        self, category: FeedItemCategory, changes: List[FeedItemChange], size: int
+    ) -> None:
+        """Count the new, updated and unchanged items of a category."""
+
+        labels = self._get_metric_labels(category)
+
+        added = sum(c.change_type == FeedItemChangeType.ADDED for c in changes)
+        updated = sum(c.change_type == FeedItemChangeType.UPDATED for c in changes)
+
+        metrics.FEED_ITEMS.inc(*labels, "new", amount=added)
+        metrics.FEED_ITEMS.inc(*labels, "updated", amount=updated)
+        metrics.FEED_ITEMS.inc(*labels, "unchanged", amount=size - added - updated)
+
+    def _get_metric_labels(self, category: FeedItemCategory) -> Tuple[str, str, str]:
+        """Metric labels (game, language and category) of a category."""
+
+        return (
+            self._feed_meta.game.name.lower(),
+            str(self._feed_meta.language),
+            category.name.lower(),
+        )
+
+    @staticmethod
+    def _get_changes(
+        category: FeedItemCategory,
+        known_ids: Dict[int, datetime],
+        category_items: List[FeedItem],
+        archived_ids: Optional[Dict[int, datetime]] = None,
+    ) -> List[FeedItemChange]:
+        """Compare the previous revisions of a category with the updated items.
+
+        Archived items are not part of the category items, so they can be updated
+        but never removed.
+        """
+
+        known_revisions = {**(archived_ids or {}), **known_ids}
+        changes = []
+        item_ids = set()
+
+        for item in category_items:
+            item_ids.add(item.id)
+            revision = (
+                item.published
+                if item.updated is None
+                else max(item.published, item.updated)
+            )
+
+            if item.id not in known_revisions:
+                change_type = FeedItemChangeType.ADDED
+            elif revision > known_revisions[item.id]:
+                change_type = FeedItemChangeType.UPDATED
+            else:
+                continue
+
+            changes.append(
+                FeedItemChange(change_type, item.id, item.category, revision)
+            )
+
+        return changes + [
+            FeedItemChange(FeedItemChangeType.REMOVED, item_id, category, revision)
+            for item_id, revision in known_ids.items()
+            if item_id not in item_ids
+        ]
+
+    def _get_cache_key(self, post_id: int, last_modified: datetime) -> NegativeCacheKey:
+        """Create the negative cache key of a post of this feed."""
+        return self._feed_meta.game, self._feed_meta.language, post_id, last_modified
+
+
+class FeedView:
+    """Derived feed of the already fetched items of one or more game feeds."""
+
+    def __init__(
+        self, view_meta: FeedViewMeta, feed_writers: List[AbstractFeedFileWriter]
+    ) -> None:
+        self._view_meta = view_meta
+        self._feed_writers = feed_writers
+        self._is_outdated = False
+
+    @property
+    def view_meta(self) -> FeedViewMeta:
+        """Meta info of the view."""
+        return self._view_meta
+
+    @property
+    def feed_writers(self) -> List[AbstractFeedFileWriter]:
+        """Writers of the view."""
+        return self._feed_writers
+
+    def invalidate(self) -> None:
+        """Write the view with the next create_feed() (e.g. after a config change)."""
+        self._is_outdated = True
+
+    @classmethod
+    def from_config(cls: Type[_FV], view_config: FeedViewConfig) -> _FV:
+        """Create an instance via a view config."""
+
+        writer_factory = FeedFileWriterFactory()
+        writers = [
+            writer_factory.create_writer(writer_config)
+            for writer_config in view_config.writer_configs
+        ]
+
+        return cls(view_config.view_meta, writers)
+
+    def matches(self, feed_meta: FeedMeta) -> bool:
+        """Check if the items of a feed are part of the view."""
+
+        return (
+            len(self._view_meta.games) == 0 or feed_meta.game in self._view_meta.games
+        ) and (
+            len(self._view_meta.languages) == 0
+            or feed_meta.language in self._view_meta.languages
+        )
+
+    def select_items(
+        self, game_feeds: Iterable[GameFeed], now: Optional[datetime] = None
+    ) -> List[FeedItem]:
+        """Select the items of the view from the (created) game feeds."""
+
+        now = now or datetime.now(timezone.utc)
+        categories = self._view_meta.categories
+
+        sources = [
+            items
+            for feed in self._get_source_feeds(game_feeds)
+            for category, items in feed.category_feeds.items()
+            if len(categories) == 0 or category in categories
+        ]
+
+        min_published = (
+            now - timedelta(days=self._view_meta.max_age)
+            if self._view_meta.max_age is not None
+            else None
+        )
+
+        view_items: List[FeedItem] = []
+        seen_ids: Set[int] = set()
+
+        # k-way merge of the lists that are already sorted descending by id (the
+        # merge is stable, so equal ids are taken in the order of the sources)
+        for item in heapq.merge(*sources, key=lambda i: i.id, reverse=True):
+            if self._view_meta.max_items is not None and (
+                len(view_items) >= self._view_meta.max_items
+            ):
+                break
+
+            # the same post can be part of multiple language feeds, the version of
+            # the preferred language comes first
+            if item.id in seen_ids:
+                continue
+
+            if min_published is not None and item.published < min_published:
+                continue
+
+            seen_ids.add(item.id)
+            view_items.append(item)
+
+        return view_items
+
+    def _get_source_feeds(self, game_feeds: Iterable[GameFeed]) -> List[GameFeed]:
+        """Game feeds of the view, ordered by the preferred languages of the view."""
+
+        languages = self._view_meta.languages
+
+        # stable, so feeds of the same language keep the order of the config
+        return sorted(
+            [feed for feed in game_feeds if self.matches(feed.feed_meta)],
+            key=lambda f: languages.index(f.feed_meta.language) if languages else 0,
+        )
+
+    def create_feed_meta(self, game_feeds: Iterable[GameFeed]) -> FeedMeta:
+        """Create the meta info for the writers of the view.
+
+        The game and language are the first ones of the view config or otherwise
+        the ones of the first matching game feed.
+        """
+
+        source_metas = [f.feed_meta for f in self._get_source_feeds(game_feeds)]
+        if len(source_metas) == 0:
+            raise ConfigFormatError(
+                'View "{}" does not match any game feed!'.format(self._view_meta.title)
+            )
+
+        games = self._view_meta.games or [source_metas[0].game]
+        languages = self._view_meta.languages or [source_metas[0].language]
+
+        slug = re.sub(r"[^a-z0-9]+", "-", self._view_meta.title.lower()).strip("-")
+
+        return FeedMeta(
+            game=games[0],
+            language=languages[0],
+            title=self._view_meta.title,
+            icon=self._view_meta.icon,
+            id="tag:hoyolab.com,2021:/views/{}".format(slug),
+        )
+
+    async def create_feed(
+        self, game_feeds: List[GameFeed], content_store: Optional[BlobStore] = None
+    ) -> None:
+        """Write the view if at least one of its game feeds was updated.
+
+        Offloaded items of the game feeds are materialized via the content store.
+        """
+
+        source_feeds = self._get_source_feeds(game_feeds)
+        if len(source_feeds) == 0:
+            logger.warning(
+                'The "%s" view does not match any game feed.', self._view_meta.title
+            )
+            return
+
+        any_missing = any(
+            [
+                not await aiofiles.ospath.exists(writer.config.path)
+                for writer in self._feed_writers
+            ]
+        )
+
+        if (
+            not any_missing
+            and not self._is_outdated
+            and not any(f.was_updated for f in source_feeds)
+        ):
+            return
+
+        feed_meta = self.create_feed_meta(source_feeds)
+        view_items = self.select_items(source_feeds)
+
+        if content_store is not None:
+            view_items = await content_store.materialize(view_items)
+
+        with tracing.span("create_view", view=self._view_meta.title):
+            await asyncio.gather(
+                *[
+                    writer.write_feed(feed_meta, view_items)
+                    for writer in self._feed_writers
+                ]
+            )
+
+        self._is_outdated = False
+
+        logger.info('The "%s" view was successfully updated.', self._view_meta.title)
+
 
 class GameFeedCollection:
     """Collection of feed generators for multiple games."""
@@ -200,22 +891,80 @@ class GameFeedCollection:
         feed_metas: List[FeedMeta],
         feed_writers: List[List[AbstractFeedFileWriter]],
         feed_loaders: List[Optional[AbstractFeedFileLoader]],
+        feed_views: Optional[List[FeedView]] = None,
+        delta_publishers: Optional[List[Optional[DeltaPublisher]]] = None,
+        event_hooks: Optional[List[EventHook]] = None,
+        content_store: Optional[BlobStore] = None,
     ) -> None:
-        if not (len(feed_metas) == len(feed_writers) == len(feed_loaders)):
+        if delta_publishers is None:
+            delta_publishers = [None] * len(feed_metas)
+
+        if not (
+            len(feed_metas)
+            == len(feed_writers)
+            == len(feed_loaders)
+            == len(delta_publishers)
+        ):
             raise ValueError("Parameter lists do not have the same length!")
 
+        # all feeds share the list, so reloaded hooks are replaced in place
+        self._event_hooks = event_hooks if event_hooks is not None else []
+
         self._game_feeds = [
-            GameFeed(meta, writer, loader)
-            for meta, writer, loader in zip(feed_metas, feed_writers, feed_loaders)
+            GameFeed(
+                meta,
+                writer,
+                loader,
+                delta_publisher=delta,
+                event_hooks=self._event_hooks,
+            )
+            for meta, writer, loader, delta in zip(
+                feed_metas, feed_writers, feed_loaders, delta_publishers
+            )
         ]
 
+        self._feed_views = feed_views or []
+        self._websub_publisher = WebSubPublisher()
+        self._content_store = content_store
+
+        # configs of a collection created via configs (used to detect changes)
+        self._feed_configs: List[Optional[FeedConfig]] = [None] * len(feed_metas)
+        self._view_configs: List[Optional[FeedViewConfig]] = [None] * len(
+            self._feed_views
+        )
+        self._hook_configs: Optional[List[EventHookConfig]] = None
+
+    @property
+    def game_feeds(self) -> List[GameFeed]:
+        """Feeds of the collection."""
+        return self._game_feeds
+
+    @property
+    def feed_writers(self) -> List[AbstractFeedFileWriter]:
+        """Writers of all feeds and views of the collection."""
+
+        writers: List[AbstractFeedFileWriter] = []
+        for feed in self._game_feeds:
+            writers.extend(feed.feed_writers)
+        for view in self._feed_views:
+            writers.extend(view.feed_writers)
+
+        return writers
+
     @classmethod
-    def from_configs(cls: Type[_GFC], feed_configs: List[FeedConfig]) -> _GFC:
-        """Create an instance via feed configs."""
+    def from_configs(
+        cls: Type[_GFC],
+        feed_configs: List[FeedConfig],
+        view_configs: Optional[List[FeedViewConfig]] = None,
+        hook_configs: Optional[List[EventHookConfig]] = None,
+        content_store: Optional[BlobStore] = None,
+    ) -> _GFC:
+        """Create an instance via feed configs and optional view and hook configs."""
 
         metas: List[FeedMeta] = []
         writers: List[List[AbstractFeedFileWriter]] = []
         loaders: List[Optional[AbstractFeedFileLoader]] = []
+        deltas: List[Optional[DeltaPublisher]] = []
 
         for feed_config in feed_configs:
             metas.append(feed_config.feed_meta)
@@ -235,19 +984,220 @@ class GameFeedCollection:
             )
             loaders.append(loader)
 
-        return cls(metas, writers, loaders)
+            deltas.append(
+                DeltaPublisher(feed_config.delta_config)
+                if feed_config.delta_config
+                else None
+            )
+
+        views = [FeedView.from_config(conf) for conf in view_configs or []]
+
+        hooks = [EventHook.from_config(conf) for conf in hook_configs or []]
+
+        collection = cls(metas, writers, loaders, views, deltas, hooks, content_store)
+        collection._feed_configs = list(feed_configs)
+        collection._view_configs = list(view_configs or [])
+        collection._hook_configs = list(hook_configs or [])
+
+        return collection
+
+    async def reload_configs(
+        self,
+        feed_configs: List[FeedConfig],
+        view_configs: Optional[List[FeedViewConfig]] = None,
+        hook_configs: Optional[List[EventHookConfig]] = None,
+    ) -> List[GameFeed]:
+        """Apply changed configs and return the added or changed feeds.
+
+        Feeds with an unchanged config are kept with their state (e.g. the items of
+        the last run), so only the returned feeds need to be created again.
+        """
+
+        view_configs = view_configs or []
+        hook_configs = hook_configs or []
+
+        if hook_configs != self._hook_configs:
+            # queued events of the previous hooks are still delivered
+            await asyncio.gather(*[hook.flush() for hook in self._event_hooks])
+            self._event_hooks[:] = [EventHook.from_config(c) for c in hook_configs]
+            self._hook_configs = list(hook_configs)
+
+            logger.info("Reloaded %d event hooks.", len(self._event_hooks))
+
+        current_feeds = list(zip(self._feed_configs, self._game_feeds))
+        game_feeds: List[GameFeed] = []
+        changed_feeds: List[GameFeed] = []
+
+        for feed_config in feed_configs:
+            feed = next((f for c, f in current_feeds if c == feed_config), None)
+
+            if feed is None:
+                feed = GameFeed.from_config(feed_config, self._event_hooks)
+                changed_feeds.append(feed)
+            else:
+                current_feeds.remove((feed_config, feed))
+
+            game_feeds.append(feed)
+
+        logger.info(
+            "Reloaded feeds: %d added or changed, %d removed, %d unchanged.",
+            len(changed_feeds),
+            len(current_feeds),
+            len(game_feeds) - len(changed_feeds),
+        )
+
+        self._game_feeds = game_feeds
+        self._feed_configs = list(feed_configs)
+
+        # views only derive from the feeds, so only changed views are written again
+        current_views = list(zip(self._view_configs, self._feed_views))
+        feed_views: List[FeedView] = []
+
+        for view_config in view_configs:
+            view = next((v for c, v in current_views if c == view_config), None)
+
+            if view is None:
+                view = FeedView.from_config(view_config)
+                view.invalidate()
+            else:
+                current_views.remove((view_config, view))
+
+            feed_views.append(view)
+
+        self._feed_views = feed_views
+        self._view_configs = list(view_configs)
+
+        return changed_feeds
 
     async def create_feeds(
-        self, session: Optional[aiohttp.ClientSession] = None
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        game_feeds: Optional[List[GameFeed]] = None,
     ) -> None:
-        """Create or update a feed and write it to files."""
+        """Create or update the feeds (or only the given ones) and write them to files.
+
+        The views are always created, using the last items of the other feeds.
+        """
 
-        local_session = session or aiohttp.ClientSession()
+        local_session = session or aiohttp.ClientSession(
+            trace_configs=tracing.get_trace_configs()
+        )
 
         try:
-            await asyncio.gather(
-                *[feed.create_feed(local_session) for feed in self._game_feeds]
+            with tracing.span("create_feeds"):
+                results = await self._create_all_feeds(
+                    local_session,
+                    self._game_feeds if game_feeds is None else game_feeds,
+                )
+        finally:
+            if session is None:
+                await local_session.close()
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def check_feeds(
+        self, session: Optional[aiohttp.ClientSession] = None
+    ) -> bool:
+        """Check via the news lists if any feed needs an update."""
+
+        local_session = session or aiohttp.ClientSession(
+            trace_configs=tracing.get_trace_configs()
+        )
+
+        try:
+            results = await asyncio.gather(
+                *[feed.check_feed(local_session) for feed in self._game_feeds],
+                return_exceptions=True,
             )
         finally:
             if session is None:
                 await local_session.close()
+
+        update_needed = False
+        for feed, result in zip(self._game_feeds, results):
+            title = feed.feed_meta.title or feed.feed_meta.game.name.title()
+
+            if isinstance(result, Exception):
+                # the full run decides what to do with the failing feed
+                logger.warning('Could not check "%s" feed: %s', title, result)
+                update_needed = True
+            elif isinstance(result, BaseException):
+                raise result
+            elif result:
+                logger.info('The "%s" feed needs an update.', title)
+                update_needed = True
+            else:
+                logger.info('The "%s" feed is still uptodate.', title)
+
+        return update_needed
+
+    async def _create_all_feeds(
+        self, session: aiohttp.ClientSession, game_feeds: List[GameFeed]
+    ) -> List[Optional[BaseException]]:
+        """Create the feeds and all views and return the errors of the feeds."""
+
+        # writers of unchanged feeds are skipped, so their flags of a previous run
+        # (e.g. in daemon mode) must not cause another hub ping or view update
+        for writer in self.feed_writers:
+            writer.reset_written()
+
+        for feed in self._game_feeds:
+            feed.reset_updated()
+
+        # a failing feed should neither abort nor lose the other feeds
+        results = await asyncio.gather(
+            *[feed.create_feed(session) for feed in game_feeds],
+            return_exceptions=True,
+        )
+
+        failed_feeds = [
+            feed
+            for feed, result in zip(game_feeds, results)
+            if isinstance(result, BaseException)
+        ]
+
+        # views are computed from the fetched items, so no additional requests
+        created_views = []
+        for view in self._feed_views:
+            if any(view.matches(feed.feed_meta) for feed in failed_feeds):
+                logger.warning(
+                    'Skipping "%s" view due to failed feeds.', view.view_meta.title
+                )
+            else:
+                created_views.append(
+                    view.create_feed(self._game_feeds, self._content_store)
+                )
+
+        await asyncio.gather(*created_views)
+
+        if self._content_store is not None:
+            await self._offload_contents(self._content_store)
+
+        # the hubs get a single ping for all feeds and views written in this run
+        with tracing.span("ping_hubs"):
+            await self._websub_publisher.publish(session, self.feed_writers)
+
+        return results
+
+    async def _offload_contents(self, content_store: BlobStore) -> None:
+        """Offload the contents of all feeds and remove the unused blobs."""
+
+        with tracing.span("offload_contents"):
+            for feed in self._game_feeds:
+                await feed.offload_contents(content_store)
+
+            keys = {
+                item.content_key
+                for feed in self._game_feeds
+                for items in feed.category_feeds.values()
+                for item in items
+                if isinstance(item, OffloadedFeedItem)
+            }
+
+            removed = await content_store.prune(keys)
+
+        logger.debug(
+            "Offloaded %d item contents (%d unused blobs removed).", len(keys), removed
+        )
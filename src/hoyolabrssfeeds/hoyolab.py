@@ -1,13 +1,22 @@
+import functools
 import json
+import os
 import re
+from datetime import datetime
+from datetime import timezone
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Tuple
 
 import aiohttp
 import pydantic
 
+from . import metrics
+from . import tracing
 from .errors import HoyolabApiError
+from .errors import HoyolabTemporaryError
 from .models import FeedItem
 from .models import FeedItemCategory
 from .models import FeedItemMeta
@@ -17,37 +26,83 @@ from .models import Language
 HOYOLAB_API_BASE_URL = "https://bbs-api-os.hoyolab.com/community/post/wapi/"
 DEFAULT_CATEGORY_SIZE = 5
 
+# environment variable to use another API (e.g. a local simulator)
+API_BASE_URL_ENV = "HOYOLAB_API_BASE_URL"
+
+
+@functools.cache
+def get_endpoint_urls(base_url: str) -> Tuple[pydantic.AnyHttpUrl, pydantic.AnyHttpUrl]:
+    """Validated URLs of the news list and post endpoints of an API base URL."""
+
+    if not base_url.endswith("/"):
+        base_url += "/"
+
+    # no HttpUrl, because local hosts (e.g. the simulator) have no TLD
+    return (
+        pydantic.parse_obj_as(pydantic.AnyHttpUrl, base_url + "getNewsList"),
+        pydantic.parse_obj_as(pydantic.AnyHttpUrl, base_url + "getPostFull"),
+    )
+
 
 class HoyolabNews:
     """Wrapper for Hoyolab REST API endpoints."""
 
-    def __init__(self, game: Game, language: Language = Language.ENGLISH) -> None:
+    def __init__(
+        self,
+        game: Game,
+        language: Language = Language.ENGLISH,
+        base_url: Optional[str] = None,
+    ) -> None:
         self._game = game
         self._lang = language.lower()
+        self._news_list_url, self._post_full_url = get_endpoint_urls(
+            base_url or os.environ.get(API_BASE_URL_ENV) or HOYOLAB_API_BASE_URL
+        )
 
     async def _request(
         self,
         session: aiohttp.ClientSession,
         params: Dict[str, Any],
-        url: pydantic.HttpUrl,
+        url: pydantic.AnyHttpUrl,
     ) -> Dict[str, Any]:
         """Send a GET request to the Hoyolab API endpoint."""
 
         headers = {"Origin": "https://www.hoyolab.com", "X-Rpc-Language": self._lang}
+        endpoint = str(url.path).rpartition("/")[2]
+
+        def loads(text: str) -> Any:
+            with metrics.HOYOLAB_PARSE_SECONDS.time(endpoint):
+                return json.loads(text)
 
         try:
-            async with session.get(
-                str(url), headers=headers, params=params
-            ) as response:
-                response.raise_for_status()
-                response_json: Dict[str, Any] = await response.json()
+            with (
+                tracing.span(endpoint, "hoyolab"),
+                metrics.HOYOLAB_REQUEST_SECONDS.time(endpoint),
+            ):
+                async with session.get(
+                    str(url), headers=headers, params=params
+                ) as response:
+                    metrics.HOYOLAB_REQUESTS.inc(endpoint, str(response.status))
+                    response.raise_for_status()
+
+                    body = await response.read()
+                    metrics.HOYOLAB_DOWNLOADED_BYTES.inc(endpoint, amount=len(body))
+
+                    response_json: Dict[str, Any] = await response.json(loads=loads)
 
             if response_json["retcode"] != 0:
+                metrics.HOYOLAB_API_ERRORS.inc(endpoint, str(response_json["retcode"]))
+
                 # the message might be in chinese
                 raise HoyolabApiError(response_json["message"])
         except aiohttp.ContentTypeError as err:
             raise HoyolabApiError("Could not decode response to JSON!") from err
         except aiohttp.ClientResponseError as err:
+            if err.status == 429 or err.status >= 500:
+                raise HoyolabTemporaryError(
+                    "Could not request Hoyolab endpoint (temporary error)!"
+                ) from err
+
             raise HoyolabApiError("Could not request Hoyolab endpoint!") from err
         except KeyError as err:
             raise HoyolabApiError("Unexpected response!") from err
@@ -217,15 +272,46 @@ class HoyolabNews:
 
         params = {"gids": self._game, "page_size": category_size, "type": category}
 
-        url = pydantic.parse_obj_as(
-            pydantic.HttpUrl, HOYOLAB_API_BASE_URL + "getNewsList"
-        )
-
-        response = await self._request(session, params, url)
+        response = await self._request(session, params, self._news_list_url)
         news_list: List[Dict[str, Any]] = response["data"]["list"]
 
         return news_list
 
+    async def get_news_page(
+        self,
+        session: aiohttp.ClientSession,
+        category: FeedItemCategory,
+        page_size: int = DEFAULT_CATEGORY_SIZE,
+        last_id: Optional[str] = None,
+    ) -> Tuple[List[FeedItemMeta], Optional[str]]:
+        """Get the meta info of a page of posts and the last id of the next page.
+
+        The last id is None if there are no more pages.
+        """
+
+        params: Dict[str, Any] = {
+            "gids": self._game,
+            "page_size": page_size,
+            "type": category,
+        }
+
+        if last_id is not None:
+            params["last_id"] = last_id
+
+        response = await self._request(session, params, self._news_list_url)
+
+        try:
+            item_metas = self._create_item_metas(response["data"]["list"])
+            next_id = (
+                None
+                if response["data"]["is_last"]
+                else str(response["data"]["last_id"])
+            )
+        except (KeyError, TypeError) as err:
+            raise HoyolabApiError("Unexpected news list response!") from err
+
+        return item_metas, next_id
+
     async def get_post(
         self, session: aiohttp.ClientSession, post_id: int
     ) -> Dict[str, Any]:
@@ -233,14 +319,14 @@ class HoyolabNews:
 
         params = {"gids": self._game, "post_id": post_id}
 
-        url = pydantic.parse_obj_as(
-            pydantic.HttpUrl, HOYOLAB_API_BASE_URL + "getPostFull"
-        )
-
-        response = await self._request(session, params, url)
+        response = await self._request(session, params, self._post_full_url)
         post: Dict[str, Any] = response["data"]["post"]
 
-        return self._transform_post(post)
+        with (
+            tracing.span("transform", "hoyolab"),
+            metrics.HOYOLAB_TRANSFORM_SECONDS.time(),
+        ):
+            return self._transform_post(post)
 
     async def get_latest_item_metas(
         self,
@@ -250,23 +336,35 @@ class HoyolabNews:
     ) -> List[FeedItemMeta]:
         """Get the meta info of the latest posts in a specified category."""
 
-        latest_posts = []
-
         category_posts = await self.get_news_list(session, category, category_size)
 
-        for post in category_posts:
-            published_ts = int(post["post"]["created_at"])
-            modified_ts = int(post["last_modify_time"])
+        return self._create_item_metas(category_posts)
+
+    @staticmethod
+    def _create_item_metas(posts: List[Dict[str, Any]]) -> List[FeedItemMeta]:
+        """Create the meta info of the posts of a news list."""
 
-            item_meta = {
-                "id": post["post"]["post_id"],
-                "last_modified": max(published_ts, modified_ts),
-            }
+        item_metas = []
 
-            # parsing for type conversions
-            latest_posts.append(pydantic.parse_obj_as(FeedItemMeta, item_meta))
+        try:
+            for post in posts:
+                published_ts = int(post["post"]["created_at"])
+                modified_ts = int(post["last_modify_time"])
+
+                # explicit type conversions instead of model validation
+                item_meta = FeedItemMeta(
+                    id=int(post["post"]["post_id"]),
+                    last_modified=datetime.fromtimestamp(
+                        max(published_ts, modified_ts), tz=timezone.utc
+                    ),
+                    published=datetime.fromtimestamp(published_ts, tz=timezone.utc),
+                )
 
-        return latest_posts
+                item_metas.append(item_meta)
+        except (KeyError, TypeError, ValueError) as err:
+            raise HoyolabApiError("Unexpected news list response!") from err
+
+        return item_metas
 
     async def get_feed_item(
         self, session: aiohttp.ClientSession, post_id: int
@@ -275,6 +373,12 @@ class HoyolabNews:
 
         post = await self.get_post(session, post_id)
 
+        return pydantic.parse_obj_as(FeedItem, self._create_item_dict(post))
+
+    @staticmethod
+    def _create_item_dict(post: Dict[str, Any]) -> Dict[str, Any]:
+        """Map the values of a (transformed) post to the fields of a feed item."""
+
         item = {
             "id": post["post"]["post_id"],
             "title": post["post"]["subject"],
@@ -293,4 +397,4 @@ class HoyolabNews:
         if len(post["cover_list"]) > 0:
             item["image"] = post["cover_list"][0]["url"]
 
-        return pydantic.parse_obj_as(FeedItem, item)
+        return item
@@ -1,16 +1,27 @@
+import gzip
+import hashlib
 import json
+import logging
 from abc import ABCMeta
 from abc import abstractmethod
 from datetime import datetime
+from datetime import timezone
+from pathlib import Path
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Set
+from typing import Tuple
 from xml.etree import ElementTree
 
 import aiofiles
+import aiofiles.ospath
 import pydantic
 
+from . import metrics
+from .compressors import ENCODING_SUFFIXES
+from .compressors import GZIP
 from .errors import FeedFormatError
 from .errors import FeedIOError
 from .models import FeedFileConfig
@@ -20,6 +31,17 @@ from .models import FeedType
 from .writers import AbstractFeedFileWriter
 from .writers import JSONFeedFileWriter
 
+logger = logging.getLogger(__name__)
+
+REQUIRED_ITEM_FIELDS = (
+    "id",
+    "title",
+    "author",
+    "content",
+    "category",
+    "published",
+)
+
 
 class AbstractFeedFileLoader(metaclass=ABCMeta):
     """ABC for feed file loading functionality."""
@@ -32,11 +54,186 @@ class AbstractFeedFileLoader(metaclass=ABCMeta):
         """Returns the config of the feed loader."""
         return self._config
 
-    @abstractmethod
+    @property
+    def was_recovered(self) -> bool:
+        """Flag if the last items were recovered from another file than the feed."""
+        return False
+
     async def get_feed_items(self) -> List[FeedItem]:
         """Get the items of the feed or an empty list if they do not exist."""
+
+        if not await aiofiles.ospath.exists(self.config.path):
+            return []
+
+        # archive pages of paged feeds are immutable, so only the head page is loaded
+        # (the archived items are known from the page index)
+        with metrics.FEED_LOAD_SECONDS.time(str(self.config.feed_type)):
+            return await self._load_items(self.config.path)
+
+    @abstractmethod
+    async def _load_items(self, path: Path) -> List[FeedItem]:
+        """Load the items of a single feed file."""
         pass
 
+    @staticmethod
+    async def _read_file(path: Path) -> str:
+        """Read a (precompressed) feed file and validate its checksum if available.
+
+        Raises IOError if the file could not be read (to be wrapped by the loaders).
+        """
+
+        async with aiofiles.open(path, "rb") as fd:
+            data = await fd.read()
+
+        if path.name.endswith(ENCODING_SUFFIXES[GZIP]):
+            try:
+                data = gzip.decompress(data)
+            except (EOFError, gzip.BadGzipFile) as err:
+                raise FeedFormatError(
+                    'Could not decompress feed file "{}"!'.format(path)
+                ) from err
+
+            feed_path = path.with_name(path.name.removesuffix(ENCODING_SUFFIXES[GZIP]))
+        else:
+            feed_path = path
+
+        # precompressed files share the checksum of the feed file
+        checksum_path = AbstractFeedFileWriter.get_checksum_path(feed_path)
+
+        if await aiofiles.ospath.exists(checksum_path):
+            async with aiofiles.open(checksum_path, "r") as fd:
+                checksum = (await fd.read()).strip()
+
+            if hashlib.sha256(data).hexdigest() != checksum:
+                raise FeedFormatError(
+                    'Checksum of feed file "{}" does not match!'.format(path)
+                )
+
+        try:
+            return data.decode()
+        except UnicodeDecodeError as err:
+            raise FeedFormatError(
+                'Could not decode feed file "{}"!'.format(path)
+            ) from err
+
+    @staticmethod
+    def _create_trusted_item(item_dict: Dict[str, Any]) -> FeedItem:
+        """Create a feed item from values of an own feed file without validation."""
+
+        # the files were written from validated items, so only a cheap check for
+        # missing values is needed to detect broken or foreign files
+        for field in REQUIRED_ITEM_FIELDS:
+            if item_dict.get(field) is None:
+                raise FeedFormatError(
+                    'Could not load feed item without value for "{}"!'.format(field)
+                )
+
+        return FeedItem.from_trusted(item_dict)
+
+
+class FallbackFeedFileLoader(AbstractFeedFileLoader):
+    """Loader which falls back to the other outputs of a feed if a file is broken.
+
+    The feed file of the first loader is preferred. If it is missing or broken, the
+    freshest valid file of all loaders (including the precompressed files) is used,
+    so the feed can be recovered without refetching all posts.
+    """
+
+    def __init__(self, loaders: List[AbstractFeedFileLoader]) -> None:
+        if len(loaders) == 0:
+            raise ValueError("Fallback loader needs at least one loader!")
+
+        super().__init__(loaders[0].config)
+        self._loaders = loaders
+        self._was_recovered = False
+
+    @property
+    def loaders(self) -> List[AbstractFeedFileLoader]:
+        """Loaders of the feed outputs in order of preference."""
+        return self._loaders
+
+    @property
+    def was_recovered(self) -> bool:
+        """Flag if the last items were recovered from another file than the feed."""
+        return self._was_recovered
+
+    async def get_feed_items(self) -> List[FeedItem]:
+        """Get the items of the preferred or the freshest valid feed file."""
+
+        self._was_recovered = False
+
+        # precompressed files contain the same feed (zstd needs the optional module)
+        candidates: List[Tuple[AbstractFeedFileLoader, Path]] = []
+        for loader in self._loaders:
+            path = loader.config.path
+            candidates.append((loader, path))
+            candidates.append(
+                (loader, path.with_name(path.name + ENCODING_SUFFIXES[GZIP]))
+            )
+
+        recovered: List[Tuple[AbstractFeedFileLoader, Path, List[FeedItem]]] = []
+        last_error: Optional[Exception] = None
+
+        for loader, path in candidates:
+            if not await aiofiles.ospath.exists(path):
+                continue
+
+            try:
+                with metrics.FEED_LOAD_SECONDS.time(str(loader.config.feed_type)):
+                    feed_items = await loader._load_items(path)
+            except (FeedFormatError, FeedIOError) as err:
+                logger.warning('Could not load feed file "%s": %s', path, err)
+                last_error = err
+                continue
+
+            # the preferred file is as fresh as the others if it is valid
+            if path == self.config.path:
+                return feed_items
+
+            recovered.append((loader, path, feed_items))
+
+        if len(recovered) == 0:
+            if last_error is not None:
+                raise last_error
+
+            return []
+
+        # max keeps the first of equally fresh files (i.e. the order of preference)
+        loader, path, feed_items = max(
+            recovered, key=lambda r: self._get_freshness(r[2])
+        )
+
+        logger.warning(
+            'Recovered %d feed items of "%s" from "%s".',
+            len(feed_items),
+            self.config.path,
+            path,
+        )
+
+        self._was_recovered = True
+
+        return feed_items
+
+    async def _load_items(self, path: Path) -> List[FeedItem]:
+        """Load the items of a single feed file via the preferred loader."""
+        return await self._loaders[0]._load_items(path)
+
+    @staticmethod
+    def _get_freshness(feed_items: List[FeedItem]) -> Tuple[datetime, int]:
+        """Latest revision of the items (and their number for equal revisions)."""
+
+        latest = max(
+            (
+                item.published
+                if item.updated is None
+                else max(item.published, item.updated)
+                for item in feed_items
+            ),
+            default=datetime.min.replace(tzinfo=timezone.utc),
+        )
+
+        return latest, len(feed_items)
+
 
 class FeedFileLoaderFactory:
     """Factory for creating specific feed loaders."""
@@ -74,60 +271,76 @@ class FeedFileLoaderFactory:
 
         raise ValueError("Could not create loader from given writers!")
 
+    def create_fallback_loader(
+        self, writers: List[AbstractFeedFileWriter]
+    ) -> FallbackFeedFileLoader:
+        """Create a loader which falls back to the other outputs of the writers."""
+
+        # the preferred loader is the same as of create_any_loader
+        preferred_loader = self.create_any_loader(writers)
+        loaders = [preferred_loader]
+
+        for writer in writers:
+            if (
+                writer.config.feed_type in self._loaders
+                and writer.config.path != preferred_loader.config.path
+            ):
+                loader_config = pydantic.parse_obj_as(FeedFileConfig, writer.config)
+                loaders.append(self.create_loader(loader_config))
+
+        return FallbackFeedFileLoader(loaders)
+
 
 class JSONFeedFileLoader(AbstractFeedFileLoader):
     """Load feed from JSON-Feed format (https://www.jsonfeed.org/version/1.1/)."""
 
-    async def get_feed_items(self) -> List[FeedItem]:
-        """Returns feed items of JSON-Feed if feed exists."""
-
-        if not self.config.path.exists():
-            return []
+    async def _load_items(self, path: Path) -> List[FeedItem]:
+        """Returns feed items of a JSON-Feed file."""
 
         feed_items = []
-        feed = await self._load_from_file()
+        feed = await self._load_from_file(path)
 
         try:
             for item in feed["items"]:
                 category = FeedItemCategory.from_str(item["tags"][0])
 
                 item_dict = {
-                    "id": item["id"],
+                    "id": int(item["id"]),
                     "title": item["title"],
                     "author": item["authors"][0]["name"],
                     "content": item["content_html"],
                     "category": category,
-                    "published": item["date_published"],
+                    "published": datetime.fromisoformat(item["date_published"]),
                 }
 
                 if "summary" in item:
                     item_dict["summary"] = item["summary"]
 
                 if "date_modified" in item:
-                    item_dict["updated"] = item["date_modified"]
+                    item_dict["updated"] = datetime.fromisoformat(item["date_modified"])
 
                 if "image" in item:
                     item_dict["image"] = item["image"]
 
-                feed_items.append(item_dict)
+                feed_items.append(self._create_trusted_item(item_dict))
         except KeyError as err:
             raise FeedFormatError("Could not find required key in JSON feed!") from err
-        except ValueError as err:
+        except (TypeError, ValueError) as err:
             raise FeedFormatError("Could not load JSON feed items!") from err
 
-        return pydantic.parse_obj_as(List[FeedItem], feed_items)
+        return feed_items
 
-    async def _load_from_file(self) -> Dict[str, Any]:
-        """Load JSON-Feed from file."""
+    async def _load_from_file(self, path: Optional[Path] = None) -> Dict[str, Any]:
+        """Load JSON-Feed from file (the feed file if no path is given)."""
 
-        try:
-            async with aiofiles.open(self.config.path, "r") as fd:
-                feed_json = await fd.read()
+        path = path or self.config.path
 
+        try:
+            feed_json = await self._read_file(path)
             feed: Dict[str, Any] = json.loads(feed_json)
         except IOError as err:
             raise FeedIOError(
-                'Could not read JSON file from "{}"!'.format(self.config.path)
+                'Could not read JSON file from "{}"!'.format(path)
             ) from err
         except json.JSONDecodeError as err:
             raise FeedFormatError("Could not decode JSON file!") from err
@@ -138,18 +351,18 @@ class JSONFeedFileLoader(AbstractFeedFileLoader):
 class AtomFeedFileLoader(AbstractFeedFileLoader):
     """Load feed from Atom format (https://validator.w3.org/feed/docs/atom.html)."""
 
-    async def get_feed_items(self) -> List[FeedItem]:
-        """Returns feed items of Atom feed if feed exists."""
-
-        if not self.config.path.exists():
-            return []
+    async def _load_items(self, path: Path) -> List[FeedItem]:
+        """Returns feed items of an Atom feed file."""
 
         feed_items = []
-        root = await self._load_from_file()
+        root = await self._load_from_file(path)
 
         for entry in root.findall("entry"):
             id_str = entry.findtext("id")
-            item_id = id_str.rpartition(":")[2] if id_str is not None else None
+            try:
+                item_id = int(id_str.rpartition(":")[2]) if id_str is not None else None
+            except ValueError as err:
+                raise FeedFormatError("Could not load Atom feed entries!") from err
 
             category_node = entry.find("category")
             try:
@@ -184,19 +397,17 @@ class AtomFeedFileLoader(AbstractFeedFileLoader):
                 "updated": updated,
             }
 
-            feed_items.append(item_dict)
+            feed_items.append(self._create_trusted_item(item_dict))
 
-        try:
-            return pydantic.parse_obj_as(List[FeedItem], feed_items)
-        except pydantic.ValidationError as err:
-            raise FeedFormatError("Could not load Atom feed entries!") from err
+        return feed_items
+
+    async def _load_from_file(self, path: Optional[Path] = None) -> ElementTree.Element:
+        """Load Atom feed from file (the feed file if no path is given)."""
 
-    async def _load_from_file(self) -> ElementTree.Element:
-        """Load Atom feed from file."""
+        path = path or self.config.path
 
         try:
-            async with aiofiles.open(self.config.path, "r") as fd:
-                feed_str = await fd.read()
+            feed_str = await self._read_file(path)
 
             # removing default namespace declaration from xml because it makes
             # parsing MUCH easier
@@ -205,7 +416,7 @@ class AtomFeedFileLoader(AbstractFeedFileLoader):
             root = ElementTree.fromstring(feed_str)
         except IOError as err:
             raise FeedIOError(
-                'Could not read Atom file from "{}"!'.format(self.config.path)
+                'Could not read Atom file from "{}"!'.format(path)
             ) from err
         except ElementTree.ParseError as err:
             raise FeedFormatError("Could not parse Atom file!") from err
@@ -0,0 +1,367 @@
+import contextlib
+import math
+import time
+from abc import ABCMeta
+from abc import abstractmethod
+from pathlib import Path
+from types import TracebackType
+from typing import ContextManager
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Type
+
+import aiofiles
+import aiofiles.os
+
+METRICS_PREFIX = "hoyolabrssfeeds_"
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+# shared context manager for disabled timers, so they do not allocate anything
+_NOOP_TIMER: ContextManager[None] = contextlib.nullcontext()
+
+
+class MetricsRegistry:
+    """Registry of metrics in the Prometheus text format.
+
+    The registry is disabled by default, so the instrumentation only costs a flag
+    check until the metrics are enabled (e.g. via the CLI).
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._metrics: List[AbstractMetric] = []
+
+    def register(self, metric: "AbstractMetric") -> None:
+        """Add a metric to the registry."""
+        self._metrics.append(metric)
+
+    def clear(self) -> None:
+        """Reset the values of all metrics."""
+
+        for metric in self._metrics:
+            metric.clear()
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+    async def write_textfile(self, path: Path) -> None:
+        """Write the metrics to a file (e.g. for the node exporter)."""
+
+        # the collector must never read a partially written file
+        tmp_path = path.with_name(".{}.tmp".format(path.name))
+
+        async with aiofiles.open(tmp_path, "w") as fd:
+            await fd.write(self.render())
+
+        await aiofiles.os.replace(tmp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class AbstractMetric(metaclass=ABCMeta):
+    """ABC for metrics with optional labels."""
+
+    metric_type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        registry: MetricsRegistry = REGISTRY,
+    ) -> None:
+        self._name = METRICS_PREFIX + name
+        self._documentation = documentation
+        self._label_names = tuple(label_names)
+        self._registry = registry
+
+        registry.register(self)
+
+    @property
+    def name(self) -> str:
+        """Full name of the metric."""
+        return self._name
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Reset the values of the metric."""
+        pass
+
+    @abstractmethod
+    def _render_samples(self) -> List[str]:
+        """Render the samples of the metric."""
+        pass
+
+    def render(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+
+        return [
+            "# HELP {} {}".format(self._name, self._documentation),
+            "# TYPE {} {}".format(self._name, self.metric_type),
+        ] + self._render_samples()
+
+    def _format_labels(
+        self, label_values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None
+    ) -> str:
+        """Format the labels of a sample."""
+
+        pairs = list(zip(self._label_names, label_values))
+        if extra is not None:
+            pairs.append(extra)
+
+        if len(pairs) == 0:
+            return ""
+
+        return "{{{}}}".format(
+            ",".join('{}="{}"'.format(name, _escape(value)) for name, value in pairs)
+        )
+
+
+class Counter(AbstractMetric):
+    """Monotonically increasing value."""
+
+    metric_type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        registry: MetricsRegistry = REGISTRY,
+    ) -> None:
+        super().__init__(name, documentation, label_names, registry)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Increase the value of the labels."""
+
+        if not self._registry.enabled:
+            return
+
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, *label_values: str) -> float:
+        """Current value of the labels."""
+        return self._values.get(label_values, 0)
+
+    def clear(self) -> None:
+        """Reset the values of the metric."""
+        self._values.clear()
+
+    def _render_samples(self) -> List[str]:
+        return [
+            "{}_total{} {}".format(self._name, self._format_labels(labels), _num(value))
+            for labels, value in self._values.items()
+        ]
+
+
+class Histogram(AbstractMetric):
+    """Distribution of observed values (e.g. durations) in buckets."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        registry: MetricsRegistry = REGISTRY,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, label_names, registry)
+        self._buckets = tuple(sorted(buckets))
+        # bucket counts (not cumulative), sum and count per labels
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Observe a value for the labels."""
+
+        if not self._registry.enabled:
+            return
+
+        counts, total = self._values.setdefault(
+            label_values, ([0] * (len(self._buckets) + 1), [0.0])
+        )
+
+        for i, bound in enumerate(self._buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+
+        total[0] += value
+
+    def time(self, *label_values: str) -> ContextManager[None]:
+        """Observe the duration of a block in seconds."""
+
+        if not self._registry.enabled:
+            return _NOOP_TIMER
+
+        return _Timer(self, label_values)
+
+    def get_count(self, *label_values: str) -> int:
+        """Amount of observations of the labels."""
+
+        values = self._values.get(label_values)
+        return sum(values[0]) if values is not None else 0
+
+    def clear(self) -> None:
+        """Reset the values of the metric."""
+        self._values.clear()
+
+    def _render_samples(self) -> List[str]:
+        samples = []
+
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            bounds = [_num(b) for b in self._buckets] + ["+Inf"]
+
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                samples.append(
+                    "{}_bucket{} {}".format(
+                        self._name,
+                        self._format_labels(labels, ("le", bound)),
+                        cumulative,
+                    )
+                )
+
+            samples.append(
+                "{}_sum{} {}".format(
+                    self._name, self._format_labels(labels), _num(total[0])
+                )
+            )
+            samples.append(
+                "{}_count{} {}".format(
+                    self._name, self._format_labels(labels), cumulative
+                )
+            )
+
+        return samples
+
+
+class _Timer:
+    """Context manager which observes the duration of a block."""
+
+    __slots__ = ("_histogram", "_label_values", "_start")
+
+    def __init__(self, histogram: Histogram, label_values: Tuple[str, ...]) -> None:
+        self._histogram = histogram
+        self._label_values = label_values
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self._histogram.observe(time.perf_counter() - self._start, *self._label_values)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(value: float) -> str:
+    """Format a sample value."""
+
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# --- PIPELINE METRICS ---
+
+HOYOLAB_REQUESTS = Counter(
+    "hoyolab_requests",
+    "Requests to the Hoyolab API per endpoint and status.",
+    ("endpoint", "status"),
+)
+HOYOLAB_API_ERRORS = Counter(
+    "hoyolab_api_errors",
+    "Responses of the Hoyolab API with an error retcode.",
+    ("endpoint", "retcode"),
+)
+HOYOLAB_DOWNLOADED_BYTES = Counter(
+    "hoyolab_downloaded_bytes",
+    "Bytes downloaded from the Hoyolab API.",
+    ("endpoint",),
+)
+HOYOLAB_REQUEST_SECONDS = Histogram(
+    "hoyolab_request_seconds",
+    "Duration of the requests to the Hoyolab API.",
+    ("endpoint",),
+)
+HOYOLAB_PARSE_SECONDS = Histogram(
+    "hoyolab_parse_seconds",
+    "Duration of the JSON parsing of the Hoyolab API responses.",
+    ("endpoint",),
+)
+HOYOLAB_TRANSFORM_SECONDS = Histogram(
+    "hoyolab_transform_seconds",
+    "Duration of the transformation of a post.",
+)
+FEED_ITEMS = Counter(
+    "feed_items",
+    "New, updated, unchanged, skipped and failed items per feed and category.",
+    ("game", "language", "category", "state"),
+)
+FEED_LOAD_SECONDS = Histogram(
+    "feed_load_seconds",
+    "Duration of loading and parsing a feed file.",
+    ("feed_type",),
+)
+FEED_ENCODE_SECONDS = Histogram(
+    "feed_encode_seconds",
+    "Duration of encoding a feed.",
+    ("feed_type",),
+)
+FEED_WRITE_SECONDS = Histogram(
+    "feed_write_seconds",
+    "Duration of writing a feed file.",
+    ("feed_type",),
+)
+FEED_WRITTEN_BYTES = Counter(
+    "feed_written_bytes",
+    "Bytes of the written feed files.",
+    ("feed_type",),
+)
+FEED_UPDATE_SECONDS = Histogram(
+    "feed_update_seconds",
+    "End-to-end duration of a feed update.",
+    ("game", "language"),
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 60, 120),
+)
@@ -1,17 +1,24 @@
+import hashlib
 from datetime import datetime
 from enum import Enum
 from enum import IntEnum, unique
 from pathlib import Path
+from typing import Any
+from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Type
 from typing import TypeVar
 
+from pydantic import AnyHttpUrl
 from pydantic import BaseModel
 from pydantic import HttpUrl
+from pydantic import PositiveFloat
+from pydantic import PositiveInt
 
 _IC = TypeVar("_IC", bound="FeedItemCategory")
 _G = TypeVar("_G", bound="Game")
+_FI = TypeVar("_FI", bound="FeedItem")
 
 
 # --- ENUMS ---
@@ -81,6 +88,81 @@ class Language(str, Enum):
         return self.value
 
 
+@unique
+class FeedItemChangeType(str, Enum):
+    ADDED = "added"
+    UPDATED = "updated"
+    REMOVED = "removed"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return self.value
+
+
+# --- LIGHTWEIGHT MODELS ---
+
+
+class FeedItemMeta:
+    """Meta info of a post from the news list.
+
+    This is created many times per run from already checked API values, so it is a
+    plain slotted class instead of a (validating) pydantic model.
+    """
+
+    __slots__ = ("id", "last_modified", "published")
+
+    def __init__(
+        self, id: int, last_modified: datetime, published: Optional[datetime] = None
+    ) -> None:
+        self.id = id
+        self.last_modified = last_modified
+        self.published = published
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FeedItemMeta):
+            return NotImplemented
+
+        return self.id == other.id and self.last_modified == other.last_modified
+
+    def __repr__(self) -> str:
+        return "FeedItemMeta(id={!r}, last_modified={!r})".format(
+            self.id, self.last_modified
+        )
+
+
+class FeedItemChange:
+    """Change of a feed item in a single feed update."""
+
+    __slots__ = ("category", "change_type", "id", "revision")
+
+    def __init__(
+        self,
+        change_type: FeedItemChangeType,
+        id: int,
+        category: FeedItemCategory,
+        revision: datetime,
+    ) -> None:
+        self.change_type = change_type
+        self.id = id
+        self.category = category
+        self.revision = revision
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FeedItemChange):
+            return NotImplemented
+
+        return (
+            self.change_type == other.change_type
+            and self.id == other.id
+            and self.category == other.category
+            and self.revision == other.revision
+        )
+
+    def __repr__(self) -> str:
+        return "FeedItemChange(change_type={!r}, id={!r}, category={!r}, revision={!r})".format(
+            self.change_type, self.id, self.category, self.revision
+        )
+
+
 # --- PYDANTIC MODELS ---
 
 
@@ -99,6 +181,7 @@ class FeedMeta(MyBaseModel):
     language: Language = Language.ENGLISH
     title: Optional[str] = None
     icon: Optional[HttpUrl] = None
+    id: Optional[str] = None
 
 
 class FeedItem(MyBaseModel):
@@ -112,10 +195,32 @@ class FeedItem(MyBaseModel):
     image: Optional[HttpUrl] = None
     summary: Optional[str] = None
 
+    @classmethod
+    def from_trusted(cls: Type[_FI], values: Dict[str, Any]) -> _FI:
+        """Create an item from already typed values without validation."""
 
-class FeedItemMeta(MyBaseModel):
-    id: int
-    last_modified: datetime
+        return cls.construct(**{k: v for k, v in values.items() if v is not None})
+
+    def get_fingerprint(self) -> str:
+        """Hash of the rendered parts of the item (ignoring whitespace changes).
+
+        Hoyolab bumps the modification time for trivial edits, so the fingerprint
+        tells if an updated post actually changed in the feed.
+        """
+
+        parts = [self.title, self.content, self.summary or "", str(self.image or "")]
+        normalized = "\x1f".join(" ".join(part.split()) for part in parts)
+
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class OffloadedFeedItem(FeedItem):
+    """Feed item whose content was moved to a blob store (i.e. the content is empty).
+
+    The content has to be loaded from the store before the item is encoded.
+    """
+
+    content_key: str
 
 
 class FeedFileConfig(MyBaseModel):
@@ -125,9 +230,43 @@ class FeedFileConfig(MyBaseModel):
 
 class FeedFileWriterConfig(FeedFileConfig):
     url: Optional[HttpUrl] = None
+    compress: bool = False
+    compact: bool = False
+    page_size: Optional[PositiveInt] = None
+    hubs: List[AnyHttpUrl] = []
+
+
+class FeedDeltaConfig(MyBaseModel):
+    path: Path
+    keep: PositiveInt = 50
+
+
+class EventHookConfig(MyBaseModel):
+    webhook: Optional[AnyHttpUrl] = None
+    command: Optional[List[str]] = None
+    socket: Optional[Path] = None
+    queue_size: PositiveInt = 1000
+    batch_size: PositiveInt = 100
+    timeout: PositiveFloat = 10
 
 
 class FeedConfig(MyBaseModel):
     feed_meta: FeedMeta
     writer_configs: List[FeedFileWriterConfig]
     loader_config: Optional[FeedFileConfig] = None
+    delta_config: Optional[FeedDeltaConfig] = None
+
+
+class FeedViewMeta(MyBaseModel):
+    title: str
+    games: List[Game] = []
+    languages: List[Language] = []
+    categories: List[FeedItemCategory] = []
+    max_items: Optional[int] = None
+    max_age: Optional[int] = None
+    icon: Optional[HttpUrl] = None
+
+
+class FeedViewConfig(MyBaseModel):
+    view_meta: FeedViewMeta
+    writer_configs: List[FeedFileWriterConfig]
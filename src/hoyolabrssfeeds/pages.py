@@ -0,0 +1,141 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+
+import aiofiles
+import aiofiles.ospath
+
+from .errors import FeedFormatError
+from .errors import FeedIOError
+
+
+class FeedPageIndex:
+    """Index of the immutable archive pages of a paged feed.
+
+    The pages are numbered from the oldest (1) to the newest archive page. The head
+    page is the feed file itself and contains all items which are not archived yet
+    (or which were updated after they were archived).
+    """
+
+    def __init__(self, feed_path: Path) -> None:
+        self._feed_path = feed_path
+        self._pages: List[List[int]] = []
+        self._archived_ids: Set[int] = set()
+        self._revisions: Dict[int, datetime] = {}
+
+    @property
+    def path(self) -> Path:
+        """Path of the index file next to the feed file."""
+        return self.get_index_path(self._feed_path)
+
+    @property
+    def pages(self) -> List[List[int]]:
+        """Item ids of all archive pages (oldest page first)."""
+        return self._pages
+
+    @property
+    def archived_ids(self) -> Set[int]:
+        """Item ids of all archive pages."""
+        return self._archived_ids
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def get_archive_path(self, number: int) -> Path:
+        """Path of an archive page."""
+
+        return self._feed_path.with_name(
+            "{}.page-{}{}".format(self._feed_path.stem, number, self._feed_path.suffix)
+        )
+
+    def add_page(
+        self, item_ids: List[int], revisions: Optional[Dict[int, datetime]] = None
+    ) -> int:
+        """Add a new archive page (with item revisions) and return its number."""
+
+        self._pages.append(list(item_ids))
+        self._archived_ids.update(item_ids)
+        self._revisions.update(revisions or {})
+
+        return len(self._pages)
+
+    def get_revision(self, item_id: int) -> Optional[datetime]:
+        """Archived revision of an item (None if unknown, e.g. of older indexes)."""
+        return self._revisions.get(item_id)
+
+    def is_archived(self, item_id: int, revision: datetime) -> bool:
+        """Check if an item is archived in the given (or a newer) revision.
+
+        Items of older indexes without revisions are always up to date.
+        """
+
+        if item_id not in self._archived_ids:
+            return False
+
+        archived_revision = self._revisions.get(item_id)
+
+        return archived_revision is None or revision <= archived_revision
+
+    async def exists(self) -> bool:
+        """Check if the index file exists."""
+        return bool(await aiofiles.ospath.exists(self.path))
+
+    async def load(self) -> None:
+        """Load the index from file (if it exists)."""
+
+        if not await self.exists():
+            return
+
+        try:
+            async with aiofiles.open(self.path, "r") as fd:
+                index: Dict[str, Any] = json.loads(await fd.read())
+
+            pages = [[int(item_id) for item_id in page] for page in index["pages"]]
+            revisions = {
+                int(item_id): datetime.fromisoformat(revision)
+                for item_id, revision in index.get("revisions", {}).items()
+            }
+        except IOError as err:
+            raise FeedIOError(
+                'Could not read page index from "{}"!'.format(self.path)
+            ) from err
+        except (KeyError, TypeError, ValueError) as err:
+            raise FeedFormatError("Could not load page index!") from err
+
+        self._pages = []
+        self._archived_ids = set()
+        self._revisions = revisions
+
+        for page in pages:
+            self.add_page(page)
+
+    async def save(self) -> None:
+        """Save the index to file."""
+
+        try:
+            async with aiofiles.open(self.path, "w") as fd:
+                await fd.write(
+                    json.dumps(
+                        {
+                            "pages": self._pages,
+                            "revisions": {
+                                str(item_id): revision.isoformat()
+                                for item_id, revision in self._revisions.items()
+                            },
+                        }
+                    )
+                )
+        except IOError as err:
+            raise FeedIOError(
+                'Could not write page index to "{}"!'.format(self.path)
+            ) from err
+
+    @staticmethod
+    def get_index_path(feed_path: Path) -> Path:
+        """Path of the index file of a feed file."""
+        return feed_path.with_name(".{}.pages.json".format(feed_path.name))
@@ -0,0 +1,224 @@
+import cProfile
+import io
+import logging
+import pstats
+import tracemalloc
+from pathlib import Path
+from types import CodeType
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from .configs import FeedConfigLoader
+from .hoyolab import HoyolabNews
+from .loaders import AbstractFeedFileLoader
+from .loaders import FallbackFeedFileLoader
+from .writers import AbstractFeedFileWriter
+
+logger = logging.getLogger(__name__)
+
+# (filename, line number, function name) as used by pstats
+_FunctionKey = Tuple[str, int, str]
+
+# entry points of the phases of a run (time of nested calls is included)
+PHASE_FUNCTIONS: Dict[str, List[Callable[..., Any]]] = {
+    "config load": [
+        FeedConfigLoader.load_config,
+        FeedConfigLoader.get_all_feed_configs,
+        FeedConfigLoader.get_all_view_configs,
+        FeedConfigLoader.get_all_hook_configs,
+    ],
+    "feed load": [
+        AbstractFeedFileLoader.get_feed_items,
+        FallbackFeedFileLoader.get_feed_items,
+    ],
+    "fetch": [HoyolabNews._request],
+    "transform": [HoyolabNews._transform_post],
+    "write": [AbstractFeedFileWriter.write_feed],
+}
+
+# limits of the call graph walk for the collapsed stacks
+MAX_STACK_DEPTH = 64
+MIN_STACK_SECONDS = 1e-6
+
+
+def _get_function_key(code: CodeType) -> _FunctionKey:
+    """Key of a code object in the profiler stats."""
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+class Profiler:
+    """CPU (and optionally memory) profiler of a whole run.
+
+    Coroutines are suspended while they wait for I/O, so the profiled times of the
+    phases are the times the event loop actually spent working on them.
+    """
+
+    def __init__(self, memory: bool = False, memory_frames: int = 1) -> None:
+        self._memory = memory
+        self._memory_frames = memory_frames
+        self._profile = cProfile.Profile()
+        self._stats: Optional[pstats.Stats] = None
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._end_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak_memory = 0
+
+    @property
+    def stats(self) -> pstats.Stats:
+        """Stats of the profiled run (after stop() was called)."""
+
+        if self._stats is None:
+            raise RuntimeError("Profiler was not stopped!")
+
+        return self._stats
+
+    def start(self) -> None:
+        """Start profiling."""
+
+        if self._memory:
+            tracemalloc.start(self._memory_frames)
+            self._start_snapshot = tracemalloc.take_snapshot()
+
+        self._profile.enable()
+
+    def stop(self) -> None:
+        """Stop profiling and collect the stats."""
+
+        self._profile.disable()
+
+        if self._memory:
+            self._end_snapshot = tracemalloc.take_snapshot()
+            self._peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        self._stats = pstats.Stats(self._profile)
+
+    def get_phase_times(self) -> Dict[str, float]:
+        """Profiled seconds per phase of the run."""
+
+        raw_stats: Dict[_FunctionKey, Any] = self.stats.stats  # type: ignore
+
+        phase_times = {}
+        for phase, functions in PHASE_FUNCTIONS.items():
+            keys = {_get_function_key(f.__code__) for f in functions}
+            phase_times[phase] = sum(
+                raw_stats[key][3] for key in keys if key in raw_stats
+            )
+
+        return phase_times
+
+    def get_collapsed_stacks(self) -> Dict[str, float]:
+        """Own seconds per call stack (approximated from the call graph)."""
+
+        raw_stats: Dict[_FunctionKey, Any] = self.stats.stats  # type: ignore
+
+        callees: Dict[_FunctionKey, Dict[_FunctionKey, float]] = {}
+        roots = []
+
+        for func, (_, _, _, _, callers) in raw_stats.items():
+            known_callers = [c for c in callers if c in raw_stats]
+
+            if len(known_callers) == 0:
+                roots.append(func)
+
+            for caller in known_callers:
+                callees.setdefault(caller, {})[func] = callers[caller][3]
+
+        stacks: Dict[str, float] = {}
+
+        def walk(
+            func: _FunctionKey, stack: List[str], on_stack: Set[_FunctionKey], w: float
+        ) -> None:
+            own_time = raw_stats[func][2] * w
+            stack = stack + [self._format_function(func)]
+
+            if own_time >= MIN_STACK_SECONDS:
+                name = ";".join(stack)
+                stacks[name] = stacks.get(name, 0) + own_time
+
+            if len(stack) >= MAX_STACK_DEPTH:
+                return
+
+            for callee, edge_time in callees.get(func, {}).items():
+                callee_time = raw_stats[callee][3]
+
+                # recursion is folded into the first occurrence
+                if callee in on_stack or callee_time <= 0:
+                    continue
+
+                weight = w * edge_time / callee_time
+                if callee_time * weight >= MIN_STACK_SECONDS:
+                    walk(callee, stack, on_stack | {callee}, weight)
+
+        for root in roots:
+            walk(root, [], {root}, 1.0)
+
+        return stacks
+
+    def format_report(self, limit: int = 30) -> str:
+        """Format the phases, the top functions and the memory usage."""
+
+        lines = ["Phases (profiled seconds):"]
+        for phase, seconds in self.get_phase_times().items():
+            lines.append("  {:<12} {:>10.4f}".format(phase, seconds))
+
+        lines.append("  {:<12} {:>10.4f}".format("total", self.stats.total_tt))  # type: ignore
+        lines.append("")
+
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(limit)
+        lines.append(stream.getvalue().strip())
+
+        if self._start_snapshot is not None and self._end_snapshot is not None:
+            lines.append("")
+            lines.append("Peak traced memory: {} KiB".format(self._peak_memory // 1024))
+            lines.append("Top allocations since start:")
+
+            top_stats = self._end_snapshot.filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            ).compare_to(self._start_snapshot, "lineno")
+
+            for stat in top_stats[:limit]:
+                lines.append("  {}".format(stat))
+
+        return "\n".join(lines) + "\n"
+
+    def write_results(self, prefix: Path) -> List[Path]:
+        """Write the stats, collapsed stacks and report with a common prefix."""
+
+        stats_path = prefix.with_name(prefix.name + ".pstats")
+        stacks_path = prefix.with_name(prefix.name + ".collapsed")
+        report_path = prefix.with_name(prefix.name + ".txt")
+
+        self.stats.dump_stats(stats_path)
+
+        # integer microseconds as expected by flamegraph tools
+        with open(stacks_path, "w") as fd:
+            for stack, seconds in sorted(self.get_collapsed_stacks().items()):
+                if round(seconds * 1e6) > 0:
+                    fd.write("{} {}\n".format(stack, round(seconds * 1e6)))
+
+        with open(report_path, "w") as fd:
+            fd.write(self.format_report())
+
+        logger.info("Profile written to %s.*", prefix)
+
+        return [stats_path, stacks_path, report_path]
+
+    @staticmethod
+    def _format_function(func: _FunctionKey) -> str:
+        """Name of a function in the collapsed stacks."""
+
+        filename, line, name = func
+
+        # built-in functions have no file
+        if filename == "~":
+            return name.replace(";", ",")
+
+        return "{} ({}:{})".format(name, Path(filename).name, line).replace(";", ",")
@@ -0,0 +1,347 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from datetime import timezone
+from email.utils import format_datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from urllib.parse import urlparse
+
+import aiofiles
+import aiofiles.os
+import aiofiles.ospath
+from aiohttp import web
+
+from .compressors import GZIP
+from .compressors import ZSTD
+from .compressors import compress_all
+from .errors import FeedFormatError
+from .errors import FeedIOError
+from .metrics import METRICS_MEDIA_TYPE
+from .metrics import MetricsRegistry
+from .pages import FeedPageIndex
+from .writers import AbstractFeedFileWriter
+
+logger = logging.getLogger(__name__)
+
+# preferred order if a client accepts multiple encodings
+ENCODING_PREFERENCE = (ZSTD, GZIP)
+
+
+class FeedBody:
+    """Immutable in-memory representation of a served feed."""
+
+    __slots__ = ("data", "encoded", "etag", "last_modified", "media_type")
+
+    def __init__(
+        self,
+        data: bytes,
+        media_type: str,
+        encoded: Dict[str, bytes],
+        last_modified: Optional[datetime] = None,
+    ) -> None:
+        self.data = data
+        self.media_type = media_type
+        self.encoded = encoded
+        self.etag = '"{}"'.format(hashlib.sha256(data).hexdigest()[:32])
+
+        # http dates have a resolution of seconds
+        self.last_modified = (last_modified or datetime.now(timezone.utc)).replace(
+            microsecond=0
+        )
+
+    def get_etag(self, encoding: Optional[str] = None) -> str:
+        """Strong ETag of a specific representation."""
+
+        if encoding is None:
+            return self.etag
+
+        return '{}-{}"'.format(self.etag[:-1], encoding)
+
+
+class FeedServer:
+    """HTTP server for the feeds of the writers (and their archive pages) in memory."""
+
+    def __init__(
+        self,
+        writers: Iterable[AbstractFeedFileWriter],
+        host: str = "localhost",
+        port: int = 8080,
+        metrics_registry: Optional[MetricsRegistry] = None,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._metrics_registry = metrics_registry
+        self._writers: Dict[str, AbstractFeedFileWriter] = {}
+        self._bodies: Dict[str, FeedBody] = {}
+        self._published: Dict[str, bytes] = {}
+        # routes of the archive pages and the routes of their feeds
+        self._page_routes: Dict[str, str] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+        self.set_writers(writers)
+
+    @property
+    def routes(self) -> List[str]:
+        """Routes of all served feeds."""
+        return list(self._writers.keys())
+
+    @staticmethod
+    def get_route(writer: AbstractFeedFileWriter, page: Optional[int] = None) -> str:
+        """Route of a feed or archive page (URL path if configured, else file name)."""
+
+        if writer.config.url is not None:
+            url_path = urlparse(writer.get_page_url(page)).path
+
+            if url_path not in ("", "/"):
+                return url_path
+
+        path = (
+            writer.config.path
+            if page is None
+            else FeedPageIndex(writer.config.path).get_archive_path(page)
+        )
+
+        return "/" + path.name
+
+    def set_writers(self, writers: Iterable[AbstractFeedFileWriter]) -> None:
+        """Replace the served writers (e.g. after a config reload).
+
+        Routes of removed writers are no longer served. New routes get a body with
+        the next refresh() or load_files() call.
+        """
+
+        self._writers = {}
+
+        for writer in writers:
+            route = self.get_route(writer)
+
+            if route in self._writers:
+                logger.warning('Multiple feeds for route "%s" found!', route)
+
+            self._writers[route] = writer
+
+        self._page_routes = {
+            p: r for p, r in self._page_routes.items() if r in self._writers
+        }
+        self._bodies = {
+            r: b
+            for r, b in self._bodies.items()
+            if r in self._writers or r in self._page_routes
+        }
+        self._published = {
+            r: p for r, p in self._published.items() if r in self._writers
+        }
+
+    async def refresh(self) -> None:
+        """Swap the bodies of all writers that have written a new feed."""
+
+        for route, writer in self._writers.items():
+            feed_bytes = writer.feed_bytes
+
+            if feed_bytes is not None and feed_bytes is not self._published.get(route):
+                await self.update(route, feed_bytes, writer.media_type)
+                self._published[route] = feed_bytes
+
+            # archive pages are never rewritten, so they are only added once
+            for number, page_bytes in writer.archive_bytes.items():
+                page_route = self.get_route(writer, number)
+
+                if page_route not in self._bodies:
+                    await self.update(page_route, page_bytes, writer.media_type)
+                    self._page_routes[page_route] = route
+
+    async def update(
+        self,
+        route: str,
+        data: bytes,
+        media_type: str,
+        last_modified: Optional[datetime] = None,
+    ) -> None:
+        """Replace the body of a route."""
+
+        current = self._bodies.get(route)
+
+        if current is not None and current.data == data:
+            return
+
+        # the compression (e.g. zstd level 19) must not block the served requests
+        loop = asyncio.get_running_loop()
+        encoded = await loop.run_in_executor(None, compress_all, data)
+
+        # replacing the whole object is atomic for concurrent requests
+        self._bodies[route] = FeedBody(data, media_type, encoded, last_modified)
+
+    async def load_files(self) -> None:
+        """Load the existing feed files (and archive pages) for routes without body."""
+
+        for route, writer in self._writers.items():
+            if route not in self._bodies:
+                await self._load_file(route, writer.config.path, writer.media_type)
+
+            page_index = FeedPageIndex(writer.config.path)
+
+            try:
+                await page_index.load()
+            except (FeedIOError, FeedFormatError):
+                logger.warning(
+                    'Could not load archive pages of "%s" for server!',
+                    writer.config.path,
+                )
+                continue
+
+            for number in range(1, len(page_index) + 1):
+                page_route = self.get_route(writer, number)
+                self._page_routes[page_route] = route
+
+                if page_route not in self._bodies:
+                    await self._load_file(
+                        page_route,
+                        page_index.get_archive_path(number),
+                        writer.media_type,
+                    )
+
+    async def _load_file(self, route: str, path: Path, media_type: str) -> None:
+        """Load an existing file as body of a route."""
+
+        if not await aiofiles.ospath.exists(path):
+            return
+
+        try:
+            async with aiofiles.open(path, "rb") as fd:
+                data = await fd.read()
+
+            stat = await aiofiles.os.stat(path)
+        except IOError:
+            logger.warning('Could not load feed file "%s" for server!', path)
+            return
+
+        modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        await self.update(route, data, media_type, modified)
+
+    def create_app(self) -> web.Application:
+        """Create the web application of the server."""
+
+        app = web.Application()
+
+        if self._metrics_registry is not None:
+            app.router.add_get("/metrics", self._handle_metrics)
+
+        app.router.add_get("/{path:.*}", self._handle_feed)
+
+        return app
+
+    async def start(self) -> None:
+        """Start serving the feeds."""
+
+        await self.load_files()
+
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+
+        logger.info("Serving feeds on http://%s:%d/", self._host, self._port)
+
+    async def stop(self) -> None:
+        """Stop serving the feeds."""
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_feed(self, request: web.Request) -> web.StreamResponse:
+        """Serve a feed with conditional and precompressed responses."""
+
+        body = self._bodies.get(request.path)
+
+        if body is None:
+            raise web.HTTPNotFound()
+
+        encoding = self._select_encoding(
+            request.headers.get("Accept-Encoding", ""), set(body.encoded.keys())
+        )
+
+        headers = {
+            "ETag": body.get_etag(encoding),
+            "Last-Modified": format_datetime(body.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+
+        if self._is_not_modified(request, body):
+            return web.Response(status=304, headers=headers)
+
+        if encoding is None:
+            data = body.data
+        else:
+            data = body.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+
+        return web.Response(body=data, headers=headers, content_type=body.media_type)
+
+    async def _handle_metrics(self, request: web.Request) -> web.StreamResponse:
+        """Serve the metrics in the Prometheus text format."""
+
+        if self._metrics_registry is None:
+            raise web.HTTPNotFound()
+
+        return web.Response(
+            text=self._metrics_registry.render(),
+            headers={"Content-Type": METRICS_MEDIA_TYPE},
+        )
+
+    @staticmethod
+    def _is_not_modified(request: web.Request, body: FeedBody) -> bool:
+        """Evaluate the conditional request headers."""
+
+        if_none_match = request.headers.get("If-None-Match")
+
+        if if_none_match is not None:
+            etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            variants = {body.get_etag(e) for e in body.encoded} | {body.etag}
+
+            return "*" in etags or len(etags & variants) > 0
+
+        if_modified_since = request.headers.get("If-Modified-Since")
+
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+
+            return body.last_modified <= since
+
+        return False
+
+    @staticmethod
+    def _select_encoding(accept_encoding: str, available: Set[str]) -> Optional[str]:
+        """Select the preferred content encoding accepted by the client."""
+
+        accepted = set()
+
+        for part in accept_encoding.split(","):
+            name, _, params = part.strip().partition(";")
+            params = params.replace(" ", "")
+
+            if params in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+
+            accepted.add(name.strip().lower())
+
+        for encoding in ENCODING_PREFERENCE:
+            if encoding in available and (encoding in accepted or "*" in accepted):
+                return encoding
+
+        return None
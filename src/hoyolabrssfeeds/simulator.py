@@ -0,0 +1,512 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from aiohttp import web
+
+from .models import FeedItemCategory
+from .models import Game
+
+logger = logging.getLogger(__name__)
+
+API_PATH = "/community/post/wapi/"
+
+# first post of the simulated timeline (2023-11-14) and hours between posts
+BASE_TIMESTAMP = 1700000000
+POST_INTERVAL = 3600
+
+SERVER_ERROR_CODES = (500, 502, 503, 504)
+RATE_LIMIT_RETCODE = -110
+SIMULATED_RETCODE = -502002
+
+WORDS = (
+    "adventure",
+    "artifact",
+    "banner",
+    "battle",
+    "character",
+    "compensation",
+    "domain",
+    "event",
+    "exploration",
+    "festival",
+    "limited",
+    "maintenance",
+    "notice",
+    "quest",
+    "reward",
+    "server",
+    "story",
+    "traveler",
+    "update",
+    "version",
+    "weapon",
+    "wish",
+)
+AUTHORS = ("Paimon", "Pom-Pom", "Eous", "Teyvat Times", "Official")
+IMAGE_URL = "https://upload-os-bbs.hoyolab.com/upload/2023/11/{}.png"
+PRIVATE_IMAGE_URL = "https://hoyolab-upload-private.hoyolab.com/upload/2023/11/{}.jpg"
+VIDEO_URL = "https://upload-os-bbs.hoyolab.com/upload/2023/11/{}.mp4"
+YOUTUBE_URL = "https://www.youtube.com/embed/{}"
+
+
+class HoyolabSimulator:
+    """Local stand-in for the Hoyolab API with synthetic posts and injected faults.
+
+    The posts of a game are generated deterministically from the seed when they are
+    requested for the first time. Latency, server errors, rate limits and error
+    retcodes are injected independently of the generated content.
+    """
+
+    def __init__(
+        self,
+        posts_per_category: int = 20,
+        paragraphs: int = 5,
+        latency: float = 0,
+        latency_sigma: float = 0,
+        error_rate: float = 0,
+        error_burst: int = 1,
+        retcode_rate: float = 0,
+        rate_limit: Optional[int] = None,
+        seed: int = 0,
+        host: str = "localhost",
+        port: int = 8081,
+    ) -> None:
+        self._posts_per_category = posts_per_category
+        self._paragraphs = paragraphs
+        self._latency = latency
+        self._latency_sigma = latency_sigma
+        self._error_rate = error_rate
+        self._error_burst = error_burst
+        self._retcode_rate = retcode_rate
+        self._rate_limit = rate_limit
+        self._seed = seed
+        self._host = host
+        self._port = port
+        self._fault_random = random.Random(seed)
+        self._burst_left = 0
+        self._request_times: Deque[float] = deque()
+        self._posts: Dict[Game, Dict[int, Dict[str, Any]]] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.requests: Dict[str, int] = {"getNewsList": 0, "getPostFull": 0}
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the simulated API (e.g. for HOYOLAB_API_BASE_URL)."""
+        return "http://{}:{}{}".format(self._host, self._port, API_PATH)
+
+    def get_posts(self, game: Game) -> Dict[int, Dict[str, Any]]:
+        """Full posts of a game by id (generated on first access)."""
+
+        if game not in self._posts:
+            rng = random.Random("{}-{}".format(self._seed, game.value))
+            self._posts[game] = {}
+
+            for _ in range(self._posts_per_category * len(FeedItemCategory)):
+                categories = list(FeedItemCategory)
+                category = categories[len(self._posts[game]) % len(categories)]
+                self._add_post(game, category, rng)
+
+        return self._posts[game]
+
+    def add_post(self, game: Game, category: FeedItemCategory) -> int:
+        """Publish a new post and return its id."""
+
+        rng = random.Random(
+            "{}-{}-{}".format(self._seed, game.value, len(self.get_posts(game)))
+        )
+
+        return self._add_post(game, category, rng)
+
+    def update_post(self, game: Game, post_id: int, timestamp: int) -> None:
+        """Modify an existing post."""
+
+        post = self.get_posts(game)[post_id]
+        post["last_modify_time"] = timestamp
+        post["post"]["subject"] += " (Updated)"
+
+    def create_app(self) -> web.Application:
+        """Create the web application of the simulator."""
+
+        app = web.Application()
+        app.router.add_get(API_PATH + "getNewsList", self._handle_news_list)
+        app.router.add_get(API_PATH + "getPostFull", self._handle_post_full)
+
+        return app
+
+    async def start(self) -> None:
+        """Start serving the simulated API."""
+
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+
+        logger.info("Simulating Hoyolab API on %s", self.base_url)
+
+    async def stop(self) -> None:
+        """Stop serving the simulated API."""
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_news_list(self, request: web.Request) -> web.StreamResponse:
+        """Serve a page of the latest posts of a category."""
+
+        fault = await self._inject_faults("getNewsList")
+        if fault is not None:
+            return fault
+
+        try:
+            game = Game(int(request.query["gids"]))
+            category = FeedItemCategory(int(request.query["type"]))
+            page_size = int(request.query.get("page_size", 20))
+            offset = int(request.query.get("last_id") or 0)
+        except (KeyError, ValueError):
+            return self._create_response(None, -1, "Invalid parameters")
+
+        posts = [
+            post
+            for post_id, post in sorted(self.get_posts(game).items(), reverse=True)
+            if post["post"]["official_type"] == category.value
+        ]
+        page = posts[offset : offset + page_size]
+
+        return self._create_response(
+            {
+                "list": [
+                    {
+                        "post": {
+                            key: post["post"][key]
+                            for key in (
+                                "post_id",
+                                "subject",
+                                "created_at",
+                                "official_type",
+                                "game_id",
+                            )
+                        },
+                        "last_modify_time": post["last_modify_time"],
+                    }
+                    for post in page
+                ],
+                "last_id": str(offset + len(page)),
+                "is_last": offset + len(page) >= len(posts),
+            }
+        )
+
+    async def _handle_post_full(self, request: web.Request) -> web.StreamResponse:
+        """Serve a single post with its full content."""
+
+        fault = await self._inject_faults("getPostFull")
+        if fault is not None:
+            return fault
+
+        try:
+            game = Game(int(request.query["gids"]))
+            post = self.get_posts(game)[int(request.query["post_id"])]
+        except (KeyError, ValueError):
+            return self._create_response(None, 1001, "Post not found")
+
+        # structured posts only have the language code as content
+        if post["post"]["content"] == "":
+            language = request.headers.get("X-Rpc-Language", "en-us")
+            post = {**post, "post": {**post["post"], "content": language}}
+
+        return self._create_response({"post": post})
+
+    async def _inject_faults(self, endpoint: str) -> Optional[web.Response]:
+        """Delay the request and return an error response if one is due."""
+
+        self.requests[endpoint] += 1
+
+        if self._latency > 0:
+            await asyncio.sleep(
+                self._latency
+                * self._fault_random.lognormvariate(0, self._latency_sigma)
+            )
+
+        if self._rate_limit is not None:
+            now = time.monotonic()
+            while len(self._request_times) > 0 and self._request_times[0] <= now - 1:
+                self._request_times.popleft()
+
+            if len(self._request_times) >= self._rate_limit:
+                return self._create_response(
+                    None, RATE_LIMIT_RETCODE, "Visits too frequently", status=429
+                )
+
+            self._request_times.append(now)
+
+        if self._burst_left == 0 and self._fault_random.random() < self._error_rate:
+            self._burst_left = self._error_burst
+
+        if self._burst_left > 0:
+            self._burst_left -= 1
+            return web.Response(
+                status=self._fault_random.choice(SERVER_ERROR_CODES),
+                text="Simulated server error",
+            )
+
+        if self._fault_random.random() < self._retcode_rate:
+            return self._create_response(None, SIMULATED_RETCODE, "Simulated error")
+
+        return None
+
+    @staticmethod
+    def _create_response(
+        data: Optional[Dict[str, Any]],
+        retcode: int = 0,
+        message: str = "OK",
+        status: int = 200,
+    ) -> web.Response:
+        """Create a response in the envelope of the Hoyolab API."""
+
+        return web.json_response(
+            {"retcode": retcode, "message": message, "data": data}, status=status
+        )
+
+    def _add_post(
+        self, game: Game, category: FeedItemCategory, rng: random.Random
+    ) -> int:
+        """Generate a post with a random kind of content."""
+
+        posts = self._posts.setdefault(game, {})
+        number = len(posts) + 1
+        post_id = game.value * 10000000 + number
+        created = BASE_TIMESTAMP + number * POST_INTERVAL
+        kind = rng.choices(
+            ["article", "structured", "gallery", "video"], weights=[6, 2, 1, 1]
+        )[0]
+
+        post: Dict[str, Any] = {
+            "post": {
+                "post_id": str(post_id),
+                "subject": self._create_sentence(rng, 3, 8).rstrip(".").title(),
+                "content": "",
+                "structured_content": "",
+                "desc": self._create_sentence(rng, 8, 20),
+                "official_type": category.value,
+                "created_at": created,
+                "view_type": 1,
+                "game_id": game.value,
+            },
+            "user": {"nickname": rng.choice(AUTHORS)},
+            "last_modify_time": (
+                created + rng.randint(60, POST_INTERVAL) if rng.random() < 0.3 else 0
+            ),
+            "cover_list": (
+                [{"url": IMAGE_URL.format(rng.getrandbits(64))}]
+                if rng.random() < 0.8
+                else []
+            ),
+            "video": None,
+        }
+
+        if kind == "article":
+            post["post"]["content"] = self._create_article(rng)
+            post["post"]["structured_content"] = self._create_structured_content(rng)
+        elif kind == "structured":
+            post["post"]["structured_content"] = self._create_structured_content(rng)
+        elif kind == "gallery":
+            post["post"]["view_type"] = 2
+            post["post"]["content"] = json.dumps(
+                {
+                    "describe": post["post"]["desc"],
+                    "imgs": [
+                        IMAGE_URL.format(rng.getrandbits(64))
+                        for _ in range(rng.randint(1, 6))
+                    ],
+                }
+            )
+            post["post"]["structured_content"] = post["post"]["content"]
+        else:
+            post["post"]["view_type"] = 5
+            post["post"]["content"] = post["post"]["desc"]
+            post["post"]["structured_content"] = post["post"]["desc"]
+            post["video"] = {
+                "url": VIDEO_URL.format(rng.getrandbits(64)),
+                "cover": IMAGE_URL.format(rng.getrandbits(64)),
+            }
+
+        posts[post_id] = post
+
+        return post_id
+
+    def _create_article(self, rng: random.Random) -> str:
+        """Generate the HTML content of an article."""
+
+        # the api sometimes adds empty leading paragraphs
+        html = ["<p><br></p>"] if rng.random() < 0.2 else []
+
+        for _ in range(self._paragraphs):
+            roll = rng.random()
+
+            if roll < 0.15:
+                html.append('<p><img src="{}"></p>'.format(self._create_image(rng)))
+            elif roll < 0.2:
+                html.append(
+                    '<p><iframe src="{}?autoplay=0" width="640" height="360">'
+                    "</iframe></p>".format(YOUTUBE_URL.format(self._create_code(rng)))
+                )
+            else:
+                html.append(
+                    "<p>{}</p>".format(
+                        " ".join(
+                            self._create_sentence(rng, 6, 18)
+                            for _ in range(rng.randint(1, 4))
+                        )
+                    )
+                )
+
+        return "".join(html)
+
+    def _create_structured_content(self, rng: random.Random) -> str:
+        """Generate the structured content (i.e. the delta format of the editor)."""
+
+        nodes: List[Dict[str, Any]] = [
+            {"insert": self._create_sentence(rng, 3, 6), "attributes": {"bold": True}},
+            {"insert": "\n", "attributes": {"header": 2}},
+        ]
+
+        for _ in range(self._paragraphs):
+            roll = rng.random()
+
+            if roll < 0.1:
+                nodes.append({"insert": {"image": self._create_image(rng)}})
+            elif roll < 0.15:
+                nodes.append(
+                    {"insert": {"video": YOUTUBE_URL.format(self._create_code(rng))}}
+                )
+            elif roll < 0.2:
+                nodes.append(
+                    {"insert": {"divider": "line_{}".format(rng.randint(1, 5))}}
+                )
+            elif roll < 0.3:
+                nodes.append(
+                    {
+                        "insert": self._create_sentence(rng, 2, 5),
+                        "attributes": {"link": "https://www.hoyolab.com/"},
+                    }
+                )
+            else:
+                nodes.append({"insert": self._create_sentence(rng, 6, 30)})
+
+            nodes.append({"insert": "\n"})
+
+        return json.dumps(nodes)
+
+    @staticmethod
+    def _create_image(rng: random.Random) -> str:
+        """Generate an image URL (some with the private upload host)."""
+
+        url = PRIVATE_IMAGE_URL if rng.random() < 0.1 else IMAGE_URL
+        return url.format(rng.getrandbits(64))
+
+    @staticmethod
+    def _create_code(rng: random.Random) -> str:
+        """Generate a YouTube video code."""
+        return "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789_-", k=11))
+
+    @staticmethod
+    def _create_sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+        """Generate a sentence of random words."""
+
+        words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+        return " ".join(words).capitalize() + "."
+
+
+async def run_simulator(simulator: HoyolabSimulator) -> None:
+    """Serve the simulated API until cancelled."""
+
+    await simulator.start()
+
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await simulator.stop()
+
+
+def cli() -> None:
+    arg_parser = argparse.ArgumentParser(
+        prog="hoyolabrssfeeds.simulator",
+        description="Simulate the Hoyolab API with synthetic posts.",
+    )
+
+    arg_parser.add_argument("--host", default="localhost", help="Host to bind")
+    arg_parser.add_argument("--port", default=8081, help="Port to bind", type=int)
+    arg_parser.add_argument(
+        "--posts", default=20, help="Posts per game and category", type=int
+    )
+    arg_parser.add_argument(
+        "--paragraphs", default=5, help="Paragraphs per post", type=int
+    )
+    arg_parser.add_argument(
+        "--latency", default=0, help="Median latency in seconds", type=float
+    )
+    arg_parser.add_argument(
+        "--latency-sigma",
+        default=0,
+        help="Sigma of the log-normal latency distribution",
+        type=float,
+    )
+    arg_parser.add_argument(
+        "--error-rate", default=0, help="Probability of 5xx bursts", type=float
+    )
+    arg_parser.add_argument(
+        "--error-burst", default=1, help="Length of the 5xx bursts", type=int
+    )
+    arg_parser.add_argument(
+        "--retcode-rate",
+        default=0,
+        help="Probability of responses with error retcode",
+        type=float,
+    )
+    arg_parser.add_argument(
+        "--rate-limit",
+        default=None,
+        help="Requests per second before 429 responses",
+        type=int,
+    )
+    arg_parser.add_argument("--seed", default=0, help="Seed of the posts", type=int)
+
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(
+        format="%(asctime)s | %(levelname)-8s | %(message)s", level=logging.INFO
+    )
+
+    simulator = HoyolabSimulator(
+        posts_per_category=args.posts,
+        paragraphs=args.paragraphs,
+        latency=args.latency,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        error_burst=args.error_burst,
+        retcode_rate=args.retcode_rate,
+        rate_limit=args.rate_limit,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+
+    try:
+        asyncio.run(run_simulator(simulator))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,291 @@
+import asyncio
+import contextlib
+import json
+import os
+import time
+from contextvars import ContextVar
+from contextvars import Token
+from pathlib import Path
+from types import MappingProxyType
+from types import SimpleNamespace
+from types import TracebackType
+from typing import Any
+from typing import ContextManager
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Type
+
+import aiohttp
+
+# attributes (e.g. feed and category) of the current span and its children, which
+# are immutable and only replaced by copies, because contexts share the default
+_ATTRIBUTES: ContextVar[Mapping[str, str]] = ContextVar(
+    "trace_attributes", default=MappingProxyType({})
+)
+
+# shared context manager for disabled tracing, so spans do not allocate anything
+_NOOP_SPAN: ContextManager[None] = contextlib.nullcontext()
+
+_tracer: Optional["Tracer"] = None
+
+
+class Tracer:
+    """Collector of spans in the Chrome trace event format.
+
+    Every asyncio task gets its own track, so the spans of a track are always
+    nested and concurrent requests are shown as parallel tracks (e.g. in Perfetto).
+    """
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self._pid = os.getpid()
+        self._events: List[Dict[str, Any]] = []
+        self._tracks: Dict[int, int] = {}
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        """Recorded trace events."""
+        return self._events
+
+    def now(self) -> float:
+        """Current timestamp of the trace in microseconds."""
+        return (time.perf_counter() - self._start) * 1e6
+
+    def add_span(
+        self,
+        name: str,
+        cat: str,
+        start: float,
+        end: float,
+        args: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Record a completed span of the current task and return its event."""
+
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start,
+            "dur": max(end - start, 0),
+            "pid": self._pid,
+            "tid": self._get_track(),
+            "args": args or {},
+        }
+        self._events.append(event)
+
+        return event
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the trace to the Chrome trace event format."""
+        return {"traceEvents": self._events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Path) -> None:
+        """Write the trace to a JSON file."""
+
+        with open(path, "w") as fd:
+            json.dump(self.to_dict(), fd)
+
+    def _get_track(self) -> int:
+        """Track id of the current task (named after its first span)."""
+
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+
+        key = id(task) if task is not None else 0
+        track = self._tracks.get(key)
+
+        if track is None:
+            track = len(self._tracks) + 1
+            self._tracks[key] = track
+
+            attributes = _ATTRIBUTES.get()
+            name = " ".join(attributes.values()) if len(attributes) > 0 else "main"
+            self._events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": track,
+                    "args": {"name": "{} #{}".format(name, track)},
+                }
+            )
+
+        return track
+
+
+class _Span:
+    """Context manager which records a span with the current attributes."""
+
+    __slots__ = ("_attributes", "_cat", "_name", "_start", "_token", "_tracer")
+
+    def __init__(
+        self, tracer: Tracer, name: str, cat: str, attributes: Dict[str, str]
+    ) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._cat = cat
+        self._attributes = attributes
+        self._start = 0.0
+        self._token: Optional[Token[Mapping[str, str]]] = None
+
+    def __enter__(self) -> None:
+        if len(self._attributes) > 0:
+            self._token = _ATTRIBUTES.set(
+                MappingProxyType({**_ATTRIBUTES.get(), **self._attributes})
+            )
+
+        self._start = self._tracer.now()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        args: Dict[str, Any] = dict(_ATTRIBUTES.get())
+        if exc_value is not None:
+            args["error"] = repr(exc_value)
+
+        self._tracer.add_span(
+            self._name, self._cat, self._start, self._tracer.now(), args
+        )
+
+        if self._token is not None:
+            _ATTRIBUTES.reset(self._token)
+
+
+def enable() -> Tracer:
+    """Start collecting spans."""
+
+    global _tracer
+    _tracer = Tracer()
+
+    return _tracer
+
+
+def disable() -> None:
+    """Stop collecting spans."""
+
+    global _tracer
+    _tracer = None
+
+
+def get_tracer() -> Optional[Tracer]:
+    """Current tracer (None if tracing is disabled)."""
+    return _tracer
+
+
+def span(name: str, cat: str = "feeds", **attributes: str) -> ContextManager[None]:
+    """Record a span of a block (the attributes are inherited by child spans)."""
+
+    if _tracer is None:
+        return _NOOP_SPAN
+
+    return _Span(_tracer, name, cat, attributes)
+
+
+def get_trace_configs() -> List[aiohttp.TraceConfig]:
+    """Trace configs for new client sessions (empty if tracing is disabled)."""
+
+    if _tracer is None:
+        return []
+
+    return [create_trace_config(_tracer)]
+
+
+def create_trace_config(tracer: Tracer) -> aiohttp.TraceConfig:
+    """Create hooks which record the network phases of the requests."""
+
+    def add_span(
+        name: str, start: float, end: float, args: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return tracer.add_span(
+            name, "network", start, end, {**_ATTRIBUTES.get(), **args}
+        )
+
+    async def on_dns_start(
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceDnsResolveHostStartParams,
+    ) -> None:
+        ctx.dns_start = tracer.now()
+
+    async def on_dns_end(
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceDnsResolveHostEndParams,
+    ) -> None:
+        add_span("dns", ctx.dns_start, tracer.now(), {"host": params.host})
+
+    async def on_connect_start(
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceConnectionCreateStartParams,
+    ) -> None:
+        ctx.connect_start = tracer.now()
+
+    async def on_connect_end(
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceConnectionCreateEndParams,
+    ) -> None:
+        # includes the tls handshake
+        add_span("connect", ctx.connect_start, tracer.now(), {})
+
+    async def on_headers_sent(
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceRequestHeadersSentParams,
+    ) -> None:
+        ctx.headers_sent = tracer.now()
+
+    async def on_request_end(
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceRequestEndParams,
+    ) -> None:
+        ctx.headers_received = tracer.now()
+        add_span(
+            "ttfb",
+            getattr(ctx, "headers_sent", ctx.headers_received),
+            ctx.headers_received,
+            {"status": params.response.status},
+        )
+
+    async def on_chunk_received(
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceResponseChunkReceivedParams,
+    ) -> None:
+        if not hasattr(ctx, "headers_received"):
+            return
+
+        # there is no hook for the end of the body, so a single span of the request
+        # is extended by every chunk until the body is read completely
+        body_span = getattr(ctx, "body_span", None)
+
+        if body_span is None:
+            ctx.body_span = add_span(
+                "body",
+                ctx.headers_received,
+                tracer.now(),
+                {"bytes": len(params.chunk)},
+            )
+        else:
+            body_span["dur"] = max(tracer.now() - body_span["ts"], 0)
+            body_span["args"]["bytes"] += len(params.chunk)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connect_start)
+    trace_config.on_connection_create_end.append(on_connect_end)
+    trace_config.on_request_headers_sent.append(on_headers_sent)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_response_chunk_received.append(on_chunk_received)
+
+    return trace_config
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+import aiohttp
+
+from .writers import AbstractFeedFileWriter
+
+logger = logging.getLogger(__name__)
+
+# status codes of temporary hub errors which are worth a retry
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class WebSubPublisher:
+    """Publisher of WebSub pings for written feeds (https://www.w3.org/TR/websub/).
+
+    The topics of all feeds written in a run are batched, so every hub only gets a
+    single ping with all of its updated topics.
+    """
+
+    def __init__(self, retries: int = 3, backoff: float = 1) -> None:
+        self._retries = retries
+        self._backoff = backoff
+
+    @staticmethod
+    def get_hub_topics(
+        writers: Iterable[AbstractFeedFileWriter],
+    ) -> Dict[str, List[str]]:
+        """Collect the topics of the written feeds per hub."""
+
+        hub_topics: Dict[str, List[str]] = {}
+
+        for writer in writers:
+            if not writer.was_written or len(writer.config.hubs) == 0:
+                continue
+
+            # the feed URL is the topic of the hub subscriptions
+            if writer.config.url is None:
+                logger.warning(
+                    'Could not ping hubs of "%s" without feed URL!', writer.config.path
+                )
+                continue
+
+            for hub in writer.config.hubs:
+                topics = hub_topics.setdefault(str(hub), [])
+
+                if str(writer.config.url) not in topics:
+                    topics.append(str(writer.config.url))
+
+        return hub_topics
+
+    async def publish(
+        self,
+        session: aiohttp.ClientSession,
+        writers: Iterable[AbstractFeedFileWriter],
+    ) -> None:
+        """Ping the hubs of all written feeds."""
+
+        hub_topics = self.get_hub_topics(writers)
+
+        await asyncio.gather(
+            *[
+                self._ping_hub(session, hub, topics)
+                for hub, topics in hub_topics.items()
+            ]
+        )
+
+    async def _ping_hub(
+        self, session: aiohttp.ClientSession, hub: str, topics: List[str]
+    ) -> None:
+        """Send a publish ping with all topics to a hub (with retries)."""
+
+        data: List[Tuple[str, str]] = [("hub.mode", "publish")]
+        data.extend(("hub.url", topic) for topic in topics)
+        error = ""
+
+        for attempt in range(self._retries + 1):
+            if attempt > 0:
+                await asyncio.sleep(self._backoff * 2 ** (attempt - 1))
+
+            try:
+                # status codes are checked here, even if the session raises them
+                async with session.post(
+                    hub, data=data, raise_for_status=False
+                ) as response:
+                    if response.status < 300:
+                        logger.info("Pinged hub %s for %d feeds.", hub, len(topics))
+                        return
+
+                    error = "status {}".format(response.status)
+
+                    if response.status not in RETRY_STATUS_CODES:
+                        break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                error = repr(err)
+
+        # the feeds are already written, so a failed ping is no error of the run
+        logger.warning("Could not ping hub %s: %s", hub, error)
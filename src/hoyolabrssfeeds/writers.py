@@ -1,38 +1,357 @@
+import hashlib
 import json
+import logging
+import re
 from abc import ABCMeta
 from abc import abstractmethod
 from datetime import datetime
+from pathlib import Path
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Set
+from urllib.parse import urljoin
 from xml.etree import ElementTree
 
 import aiofiles
-
+import aiofiles.os
+import aiofiles.ospath
+
+from . import metrics
+from .compressors import ENCODING_SUFFIXES
+from .compressors import GZIP
+from .compressors import ZSTD
+from .compressors import compress_all
+from .compressors import is_zstd_available
 from .errors import FeedIOError
 from .models import FeedFileWriterConfig
 from .models import FeedItem
 from .models import FeedMeta
 from .models import FeedType
+from .pages import FeedPageIndex
+
+logger = logging.getLogger(__name__)
+
+# namespace of feed paging and archiving (RFC 5005)
+ATOM_HISTORY_NAMESPACE = "http://purl.org/syndication/history/1.0"
 
 
 class AbstractFeedFileWriter(metaclass=ABCMeta):
     """ABC for feed file writing functionality."""
 
+    media_type = "application/octet-stream"
+
     def __init__(self, config: FeedFileWriterConfig) -> None:
         self._config = config
+        self._feed_bytes: Optional[bytes] = None
+        self._archive_bytes: Dict[int, bytes] = {}
+        self._page_index: Optional[FeedPageIndex] = None
+        self._was_written = False
 
     @property
     def config(self) -> FeedFileWriterConfig:
         """Returns the config of feed writer."""
         return self._config
 
+    @property
+    def feed_bytes(self) -> Optional[bytes]:
+        """Encoded feed of the last write_feed() call (None if not written yet)."""
+        return self._feed_bytes
+
+    @property
+    def archive_bytes(self) -> Dict[int, bytes]:
+        """Encoded archive pages (by number) which were written by this writer."""
+        return self._archive_bytes
+
+    @property
+    def was_written(self) -> bool:
+        """Flag if the feed file was written in the last write_feed() call."""
+        return self._was_written
+
     @abstractmethod
-    async def write_feed(self, feed_meta: FeedMeta, feed_items: List[FeedItem]) -> None:
-        """Write feed to file."""
+    def encode_feed(
+        self,
+        feed_meta: FeedMeta,
+        feed_items: List[FeedItem],
+        page: Optional[int] = None,
+    ) -> bytes:
+        """Encode feed (or an archive page of it) to the bytes of the file format."""
         pass
 
+    def get_page_url(self, page: Optional[int] = None) -> str:
+        """URL of the head page or an archive page (relative without feed URL)."""
+
+        if page is None and self.config.url is not None:
+            return str(self.config.url)
+
+        path = (
+            self.config.path
+            if page is None
+            else FeedPageIndex(self.config.path).get_archive_path(page)
+        )
+
+        if self.config.url is None:
+            return path.name
+
+        return urljoin(str(self.config.url), path.name)
+
+    def get_older_page(self, page: Optional[int] = None) -> Optional[int]:
+        """Number of the archive page before the head page or an archive page."""
+
+        if page is None:
+            number = len(self._page_index) if self._page_index is not None else 0
+        else:
+            number = page - 1
+
+        return number if number > 0 else None
+
+    @property
+    def compressed_paths(self) -> Dict[str, Path]:
+        """Paths of the precompressed files per encoding (if enabled)."""
+
+        if not self.config.compress:
+            return {}
+
+        encodings = [GZIP, ZSTD] if is_zstd_available() else [GZIP]
+        path = self.config.path
+
+        return {
+            encoding: path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+            for encoding in encodings
+        }
+
+    async def write_feed(
+        self,
+        feed_meta: FeedMeta,
+        feed_items: List[FeedItem],
+        archive_ids: Optional[Set[int]] = None,
+    ) -> None:
+        """Write feed (and precompressed files if enabled) to file.
+
+        Items of archive_ids are moved to archive pages right away (if paged).
+        """
+
+        self._was_written = False
+
+        if self.config.page_size is not None:
+            feed_items = await self._archive_items(
+                feed_meta, feed_items, self.config.page_size, archive_ids or set()
+            )
+
+        with metrics.FEED_ENCODE_SECONDS.time(str(self.config.feed_type)):
+            feed_bytes = self.encode_feed(feed_meta, feed_items)
+
+        if self.config.compact:
+            self._report_compact_size(feed_meta, feed_items, feed_bytes)
+
+        if await self._is_published(feed_bytes):
+            self._feed_bytes = feed_bytes
+            return
+
+        with metrics.FEED_WRITE_SECONDS.time(str(self.config.feed_type)):
+            await self._write_files(self.config.path, feed_bytes)
+
+        metrics.FEED_WRITTEN_BYTES.inc(
+            str(self.config.feed_type), amount=len(feed_bytes)
+        )
+
+        self._feed_bytes = feed_bytes
+        self._was_written = True
+
+    async def _archive_items(
+        self,
+        feed_meta: FeedMeta,
+        feed_items: List[FeedItem],
+        page_size: int,
+        archive_ids: Set[int],
+    ) -> List[FeedItem]:
+        """Move the oldest items to new archive pages and return the head items."""
+
+        if self._page_index is None:
+            page_index = FeedPageIndex(self.config.path)
+            await page_index.load()
+            self._page_index = page_index
+
+        page_index = self._page_index
+
+        # items are sorted from newest to oldest and updated items are moved back to
+        # the head page, because the archived versions are never rewritten
+        head_items = [
+            item
+            for item in feed_items
+            if not page_index.is_archived(item.id, self._get_revision(item))
+        ]
+
+        # the regular updates cut the head page to the category size, so these
+        # items (e.g. of a backfill) are archived even if the last page is not full
+        archived_items = [item for item in head_items if item.id in archive_ids]
+        head_items = [item for item in head_items if item.id not in archive_ids]
+
+        while len(archived_items) > 0:
+            await self._archive_page(feed_meta, page_index, archived_items[-page_size:])
+            archived_items = archived_items[:-page_size]
+
+        # archive pages are never rewritten, so only full pages are archived and
+        # the head page always keeps at least one page of items
+        while len(head_items) >= 2 * page_size:
+            await self._archive_page(feed_meta, page_index, head_items[-page_size:])
+            head_items = head_items[:-page_size]
+
+        return head_items
+
+    async def _archive_page(
+        self, feed_meta: FeedMeta, page_index: FeedPageIndex, page_items: List[FeedItem]
+    ) -> None:
+        """Write items to a new archive page and add it to the page index."""
+
+        number = len(page_index) + 1
+        page_bytes = self.encode_feed(feed_meta, page_items, number)
+
+        await self._write_files(page_index.get_archive_path(number), page_bytes)
+        self._archive_bytes[number] = page_bytes
+
+        page_index.add_page(
+            [item.id for item in page_items],
+            {item.id: self._get_revision(item) for item in page_items},
+        )
+        await page_index.save()
+
+        logger.info(
+            'Archived %d items to page %d of "%s".',
+            len(page_items),
+            number,
+            self.config.path,
+        )
+
+    @staticmethod
+    def _get_revision(item: FeedItem) -> datetime:
+        """Last modification of an item."""
+        return (
+            item.published
+            if item.updated is None
+            else max(item.published, item.updated)
+        )
+
+    def reset_written(self) -> None:
+        """Reset the written flag (e.g. before a run that might skip the writer)."""
+        self._was_written = False
+
+    def invalidate(self) -> None:
+        """Forget the written feed, so the next write checks the files again."""
+        self._feed_bytes = None
+
+    @staticmethod
+    def get_checksum_path(path: Path) -> Path:
+        """Path of the checksum file next to a feed file."""
+        return path.with_name(".{}.sha256".format(path.name))
+
+    async def _write_files(self, path: Path, feed_bytes: bytes) -> None:
+        """Write a feed file, its checksum and precompressed files (if enabled)."""
+
+        checksum = hashlib.sha256(feed_bytes).hexdigest()
+
+        # the checksum is replaced before the feed, so a stale feed is detected
+        files = {path: feed_bytes, self.get_checksum_path(path): checksum.encode()}
+
+        # the precompressed files are created from the same bytes
+        if self.config.compress:
+            for encoding, data in compress_all(feed_bytes).items():
+                files[path.with_name(path.name + ENCODING_SUFFIXES[encoding])] = data
+
+        try:
+            await self._publish_files(files)
+        except IOError as err:
+            raise FeedIOError(
+                'Could not write {} file to "{}"!'.format(
+                    self.config.feed_type.title(), path
+                )
+            ) from err
+
+    def _report_compact_size(
+        self, feed_meta: FeedMeta, feed_items: List[FeedItem], feed_bytes: bytes
+    ) -> None:
+        """Log the size of the compact feed compared to the default output."""
+
+        # the default output is encoded only for this, so it is just a debug info
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+
+        default_config = self.config.copy(update={"compact": False})
+        default_size = len(
+            type(self)(default_config).encode_feed(feed_meta, feed_items)
+        )
+
+        logger.debug(
+            'Compact %s output of "%s": %d -> %d bytes (%.1f%% saved).',
+            self.config.feed_type.title(),
+            feed_meta.title or feed_meta.game.name.title(),
+            default_size,
+            len(feed_bytes),
+            100 * (1 - len(feed_bytes) / default_size) if default_size > 0 else 0,
+        )
+
+    @staticmethod
+    def minify_html(html: str) -> str:
+        """Remove empty paragraphs, spacers, redundant attributes and whitespace."""
+
+        # whitespace is significant in preformatted text
+        if "<pre" in html or "<textarea" in html:
+            return html
+
+        html = re.sub(r'\s(?:style|class|id|title|align)=""', "", html)
+        html = re.sub(r"<p>(?:\s|&nbsp;|&#160;|\u00a0|<br\s*/?>)*</p>", "", html)
+        html = re.sub(r"(?:<br\s*/?>)+(</(?:p|h[1-6]|div|li)>)", r"\1", html)
+        # only ascii whitespace, so non-breaking spaces are kept
+        html = re.sub(r"[ \t\r\n]+", " ", html)
+        html = re.sub(r" ?(</?(?:p|div|h[1-6]|ul|ol|li|br)\b[^>]*>) ?", r"\1", html)
+
+        return html.strip()
+
+    async def _is_published(self, feed_bytes: bytes) -> bool:
+        """Check if the same feed is already written (including compressed files)."""
+
+        paths = [
+            self.config.path,
+            self.get_checksum_path(self.config.path),
+            *self.compressed_paths.values(),
+        ]
+
+        for path in paths:
+            if not await aiofiles.ospath.exists(path):
+                return False
+
+        if self._feed_bytes is not None:
+            return self._feed_bytes == feed_bytes
+
+        try:
+            async with aiofiles.open(self.config.path, "rb") as fd:
+                return bool(await fd.read() == feed_bytes)
+        except IOError:
+            return False
+
+    @staticmethod
+    async def _publish_files(files: Dict[Path, bytes]) -> None:
+        """Write files via temporary files and replace them at once."""
+
+        tmp_paths = {}
+
+        try:
+            for path, data in files.items():
+                tmp_path = path.with_name(".{}.tmp".format(path.name))
+                tmp_paths[path] = tmp_path
+
+                async with aiofiles.open(tmp_path, "wb") as fd:
+                    await fd.write(data)
+
+            # main file is replaced last, so compressed files are never older
+            for path in reversed(list(tmp_paths.keys())):
+                await aiofiles.os.replace(tmp_paths[path], path)
+        finally:
+            for tmp_path in tmp_paths.values():
+                if await aiofiles.ospath.exists(tmp_path):
+                    await aiofiles.os.remove(tmp_path)
+
 
 class FeedFileWriterFactory:
     """Factory for creating specific feed writers."""
@@ -56,8 +375,15 @@ class FeedFileWriterFactory:
 class JSONFeedFileWriter(AbstractFeedFileWriter):
     """Export feed as JSON-Feed format (https://www.jsonfeed.org/version/1.1/)."""
 
-    async def write_feed(self, feed_meta: FeedMeta, feed_items: List[FeedItem]) -> None:
-        """Write feed to JSON file."""
+    media_type = "application/feed+json"
+
+    def encode_feed(
+        self,
+        feed_meta: FeedMeta,
+        feed_items: List[FeedItem],
+        page: Optional[int] = None,
+    ) -> bytes:
+        """Encode feed (or an archive page of it) to JSON."""
 
         feed: Dict[str, Any] = {
             "version": "https://jsonfeed.org/version/1.1",
@@ -71,21 +397,32 @@ class JSONFeedFileWriter(AbstractFeedFileWriter):
         if self.config.url is not None:
             feed["feed_url"] = str(self.config.url)
 
+        older_page = self.get_older_page(page)
+        if older_page is not None:
+            feed["next_url"] = self.get_page_url(older_page)
+
+        if len(self.config.hubs) > 0:
+            feed["hubs"] = [
+                {"type": "WebSub", "url": str(hub)} for hub in self.config.hubs
+            ]
+
         if feed_meta.icon is not None:
             feed["icon"] = str(feed_meta.icon)
 
-        feed["items"] = [self.create_json_feed_item(item) for item in feed_items]
+        feed["items"] = [
+            self.create_json_feed_item(item, self.config.compact) for item in feed_items
+        ]
 
-        try:
-            async with aiofiles.open(self.config.path, "w", encoding="utf-8") as fd:
-                await fd.write(json.dumps(feed))
-        except IOError as err:
-            raise FeedIOError(
-                'Could not write JSON file to "{}"!'.format(self.config.path)
-            ) from err
+        if self.config.compact:
+            # unescaped unicode is much smaller for e.g. chinese or thai feeds
+            return json.dumps(feed, ensure_ascii=False, separators=(",", ":")).encode(
+                "utf-8"
+            )
+
+        return json.dumps(feed).encode("utf-8")
 
     @staticmethod
-    def create_json_feed_item(item: FeedItem) -> Dict[str, Any]:
+    def create_json_feed_item(item: FeedItem, compact: bool = False) -> Dict[str, Any]:
         """Convert FeedItem to JSON-Feed item."""
 
         json_item = {
@@ -94,7 +431,11 @@ class JSONFeedFileWriter(AbstractFeedFileWriter):
             "title": item.title,
             "authors": [{"name": item.author}],
             "tags": [item.category.name.title()],
-            "content_html": item.content,
+            "content_html": (
+                AbstractFeedFileWriter.minify_html(item.content)
+                if compact
+                else item.content
+            ),
             "date_published": item.published.astimezone().isoformat(),
         }
 
@@ -113,8 +454,15 @@ class JSONFeedFileWriter(AbstractFeedFileWriter):
 class AtomFeedFileWriter(AbstractFeedFileWriter):
     """Export feed as Atom format (https://validator.w3.org/feed/docs/atom.html)."""
 
-    async def write_feed(self, feed_meta: FeedMeta, feed_items: List[FeedItem]) -> None:
-        """Write feed to Atom file."""
+    media_type = "application/atom+xml"
+
+    def encode_feed(
+        self,
+        feed_meta: FeedMeta,
+        feed_items: List[FeedItem],
+        page: Optional[int] = None,
+    ) -> bytes:
+        """Encode feed (or an archive page of it) to Atom XML."""
 
         # this is a workaround to avoid dealing with namespaces...
         meta_params = {
@@ -122,16 +470,30 @@ class AtomFeedFileWriter(AbstractFeedFileWriter):
             "xml:lang": str(feed_meta.language),
         }
 
+        if page is not None:
+            meta_params["xmlns:fh"] = ATOM_HISTORY_NAMESPACE
+
         root = ElementTree.Element("feed", meta_params)
 
-        id_str = "tag:hoyolab.com,2021:/official/{}".format(feed_meta.game)
+        if page is not None:
+            ElementTree.SubElement(root, "fh:archive")
+
+        id_str = feed_meta.id or "tag:hoyolab.com,2021:/official/{}".format(
+            feed_meta.game
+        )
         ElementTree.SubElement(root, "id").text = id_str
 
         title_str = feed_meta.title or "{} News".format(feed_meta.game.name.title())
         ElementTree.SubElement(root, "title").text = title_str
 
-        updated_str = datetime.now().astimezone().isoformat()
-        ElementTree.SubElement(root, "updated").text = updated_str
+        # the newest item defines the update, so unchanged feeds (and archive
+        # pages) are encoded to the same bytes
+        updated = (
+            max(self._get_revision(item) for item in feed_items)
+            if len(feed_items) > 0
+            else datetime.now()
+        )
+        ElementTree.SubElement(root, "updated").text = updated.astimezone().isoformat()
 
         ElementTree.SubElement(
             root,
@@ -148,31 +510,53 @@ class AtomFeedFileWriter(AbstractFeedFileWriter):
                 root,
                 "link",
                 {
-                    "href": self.config.url,
+                    "href": self.get_page_url(page),
                     "rel": "self",
                     "type": "application/atom+xml",
                 },
             )
 
+        for hub in self.config.hubs:
+            ElementTree.SubElement(root, "link", {"href": str(hub), "rel": "hub"})
+
+        if page is not None:
+            ElementTree.SubElement(
+                root,
+                "link",
+                {
+                    "href": self.get_page_url(),
+                    "rel": "current",
+                    "type": "application/atom+xml",
+                },
+            )
+
+        older_page = self.get_older_page(page)
+        if older_page is not None:
+            ElementTree.SubElement(
+                root,
+                "link",
+                {
+                    "href": self.get_page_url(older_page),
+                    "rel": "prev-archive",
+                    "type": "application/atom+xml",
+                },
+            )
+
         if feed_meta.icon:
             ElementTree.SubElement(root, "icon").text = feed_meta.icon
 
-        entries = self.create_atom_feed_entries(feed_items)
+        entries = self.create_atom_feed_entries(feed_items, self.config.compact)
         root.extend(entries)
 
-        xml_bytes = ElementTree.tostring(root, encoding="utf-8", xml_declaration=True)
+        xml_bytes: bytes = ElementTree.tostring(
+            root, encoding="utf-8", xml_declaration=True
+        )
 
-        try:
-            async with aiofiles.open(self.config.path, "wb") as fd:
-                await fd.write(xml_bytes)
-        except IOError as err:
-            raise FeedIOError(
-                'Could not write Atom file to "{}"!'.format(self.config.path)
-            ) from err
+        return xml_bytes
 
     @staticmethod
     def create_atom_feed_entries(
-        feed_items: List[FeedItem],
+        feed_items: List[FeedItem], compact: bool = False
     ) -> List[ElementTree.Element]:
         """Create Atom feed entries from given feed items."""
 
@@ -210,9 +594,11 @@ class AtomFeedFileWriter(AbstractFeedFileWriter):
             author = ElementTree.SubElement(entry, "author")
             ElementTree.SubElement(author, "name").text = item.author
 
-            ElementTree.SubElement(
-                entry, "content", {"type": "html"}
-            ).text = item.content
+            ElementTree.SubElement(entry, "content", {"type": "html"}).text = (
+                AbstractFeedFileWriter.minify_html(item.content)
+                if compact
+                else item.content
+            )
 
             if item.summary is not None:
                 ElementTree.SubElement(entry, "summary").text = item.summary
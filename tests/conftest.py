@@ -275,9 +275,11 @@ def combined_feed(category_feeds: List[List[models.FeedItem]]) -> List[models.Fe
 
 
 @pytest.fixture
-def mocked_loader(mocker: pytest_mock.MockFixture) -> MagicMock:
+def mocked_loader(mocker: pytest_mock.MockFixture, json_path: Path) -> MagicMock:
     loader: MagicMock = mocker.create_autospec(AbstractFeedFileLoader, instance=True)
     loader.get_feed_items = mocker.AsyncMock(return_value=[])
+    loader.was_recovered = False
+    loader.config.path = json_path  # needed for logger calls
 
     return loader
 
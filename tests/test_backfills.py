@@ -0,0 +1,262 @@
+import time
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+from typing import AsyncGenerator
+from typing import List
+
+import pytest
+import pytest_mock
+from aiohttp.test_utils import TestServer
+
+from hoyolabrssfeeds import backfills
+from hoyolabrssfeeds import caches
+from hoyolabrssfeeds import errors
+from hoyolabrssfeeds import feeds
+from hoyolabrssfeeds import hoyolab
+from hoyolabrssfeeds import loaders
+from hoyolabrssfeeds import models
+from hoyolabrssfeeds import pages
+from hoyolabrssfeeds import simulator
+from hoyolabrssfeeds import writers
+
+CATEGORY = models.FeedItemCategory.INFO
+
+
+@pytest.fixture
+def sim() -> simulator.HoyolabSimulator:
+    return simulator.HoyolabSimulator(posts_per_category=12, paragraphs=1)
+
+
+@pytest.fixture
+async def api(
+    sim: simulator.HoyolabSimulator, feed_meta: models.FeedMeta
+) -> AsyncGenerator[hoyolab.HoyolabNews, Any]:
+    async with TestServer(sim.create_app()) as server:
+        yield hoyolab.HoyolabNews(
+            feed_meta.game,
+            feed_meta.language,
+            base_url=str(server.make_url(simulator.API_PATH)),
+        )
+
+
+def create_backfiller(
+    api: hoyolab.HoyolabNews,
+    feed_meta: models.FeedMeta,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    **options: Any,
+) -> backfills.Backfiller:
+    backfiller = backfills.Backfiller(
+        feed_meta,
+        [writers.JSONFeedFileWriter(json_feed_file_writer_config)],
+        categories=[CATEGORY],
+        page_size=5,
+        rate=None,
+        **options,
+    )
+    backfiller._hoyolab = api
+
+    return backfiller
+
+
+def get_category_ids(sim: simulator.HoyolabSimulator, game: models.Game) -> List[int]:
+    return sorted(
+        [
+            post_id
+            for post_id, post in sim.get_posts(game).items()
+            if post["post"]["official_type"] == CATEGORY.value
+        ],
+        reverse=True,
+    )
+
+
+async def load_ids(
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> List[int]:
+    loader = loaders.JSONFeedFileLoader(json_feed_file_writer_config)
+    return [item.id for item in await loader.get_feed_items()]
+
+
+# ---- BACKFILL TESTS ----
+
+
+async def test_rate_limiter() -> None:
+    limiter = backfills.RateLimiter(rate=20)
+    start = time.monotonic()
+
+    for _ in range(3):
+        await limiter.wait()
+
+    assert time.monotonic() - start >= 0.1
+
+
+async def test_checkpoint_persistence(tmp_path: Path) -> None:
+    checkpoint = backfills.BackfillCheckpoint(tmp_path / "checkpoint.json")
+    checkpoint.reset({"count": 10})
+    checkpoint.failed_ids.add(42)
+
+    state = checkpoint.get_state(CATEGORY)
+    state.last_id = "5"
+    state.collected = 5
+    state.oldest = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    await checkpoint.save()
+
+    loaded = backfills.BackfillCheckpoint(checkpoint.path)
+    await loaded.load()
+
+    loaded_state = loaded.get_state(CATEGORY)
+    assert loaded.params == {"count": 10}
+    assert loaded.failed_ids == {42}
+    assert loaded_state.last_id == "5"
+    assert loaded_state.collected == 5
+    assert loaded_state.oldest == state.oldest
+    assert not loaded_state.done
+
+    await loaded.remove()
+    assert checkpoint.path is not None and not checkpoint.path.exists()
+
+
+async def test_backfill_count(
+    sim: simulator.HoyolabSimulator,
+    api: hoyolab.HoyolabNews,
+    feed_meta: models.FeedMeta,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    backfiller = create_backfiller(
+        api, feed_meta, json_feed_file_writer_config, count=8
+    )
+
+    await backfiller.run()
+
+    assert (
+        await load_ids(json_feed_file_writer_config)
+        == get_category_ids(sim, feed_meta.game)[:8]
+    )
+    assert sim.requests["getNewsList"] == 2
+    assert sim.requests["getPostFull"] == 8
+    assert backfiller.progress.fetched == 8
+    assert backfiller.progress.fraction == 1
+    assert backfiller.checkpoint.path is not None
+    assert not backfiller.checkpoint.path.exists()
+
+    # known posts are not fetched again
+    await backfiller.run()
+
+    assert sim.requests["getPostFull"] == 8
+
+
+async def test_backfill_until(
+    sim: simulator.HoyolabSimulator,
+    api: hoyolab.HoyolabNews,
+    feed_meta: models.FeedMeta,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    category_ids = get_category_ids(sim, feed_meta.game)
+    until = datetime.fromtimestamp(
+        sim.get_posts(feed_meta.game)[category_ids[6]]["post"]["created_at"],
+        tz=timezone.utc,
+    )
+
+    backfiller = create_backfiller(
+        api, feed_meta, json_feed_file_writer_config, until=until
+    )
+
+    await backfiller.run()
+
+    assert await load_ids(json_feed_file_writer_config) == category_ids[:7]
+
+
+async def test_backfill_resume(
+    mocker: pytest_mock.MockFixture,
+    sim: simulator.HoyolabSimulator,
+    api: hoyolab.HoyolabNews,
+    feed_meta: models.FeedMeta,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    get_news_page = api.get_news_page
+    calls = 0
+
+    async def interrupted_news_page(*args: Any, **kwargs: Any) -> Any:
+        nonlocal calls
+        calls += 1
+
+        if calls == 2:
+            raise errors.HoyolabApiError("Interrupted")
+
+        return await get_news_page(*args, **kwargs)
+
+    mocker.patch.object(api, "get_news_page", side_effect=interrupted_news_page)
+
+    category_ids = get_category_ids(sim, feed_meta.game)
+    backfiller = create_backfiller(
+        api, feed_meta, json_feed_file_writer_config, count=10
+    )
+
+    with pytest.raises(errors.HoyolabApiError, match="Interrupted"):
+        await backfiller.run()
+
+    # the feed is only written at the end, the fetched items are kept aside
+    assert not json_feed_file_writer_config.path.exists()
+    assert backfiller.checkpoint.path is not None
+    assert backfiller.checkpoint.path.exists()
+    assert [
+        item.id for item in await backfiller.checkpoint.load_items()
+    ] == category_ids[:5]
+
+    # the next backfill continues with the second page
+    resumed_backfiller = create_backfiller(
+        api, feed_meta, json_feed_file_writer_config, count=10
+    )
+
+    await resumed_backfiller.run()
+
+    assert await load_ids(json_feed_file_writer_config) == category_ids[:10]
+    assert sim.requests["getNewsList"] == 2
+    assert sim.requests["getPostFull"] == 10
+    assert backfiller.checkpoint.items_path is not None
+    assert not backfiller.checkpoint.items_path.exists()
+
+
+async def test_backfill_archived(
+    sim: simulator.HoyolabSimulator,
+    api: hoyolab.HoyolabNews,
+    feed_meta: models.FeedMeta,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    feed_meta.categories = [CATEGORY]
+    json_feed_file_writer_config.page_size = 3
+    category_ids = get_category_ids(sim, feed_meta.game)
+
+    backfiller = create_backfiller(
+        api, feed_meta, json_feed_file_writer_config, count=8
+    )
+
+    await backfiller.run()
+
+    # only the items of the category size stay on the head page
+    page_index = pages.FeedPageIndex(json_feed_file_writer_config.path)
+    await page_index.load()
+
+    assert await load_ids(json_feed_file_writer_config) == category_ids[:1]
+    assert page_index.pages == [category_ids[5:8], category_ids[2:5], [category_ids[1]]]
+
+    # the regular update keeps the backfilled items
+    game_feed = feeds.GameFeed(
+        feed_meta,
+        [writers.JSONFeedFileWriter(json_feed_file_writer_config)],
+        negative_cache=caches.NegativeCache(),
+    )
+    game_feed._hoyolab = api
+
+    await game_feed.create_feed()
+
+    assert game_feed.changes == []
+    assert await load_ids(json_feed_file_writer_config) == category_ids[:1]
+    assert sim.requests["getPostFull"] == 8
+
+    # archived posts are not fetched again
+    await create_backfiller(api, feed_meta, json_feed_file_writer_config, count=8).run()
+
+    assert sim.requests["getPostFull"] == 8
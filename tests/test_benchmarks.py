@@ -0,0 +1,61 @@
+import os
+from typing import Any
+from typing import Dict
+
+from hoyolabrssfeeds import benchmarks
+from hoyolabrssfeeds import hoyolab
+
+# ---- BENCHMARK TESTS ----
+
+
+async def test_benchmark_suite() -> None:
+    suite = benchmarks.BenchmarkSuite(
+        rounds=2, warmup=0, posts_per_category=1, paragraphs=2, feed_counts=(2,)
+    )
+    base_url = os.environ.get(hoyolab.API_BASE_URL_ENV)
+
+    assert "macro.create_feeds.2" in suite.names
+
+    results = await suite.run(["micro.*", "macro.*"])
+
+    assert [result.name for result in results] == suite.names
+    assert all(len(result.times) == 2 for result in results)
+    assert all(result.min > 0 for result in results)
+    assert os.environ.get(hoyolab.API_BASE_URL_ENV) == base_url
+
+    filtered = await suite.run(["micro.encode_*"])
+
+    assert [result.name for result in filtered] == [
+        "micro.encode_json",
+        "micro.encode_atom",
+    ]
+
+
+def test_compare_results() -> None:
+    results = [
+        benchmarks.BenchmarkResult("faster", [0.5, 0.4, 0.6]),
+        benchmarks.BenchmarkResult("slower", [1.5]),
+        benchmarks.BenchmarkResult("new", [1.0]),
+    ]
+    baseline: Dict[str, Any] = {
+        "benchmarks": {
+            "faster": {"median": 1.0},
+            "slower": {"median": 1.0},
+            "removed": {"median": 1.0},
+        }
+    }
+
+    comparisons = benchmarks.compare_results(
+        baseline, benchmarks.results_to_dict(results), threshold=0.2
+    )
+
+    assert [(c.name, c.is_regression) for c in comparisons] == [
+        ("faster", False),
+        ("slower", True),
+    ]
+    assert comparisons[0].ratio == 0.5
+
+    report = benchmarks.format_results(results, comparisons)
+
+    assert "-50.0%" in report
+    assert "+50.0% REGRESSION" in report
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+from hoyolabrssfeeds import blobs
+from hoyolabrssfeeds import errors
+from hoyolabrssfeeds import models
+
+
+async def test_put_and_get(tmp_path: Path) -> None:
+    store = blobs.BlobStore(tmp_path, lru_size=1)
+
+    key = await store.put("<p>Hello</p>")
+    other_key = await store.put("<p>World</p>")
+
+    assert key == blobs.BlobStore.get_key("<p>Hello</p>")
+    assert key in store
+    assert store.get_path(key).exists()
+
+    # the first content was evicted from memory and is loaded from disk
+    assert store._hot.keys() == {other_key}
+    assert await store.get(key) == "<p>Hello</p>"
+    assert store._hot.keys() == {key}
+
+    # the same content is only stored once
+    assert await store.put("<p>Hello</p>") == key
+    assert len(list(tmp_path.glob("*/*" + blobs.BLOB_SUFFIX))) == 2
+
+
+async def test_get_missing(tmp_path: Path) -> None:
+    store = blobs.BlobStore(tmp_path)
+
+    with pytest.raises(errors.FeedIOError, match="Could not load content"):
+        await store.get(blobs.BlobStore.get_key("missing"))
+
+
+async def test_offload_and_materialize(
+    tmp_path: Path, feed_item: models.FeedItem
+) -> None:
+    store = blobs.BlobStore(tmp_path, lru_size=0)
+
+    offloaded_items = await store.offload([feed_item])
+    offloaded_item = offloaded_items[0]
+
+    assert isinstance(offloaded_item, models.OffloadedFeedItem)
+    assert offloaded_item.content == ""
+    assert offloaded_item.content_key == store.get_key(feed_item.content)
+
+    # already offloaded items are kept
+    assert (await store.offload(offloaded_items))[0] is offloaded_item
+
+    materialized_item = (await store.materialize(offloaded_items))[0]
+
+    assert type(materialized_item) is models.FeedItem
+    assert materialized_item == feed_item
+
+
+async def test_prune(tmp_path: Path) -> None:
+    store = blobs.BlobStore(tmp_path / "blobs")
+
+    assert await store.prune(set()) == 0
+
+    used_key = await store.put("used")
+    unused_key = await store.put("unused")
+
+    assert await store.prune({used_key}) == 1
+    assert store.get_path(used_key).exists()
+    assert not store.get_path(unused_key).exists()
+    assert unused_key not in store
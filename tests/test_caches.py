@@ -0,0 +1,162 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+
+from hoyolabrssfeeds import caches
+from hoyolabrssfeeds import models
+
+# ---- NEGATIVE CACHE TESTS ----
+
+
+def get_key(post_id: int = 42) -> caches.NegativeCacheKey:
+    modified = datetime(2022, 10, 3, 16, tzinfo=timezone.utc)
+    return models.Game.GENSHIN, models.Language.ENGLISH, post_id, modified
+
+
+def test_negative_cache_reprobe() -> None:
+    cache = caches.NegativeCache(ttl=timedelta(days=1), delay=timedelta(minutes=10))
+    now = datetime.now(timezone.utc)
+    key = get_key()
+
+    assert not cache.is_blocked(key, now)
+
+    cache.add_failure(key, now)
+    assert cache.is_blocked(key, now + timedelta(minutes=9))
+    assert not cache.is_blocked(key, now + timedelta(minutes=10))
+
+    # delay is doubled after each failure
+    cache.add_failure(key, now)
+    assert cache.is_blocked(key, now + timedelta(minutes=19))
+    assert not cache.is_blocked(key, now + timedelta(minutes=20))
+
+    # other modification dates are not blocked
+    other_key = key[:3] + (key[3] + timedelta(hours=1),)
+    assert not cache.is_blocked(other_key, now)
+
+
+def test_negative_cache_ttl() -> None:
+    cache = caches.NegativeCache(ttl=timedelta(hours=1), delay=timedelta(hours=2))
+    now = datetime.now(timezone.utc)
+    key = get_key()
+
+    cache.add_failure(key, now)
+    assert cache.is_blocked(key, now + timedelta(minutes=59))
+    assert not cache.is_blocked(key, now + timedelta(hours=1))
+
+    # expired entries are removed
+    assert key not in cache
+
+
+def test_negative_cache_discard() -> None:
+    cache = caches.NegativeCache()
+    key = get_key()
+
+    cache.add_failure(key)
+    cache.add_failure(get_key(41))
+    cache.discard(*key[:3])
+
+    assert key not in cache
+    assert len(cache) == 1
+
+
+async def test_negative_cache_persistence(json_path: Path) -> None:
+    cache_path = caches.NegativeCache.get_default_path(json_path)
+    cache = caches.NegativeCache(cache_path)
+    key = get_key()
+
+    cache.add_failure(key)
+    await cache.save()
+
+    assert cache_path.exists()
+
+    loaded_cache = caches.NegativeCache(cache_path)
+    await loaded_cache.load()
+
+    assert loaded_cache.is_blocked(key)
+
+    # empty caches remove the file
+    loaded_cache.discard(*key[:3])
+    await loaded_cache.save()
+
+    assert not cache_path.exists()
+
+
+async def test_invalid_negative_cache_file(json_path: Path) -> None:
+    cache_path = caches.NegativeCache.get_default_path(json_path)
+    cache_path.write_text("invalid")
+
+    cache = caches.NegativeCache(cache_path)
+    await cache.load()
+
+    assert len(cache) == 0
+
+
+# ---- FEED INDEX TESTS ----
+
+
+def test_feed_index_outdated(feed_item: models.FeedItem) -> None:
+    index = caches.FeedIndex()
+    assert feed_item.updated is not None
+    item_meta = models.FeedItemMeta(feed_item.id, feed_item.updated)
+
+    # unknown feeds are always outdated
+    assert not index.exists
+    assert index.is_outdated(item_meta)
+
+    index.update([feed_item])
+
+    assert index.exists
+    assert not index.is_outdated(item_meta)
+    assert index.is_outdated(
+        models.FeedItemMeta(feed_item.id, feed_item.updated + timedelta(minutes=1))
+    )
+    assert index.is_outdated(models.FeedItemMeta(feed_item.id + 1, feed_item.updated))
+
+
+async def test_feed_index_persistence(
+    json_path: Path, feed_item: models.FeedItem
+) -> None:
+    index_path = caches.FeedIndex.get_default_path(json_path)
+    index = caches.FeedIndex(index_path)
+
+    index.update([feed_item], {feed_item.id: feed_item.get_fingerprint()})
+    await index.save()
+
+    assert index_path.exists()
+
+    loaded_index = caches.FeedIndex(index_path)
+    await loaded_index.load()
+
+    assert feed_item.updated is not None
+    assert len(loaded_index) == 1
+    assert not loaded_index.is_outdated(
+        models.FeedItemMeta(feed_item.id, feed_item.updated)
+    )
+    assert loaded_index.get_fingerprint(feed_item.id) == feed_item.get_fingerprint()
+
+
+def test_feed_index_touch(feed_item: models.FeedItem) -> None:
+    index = caches.FeedIndex()
+    assert feed_item.updated is not None
+    touched = feed_item.updated + timedelta(minutes=1)
+
+    index.update([feed_item])
+    index.touch({feed_item.id: touched, feed_item.id + 1: touched})
+
+    assert index.get_revision(feed_item.id) == touched
+    assert index.get_revision(feed_item.id + 1) is None
+
+    # the raised revision is kept as long as the item is unchanged
+    index.update([feed_item])
+    assert index.get_revision(feed_item.id) == touched
+
+
+async def test_invalid_feed_index_file(json_path: Path) -> None:
+    index_path = caches.FeedIndex.get_default_path(json_path)
+    index_path.write_text("invalid")
+
+    index = caches.FeedIndex(index_path)
+    await index.load()
+
+    assert not index.exists
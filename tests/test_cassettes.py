@@ -0,0 +1,133 @@
+import gzip
+import time
+from pathlib import Path
+
+import pytest
+from aiohttp.test_utils import TestServer
+from yarl import URL
+
+from hoyolabrssfeeds import cassettes
+from hoyolabrssfeeds import errors
+from hoyolabrssfeeds import hoyolab
+from hoyolabrssfeeds import models
+from hoyolabrssfeeds import simulator
+
+# ---- CASSETTE TESTS ----
+
+
+def test_request_key() -> None:
+    first = cassettes.Cassette.get_key(
+        "get", URL("https://example.com/api?b=2&a=1"), {"X-Rpc-Language": "de-de"}
+    )
+    second = cassettes.Cassette.get_key(
+        "GET", URL("https://example.com/api?a=1&b=2"), {"X-Rpc-Language": "de-de"}
+    )
+    other_language = cassettes.Cassette.get_key(
+        "GET", URL("https://example.com/api?a=1&b=2"), {"X-Rpc-Language": "en-us"}
+    )
+
+    assert first == second
+    assert first != other_language
+
+
+def test_replay_order(tmp_path: Path) -> None:
+    cassette = cassettes.Cassette(tmp_path)
+    first = cassettes.CassetteEntry(200, "text/plain", b"first", 0)
+    second = cassettes.CassetteEntry(200, "text/plain", b"second", 0)
+
+    cassette.add("key", first)
+    cassette.add("key", second)
+
+    assert len(cassette) == 2
+    assert cassette.next("key") is first
+    assert cassette.next("key") is second
+    assert cassette.next("key") is second
+    assert cassette.next("unknown") is None
+
+
+async def test_save_and_load(tmp_path: Path) -> None:
+    cassette = cassettes.Cassette(tmp_path / "cassette")
+    cassette.add("text", cassettes.CassetteEntry(200, "text/plain", b"Hello", 0.5))
+    cassette.add(
+        "binary", cassettes.CassetteEntry(500, "image/png", b"\x89PNG\xff", 0.25)
+    )
+
+    await cassette.save()
+
+    loaded = cassettes.Cassette(tmp_path / "cassette")
+    await loaded.load()
+
+    text_entry = loaded.next("text")
+    binary_entry = loaded.next("binary")
+
+    assert text_entry is not None and binary_entry is not None
+    assert text_entry.body == b"Hello"
+    assert text_entry.elapsed == 0.5
+    assert binary_entry.status == 500
+    assert binary_entry.content_type == "image/png"
+    assert binary_entry.body == b"\x89PNG\xff"
+
+
+async def test_invalid_cassette(tmp_path: Path) -> None:
+    cassette = cassettes.Cassette(tmp_path)
+
+    with pytest.raises(errors.CassetteError, match="Could not load"):
+        await cassette.load()
+
+    cassette.path.write_bytes(gzip.compress(b'{"interactions": [{}]}'))
+
+    with pytest.raises(errors.CassetteError, match="Invalid cassette"):
+        await cassette.load()
+
+
+async def test_record_and_replay(tmp_path: Path) -> None:
+    sim = simulator.HoyolabSimulator(posts_per_category=3)
+    category = models.FeedItemCategory.INFO
+
+    async with TestServer(sim.create_app()) as server:
+        api = hoyolab.HoyolabNews(
+            models.Game.GENSHIN, base_url=str(server.make_url(simulator.API_PATH))
+        )
+
+        async with cassettes.CassetteSession(cassettes.Cassette(tmp_path)) as session:
+            recorded_list = await api.get_news_list(session, category)
+            recorded_item = await api.get_feed_item(
+                session, int(recorded_list[0]["post"]["post_id"])
+            )
+
+    assert sim.requests["getNewsList"] == 1
+
+    # the simulator is not running anymore
+    async with cassettes.CassetteSession(
+        cassettes.Cassette(tmp_path), replay=True
+    ) as session:
+        replayed_list = await api.get_news_list(session, category)
+        replayed_item = await api.get_feed_item(
+            session, int(replayed_list[0]["post"]["post_id"])
+        )
+
+        with pytest.raises(errors.HoyolabApiError, match="Could not request"):
+            await api.get_post(session, 1)
+
+    assert replayed_list == recorded_list
+    assert replayed_item == recorded_item
+
+
+async def test_timing_replay(tmp_path: Path) -> None:
+    cassette = cassettes.Cassette(tmp_path)
+    url = URL("https://example.com/api")
+    cassette.add(
+        cassette.get_key("GET", url, {}),
+        cassettes.CassetteEntry(200, "text/plain", b"Hello", 0.2),
+    )
+    await cassette.save()
+
+    async with cassettes.CassetteSession(
+        cassettes.Cassette(tmp_path), replay=True, timing=True
+    ) as session:
+        start = time.perf_counter()
+
+        async with session.get(url) as response:
+            assert await response.text() == "Hello"
+
+        assert time.perf_counter() - start >= 0.2
@@ -0,0 +1,21 @@
+import gzip
+
+from hoyolabrssfeeds import compressors
+
+
+def test_compress_gzip() -> None:
+    data = b"Hello World!" * 100
+
+    compressed = compressors.compress_gzip(data)
+
+    assert gzip.decompress(compressed) == data
+
+    # reproducible output
+    assert compressors.compress_gzip(data) == compressed
+
+
+def test_compress_all() -> None:
+    encoded = compressors.compress_all(b"Hello World!")
+
+    assert compressors.GZIP in encoded
+    assert (compressors.ZSTD in encoded) == compressors.is_zstd_available()
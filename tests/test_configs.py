@@ -1,3 +1,4 @@
+import asyncio
 from pathlib import Path
 from platform import system
 from stat import S_IREAD
@@ -63,6 +64,22 @@ async def test_empty_toml_file(config_path: Path) -> None:
         await loader._load_from_file()
 
 
+async def test_watch_config_file(config_path: Path) -> None:
+    loader = configs.FeedConfigLoader(config_path)
+    config_path.write_text("[genshin]")
+
+    changes = loader.watch(interval=0.01)
+    change = asyncio.ensure_future(changes.__anext__())
+
+    await asyncio.sleep(0.05)
+    assert not change.done()
+
+    config_path.write_text("[genshin]\ncategory_size = 3")
+    await asyncio.wait_for(change, timeout=1)
+
+    await changes.aclose()
+
+
 async def test_default_toml_file(config_path: Path) -> None:
     loader = configs.FeedConfigLoader(config_path)
 
@@ -146,6 +163,22 @@ async def test_create_all_feed_configs(
         assert conf.feed_meta.game.name.lower() in toml_config_dict
 
 
+def test_create_feed_config_delta(
+    tmp_path: Path, toml_config_dict: Dict[str, Any]
+) -> None:
+    loader = configs.FeedConfigLoader()
+    toml_config_dict["delta"] = {"path": "ignored"}
+    toml_config_dict["genshin"]["delta"] = {"path": str(tmp_path), "keep": 3}
+
+    genshin_config = loader._create_feed_config(models.Game.GENSHIN, toml_config_dict)
+    zenless_config = loader._create_feed_config(models.Game.ZENLESS, toml_config_dict)
+
+    assert genshin_config.delta_config == models.FeedDeltaConfig(path=tmp_path, keep=3)
+
+    # root delta is no default for game sections
+    assert zenless_config.delta_config is None
+
+
 def test_create_invalid_feed_config() -> None:
     loader = configs.FeedConfigLoader()
 
@@ -156,3 +189,108 @@ def test_create_invalid_feed_config() -> None:
         loader._create_feed_config(
             models.Game.GENSHIN, {"genshin": {"feed": {"Invalid": {}}}}
         )
+
+
+async def test_create_view_configs(
+    mocker: pytest_mock.MockFixture,
+    toml_config_dict: Dict[str, Any],
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    toml_config_dict["view"] = [
+        {
+            "title": "All Events",
+            "games": ["genshin", "zenless"],
+            "categories": ["events"],
+            "max_items": 10,
+            "feed": {"json": {"path": str(json_feed_file_writer_config.path)}},
+        }
+    ]
+
+    mocker.patch(
+        "hoyolabrssfeeds.configs.FeedConfigLoader._load_from_file",
+        spec=True,
+        return_value=toml_config_dict,
+    )
+
+    loader = configs.FeedConfigLoader()
+    view_configs = await loader.get_all_view_configs()
+
+    assert len(view_configs) == 1
+    assert view_configs[0].view_meta.games == [
+        models.Game.GENSHIN,
+        models.Game.ZENLESS,
+    ]
+    assert view_configs[0].view_meta.categories == [models.FeedItemCategory.EVENTS]
+    assert view_configs[0].writer_configs[0].path == json_feed_file_writer_config.path
+
+    # views are not merged into the game sections
+    feed_configs = await loader.get_all_feed_configs()
+    assert len(feed_configs) == 2
+
+
+async def test_create_hook_configs(
+    mocker: pytest_mock.MockFixture, toml_config_dict: Dict[str, Any]
+) -> None:
+    loader = configs.FeedConfigLoader()
+    toml_config_dict["hook"] = [
+        {"webhook": "http://localhost:8000/hook", "batch_size": 10},
+        {"command": ["notify-send", "Hoyolab"]},
+    ]
+
+    mocker.patch(
+        "hoyolabrssfeeds.configs.FeedConfigLoader._load_from_file",
+        spec=True,
+        return_value=toml_config_dict,
+    )
+
+    hook_configs = await loader.get_all_hook_configs()
+
+    assert len(hook_configs) == 2
+    assert hook_configs[0].batch_size == 10
+    assert hook_configs[1].command == ["notify-send", "Hoyolab"]
+
+    # hooks are no defaults for the game sections
+    feed_configs = await loader.get_all_feed_configs()
+    assert len(feed_configs) == 2
+
+
+async def test_load_config_once(
+    mocker: pytest_mock.MockFixture, toml_config_dict: Dict[str, Any]
+) -> None:
+    mocked_load = mocker.patch(
+        "hoyolabrssfeeds.configs.FeedConfigLoader._load_from_file",
+        spec=True,
+        return_value=toml_config_dict,
+    )
+
+    loader = configs.FeedConfigLoader()
+    config = await loader.load_config()
+
+    # the parsed config is shared by the getters, so it must not be modified
+    for _ in range(2):
+        assert len(await loader.get_all_feed_configs(config)) == 2
+
+    assert await loader.get_all_view_configs(config) == []
+    assert await loader.get_all_hook_configs(config) == []
+
+    mocked_load.assert_awaited_once()
+
+
+def test_create_invalid_hook_config() -> None:
+    loader = configs.FeedConfigLoader()
+
+    with pytest.raises(errors.ConfigFormatError, match="exactly one"):
+        loader._create_hook_config({"command": ["a"], "socket": "b"})
+
+    with pytest.raises(errors.ConfigFormatError, match="Invalid config"):
+        loader._create_hook_config({"webhook": "invalid"})
+
+
+def test_create_invalid_view_config() -> None:
+    loader = configs.FeedConfigLoader()
+
+    with pytest.raises(errors.ConfigFormatError, match="Could not find"):
+        loader._create_view_config({"title": "Test"})
+
+    with pytest.raises(errors.ConfigFormatError, match="Invalid config"):
+        loader._create_view_config({"title": "Test", "games": ["invalid"], "feed": {}})
@@ -0,0 +1,86 @@
+import json
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from hoyolabrssfeeds import deltas
+from hoyolabrssfeeds import errors
+from hoyolabrssfeeds import models
+
+# ---- DELTA PUBLISHER TESTS ----
+
+
+def get_changes(item_id: int = 42) -> List[models.FeedItemChange]:
+    revision = datetime(2022, 10, 3, 16, tzinfo=timezone.utc)
+
+    return [
+        models.FeedItemChange(
+            models.FeedItemChangeType.ADDED,
+            item_id,
+            models.FeedItemCategory.INFO,
+            revision,
+        ),
+        models.FeedItemChange(
+            models.FeedItemChangeType.REMOVED,
+            item_id - 10,
+            models.FeedItemCategory.INFO,
+            revision,
+        ),
+    ]
+
+
+async def test_publish_delta(tmp_path: Path, feed_meta: models.FeedMeta) -> None:
+    publisher = deltas.DeltaPublisher(models.FeedDeltaConfig(path=tmp_path / "delta"))
+
+    assert await publisher.publish(feed_meta, []) is None
+    assert not publisher.latest_path.exists()
+
+    assert await publisher.publish(feed_meta, get_changes()) == 1
+
+    latest = json.loads(publisher.latest_path.read_text())
+    manifest = json.loads(publisher.get_manifest_path(1).read_text())
+
+    assert latest["sequence"] == 1
+    assert latest["manifest"] == "1.json"
+    assert manifest["sequence"] == 1
+    assert manifest["added"] == [
+        {"id": "42", "category": "Info", "revision": "2022-10-03T16:00:00+00:00"}
+    ]
+    assert manifest["updated"] == []
+    assert [change["id"] for change in manifest["removed"]] == ["32"]
+
+
+async def test_publish_delta_sequence(
+    tmp_path: Path, feed_meta: models.FeedMeta
+) -> None:
+    config = models.FeedDeltaConfig(path=tmp_path, keep=2)
+
+    for i in range(3):
+        await deltas.DeltaPublisher(config).publish(feed_meta, get_changes(i))
+
+    publisher = deltas.DeltaPublisher(config)
+
+    # sequence continues after a restart and old manifests are removed
+    assert json.loads(publisher.latest_path.read_text())["oldest"] == 2
+    assert not publisher.get_manifest_path(1).exists()
+    assert publisher.get_manifest_path(2).exists()
+
+    # broken index does not reset the sequence
+    publisher.latest_path.write_text("broken")
+    assert await publisher.publish(feed_meta, get_changes()) == 4
+
+
+async def test_publish_delta_io_error(
+    tmp_path: Path, feed_meta: models.FeedMeta
+) -> None:
+    # delta path is an existing file
+    delta_path = tmp_path / "delta"
+    delta_path.touch()
+
+    publisher = deltas.DeltaPublisher(models.FeedDeltaConfig(path=delta_path))
+
+    with pytest.raises(errors.FeedIOError, match="Could not write delta"):
+        await publisher.publish(feed_meta, get_changes())
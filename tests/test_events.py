@@ -0,0 +1,241 @@
+import asyncio
+import json
+import sys
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from platform import system
+from typing import List
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from hoyolabrssfeeds import events
+from hoyolabrssfeeds import models
+
+
+class RecordingSink(events.AbstractEventSink):
+    def __init__(self, delay: float = 0, fail: bool = False) -> None:
+        self.batches: List[List[events.FeedEvent]] = []
+        self.delay = delay
+        self.fail = fail
+
+    async def send(self, feed_events: List[events.FeedEvent]) -> None:
+        await asyncio.sleep(self.delay)
+
+        if self.fail:
+            raise OSError("Could not send!")
+
+        self.batches.append(feed_events)
+
+
+def get_events(
+    feed_meta: models.FeedMeta, feed_item: models.FeedItem, amount: int = 1
+) -> List[events.FeedEvent]:
+    revision = datetime(2022, 10, 3, 16, tzinfo=timezone.utc)
+
+    return [
+        events.FeedEvent(
+            feed_meta,
+            models.FeedItemChange(
+                models.FeedItemChangeType.ADDED,
+                feed_item.id + i,
+                feed_item.category,
+                revision,
+            ),
+            feed_item,
+        )
+        for i in range(amount)
+    ]
+
+
+# ---- EVENT TESTS ----
+
+
+def test_event_dict(feed_meta: models.FeedMeta, feed_item: models.FeedItem) -> None:
+    added_event = get_events(feed_meta, feed_item)[0]
+    removed_event = events.FeedEvent(
+        feed_meta,
+        models.FeedItemChange(
+            models.FeedItemChangeType.REMOVED,
+            feed_item.id,
+            feed_item.category,
+            feed_item.published,
+        ),
+    )
+
+    added_dict = added_event.to_dict()
+
+    assert added_dict["type"] == "item_added"
+    assert added_dict["id"] == str(feed_item.id)
+    assert added_dict["game"] == "genshin"
+    assert added_dict["item"]["title"] == feed_item.title
+
+    assert removed_event.to_dict()["type"] == "item_removed"
+    assert "item" not in removed_event.to_dict()
+
+
+# ---- EVENT HOOK TESTS ----
+
+
+async def test_hook_batches(
+    feed_meta: models.FeedMeta, feed_item: models.FeedItem
+) -> None:
+    sink = RecordingSink()
+    hook = events.EventHook(sink, queue_size=10, batch_size=3)
+
+    await hook.emit(get_events(feed_meta, feed_item, 5))
+    await hook.flush()
+
+    assert [len(batch) for batch in sink.batches] == [3, 2]
+
+    # hook can be used again after a flush
+    await hook.emit(get_events(feed_meta, feed_item))
+    await hook.flush()
+
+    assert len(sink.batches) == 3
+
+
+async def test_hook_backpressure(
+    feed_meta: models.FeedMeta, feed_item: models.FeedItem
+) -> None:
+    sink = RecordingSink(delay=0.05)
+    hook = events.EventHook(sink, queue_size=1, batch_size=1)
+
+    # emitting waits until the slow sink has taken the events from the queue
+    emit_task = asyncio.create_task(hook.emit(get_events(feed_meta, feed_item, 3)))
+    await asyncio.sleep(0.01)
+
+    assert not emit_task.done()
+
+    await emit_task
+    await hook.flush()
+
+    assert sum(len(batch) for batch in sink.batches) == 3
+
+
+async def test_hook_failing_sink(
+    caplog: pytest.LogCaptureFixture,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+) -> None:
+    hook = events.EventHook(RecordingSink(fail=True))
+
+    await hook.emit(get_events(feed_meta, feed_item))
+    await hook.flush()
+
+    assert "Could not send 1 events" in caplog.text
+
+
+async def test_hook_broken_sink(
+    caplog: pytest.LogCaptureFixture,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+) -> None:
+    class BrokenSink(RecordingSink):
+        async def send(self, feed_events: List[events.FeedEvent]) -> None:
+            raise RuntimeError("Broken sink!")
+
+    hook = events.EventHook(BrokenSink())
+
+    await hook.emit(get_events(feed_meta, feed_item))
+    await hook.flush()
+
+    # unexpected errors are logged with their traceback
+    assert "Unexpected error while sending 1 events" in caplog.text
+    assert "RuntimeError: Broken sink!" in caplog.text
+
+
+async def test_hook_timeout(
+    caplog: pytest.LogCaptureFixture,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+) -> None:
+    hook = events.EventHook(RecordingSink(delay=10), timeout=0.01)
+
+    await hook.emit(get_events(feed_meta, feed_item))
+    await hook.flush()
+
+    assert "Could not send 1 events" in caplog.text
+
+
+def test_hook_from_config(tmp_path: Path) -> None:
+    command_hook = events.EventHook.from_config(
+        models.EventHookConfig(command=["notify"])
+    )
+    socket_hook = events.EventHook.from_config(
+        models.EventHookConfig(socket=tmp_path / "events.sock")
+    )
+
+    assert isinstance(command_hook.sink, events.CommandEventSink)
+    assert isinstance(socket_hook.sink, events.UnixSocketEventSink)
+
+    with pytest.raises(ValueError):
+        events.EventHook.from_config(models.EventHookConfig())
+
+
+# ---- EVENT SINK TESTS ----
+
+
+async def test_webhook_sink(
+    feed_meta: models.FeedMeta, feed_item: models.FeedItem
+) -> None:
+    received = []
+
+    async def handle(request: web.Request) -> web.Response:
+        received.append(await request.json())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post("/hook", handle)
+
+    async with TestServer(app) as server:
+        sink = events.WebhookEventSink(str(server.make_url("/hook")))
+        await sink.send(get_events(feed_meta, feed_item, 2))
+
+    assert len(received) == 1
+    assert len(received[0]["events"]) == 2
+
+
+async def test_command_sink(
+    tmp_path: Path, feed_meta: models.FeedMeta, feed_item: models.FeedItem
+) -> None:
+    out_path = tmp_path / "events.json"
+    script = "import sys; open(sys.argv[1], 'wb').write(sys.stdin.buffer.read())"
+
+    sink = events.CommandEventSink([sys.executable, "-c", script, str(out_path)])
+    await sink.send(get_events(feed_meta, feed_item))
+
+    assert json.loads(out_path.read_text())["events"][0]["type"] == "item_added"
+
+    failing_sink = events.CommandEventSink([sys.executable, "-c", "exit(1)"])
+
+    with pytest.raises(OSError, match="return code 1"):
+        await failing_sink.send(get_events(feed_meta, feed_item))
+
+
+@pytest.mark.skipif(system() == "Windows", reason="Unix sockets not available")
+async def test_unix_socket_sink(
+    tmp_path: Path, feed_meta: models.FeedMeta, feed_item: models.FeedItem
+) -> None:
+    lines = []
+
+    async def handle(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        lines.append(await reader.readline())
+        writer.close()
+
+    socket_path = tmp_path / "events.sock"
+    server = await asyncio.start_unix_server(handle, str(socket_path))
+
+    async with server:
+        sink = events.UnixSocketEventSink(socket_path)
+        await sink.send(get_events(feed_meta, feed_item))
+
+        # wait for the handler
+        await asyncio.sleep(0.01)
+
+    assert len(lines) == 1
+    assert json.loads(lines[0])["events"][0]["id"] == str(feed_item.id)
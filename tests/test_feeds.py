@@ -1,10 +1,24 @@
+import asyncio
+import json
 from datetime import datetime
-from typing import List, Any
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Coroutine
+from typing import Dict
+from typing import List
 
 import aiohttp
 import pytest
 import pytest_mock
 
+from hoyolabrssfeeds import blobs
+from hoyolabrssfeeds import caches
+from hoyolabrssfeeds import deltas
+from hoyolabrssfeeds import errors
+from hoyolabrssfeeds import events
 from hoyolabrssfeeds import feeds
 from hoyolabrssfeeds import models
 from hoyolabrssfeeds.loaders import AbstractFeedFileLoader
@@ -90,7 +104,9 @@ async def test_category_feed_new_item(
         spec=True,
         return_value=[
             models.FeedItemMeta(id=new_item.id, last_modified=new_item.updated),
-            models.FeedItemMeta(id=feed_item.id, last_modified=feed_item.updated),
+            models.FeedItemMeta(
+                id=feed_item.id, last_modified=feed_item.updated or feed_item.published
+            ),
         ],
     )
 
@@ -102,7 +118,7 @@ async def test_category_feed_new_item(
 
     game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
     updated_feed = await game_feed._update_category_feed(
-        client_session, models.FeedItemCategory.INFO, [feed_item]
+        client_session, models.FeedItemCategory.INFO, completed([feed_item])
     )
 
     mocked_metas.assert_awaited()
@@ -131,6 +147,7 @@ async def test_category_feed_updated_item(
 
     updated_item = feed_item.copy()
     updated_item.updated = datetime.now().astimezone()
+    updated_item.content = "<p>Hello updated World!</p>"
 
     other_item = feed_item.copy()
     other_item.id += 1
@@ -139,7 +156,10 @@ async def test_category_feed_updated_item(
         "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
         spec=True,
         return_value=[
-            models.FeedItemMeta(id=other_item.id, last_modified=other_item.updated),
+            models.FeedItemMeta(
+                id=other_item.id,
+                last_modified=other_item.updated or other_item.published,
+            ),
             models.FeedItemMeta(id=updated_item.id, last_modified=updated_item.updated),
         ],
     )
@@ -152,7 +172,9 @@ async def test_category_feed_updated_item(
 
     game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
     updated_feed = await game_feed._update_category_feed(
-        client_session, models.FeedItemCategory.INFO, [other_item, feed_item]
+        client_session,
+        models.FeedItemCategory.INFO,
+        completed([other_item, feed_item]),
     )
 
     mocked_metas.assert_awaited()
@@ -166,9 +188,17 @@ async def test_category_feed_updated_item(
 
     # feed is sorted by ids even if an item was updated
     assert updated_feed == [other_item, updated_item]
+    assert game_feed.changes == [
+        models.FeedItemChange(
+            models.FeedItemChangeType.UPDATED,
+            updated_item.id,
+            updated_item.category,
+            updated_item.updated,
+        )
+    ]
 
 
-async def test_category_feed_unchanged(
+async def test_category_feed_unchanged_content(
     mocker: pytest_mock.MockFixture,
     client_session: aiohttp.ClientSession,
     feed_meta: models.FeedMeta,
@@ -176,6 +206,68 @@ async def test_category_feed_unchanged(
     mocked_loader: AbstractFeedFileLoader,
     feed_item: models.FeedItem,
 ) -> None:
+    # only the modification time and whitespace changed
+    touched_item = feed_item.copy()
+    touched_item.updated = datetime.now().astimezone()
+    touched_item.content = "<p>Hello  World!</p>\n"
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
+        spec=True,
+        return_value=[
+            models.FeedItemMeta(id=touched_item.id, last_modified=touched_item.updated)
+        ],
+    )
+
+    mocked_item = mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_feed_item",
+        spec=True,
+        return_value=touched_item,
+    )
+
+    feed_index = caches.FeedIndex()
+    feed_index.update([feed_item])
+
+    game_feed = feeds.GameFeed(
+        feed_meta, mocked_writers, mocked_loader, feed_index=feed_index
+    )
+    category_feed = await game_feed._update_category_feed(
+        client_session, models.FeedItemCategory.INFO, completed([feed_item])
+    )
+
+    mocked_item.assert_awaited_once()
+
+    # the previous version is kept and only the index knows the new revision
+    assert not game_feed.was_updated
+    assert category_feed == [feed_item]
+    assert game_feed.changes == []
+    assert game_feed._touched_revisions == {touched_item.id: touched_item.updated}
+
+    feed_index.touch(game_feed._touched_revisions)
+    assert feed_index.get_revision(touched_item.id) == touched_item.updated
+
+    # the next run does not fetch the post again
+    await game_feed._update_category_feed(
+        client_session, models.FeedItemCategory.INFO, completed([feed_item])
+    )
+
+    mocked_item.assert_awaited_once()
+
+
+async def test_feed_unchanged_content_compact(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_item: models.FeedItem,
+) -> None:
+    # the compact writer minifies the content, so the loaded item differs
+    feed_meta.categories = [models.FeedItemCategory.INFO]
+    json_feed_file_writer_config.compact = True
+    feed_item.content = "<p>Hello  World!</p>\n<p>&nbsp;</p>"
+
+    assert feed_item.updated is not None
+
     mocked_metas = mocker.patch(
         "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
         spec=True,
@@ -184,13 +276,197 @@ async def test_category_feed_unchanged(
         ],
     )
 
+    mocked_item = mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_feed_item",
+        spec=True,
+        return_value=feed_item,
+    )
+
+    writers: List[AbstractFeedFileWriter] = [
+        JSONFeedFileWriter(json_feed_file_writer_config)
+    ]
+    await feeds.GameFeed(feed_meta, writers).create_feed(client_session)
+
+    # only the modification time of the post is bumped in the next runs, so the
+    # index must not take the fingerprints of the loaded (minified) items
+    for hours in range(1, 3):
+        touched_item = feed_item.copy()
+        touched_item.updated = feed_item.updated + timedelta(hours=hours)
+
+        mocked_metas.return_value = [
+            models.FeedItemMeta(id=touched_item.id, last_modified=touched_item.updated)
+        ]
+        mocked_item.return_value = touched_item
+
+        game_feed = feeds.GameFeed(feed_meta, writers)
+        await game_feed.create_feed(client_session)
+
+        assert not game_feed.was_updated
+        assert game_feed._touched_revisions == {touched_item.id: touched_item.updated}
+
+    assert mocked_item.await_count == 3
+
+
+async def test_paged_feed_runs(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_item: models.FeedItem,
+) -> None:
+    feed_meta.categories = [models.FeedItemCategory.INFO]
+    feed_meta.category_size = 4
+    json_feed_file_writer_config.page_size = 2
+
+    mocked_metas = mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas", spec=True
+    )
+    mocked_item = mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_feed_item", spec=True
+    )
+
+    writers: List[AbstractFeedFileWriter] = [
+        JSONFeedFileWriter(json_feed_file_writer_config)
+    ]
+
+    # a new post per run, so the oldest posts are moved to archive pages
+    for post_id in range(1, 7):
+        new_item = feed_item.copy(update={"id": post_id})
+        latest_items = [feed_item.copy(update={"id": i}) for i in range(post_id, 0, -1)]
+
+        mocked_metas.return_value = [
+            models.FeedItemMeta(
+                id=item.id, last_modified=item.updated or item.published
+            )
+            for item in latest_items[: feed_meta.category_size]
+        ]
+        mocked_item.return_value = new_item
+
+        game_feed = feeds.GameFeed(feed_meta, writers)
+        await game_feed.create_feed(client_session)
+
+        # archived posts are neither fetched again nor reported as removed
+        assert [(c.change_type, c.id) for c in game_feed.changes] == [
+            (models.FeedItemChangeType.ADDED, post_id)
+        ]
+
+    assert mocked_item.await_count == 6
+
+
+async def test_category_feed_changes(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[AbstractFeedFileWriter],
+    mocked_loader: AbstractFeedFileLoader,
+    feed_item: models.FeedItem,
+) -> None:
+    new_item = feed_item.copy()
+    new_item.id += 1
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
+        spec=True,
+        return_value=[
+            models.FeedItemMeta(id=new_item.id, last_modified=new_item.published)
+        ],
+    )
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_feed_item",
+        spec=True,
+        return_value=new_item,
+    )
+
+    game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
+    await game_feed._update_category_feed(
+        client_session, models.FeedItemCategory.INFO, completed([feed_item])
+    )
+
+    # the new item pushes the old item out of the feed (category_size = 1)
+    assert [(c.change_type, c.id) for c in game_feed.changes] == [
+        (models.FeedItemChangeType.ADDED, new_item.id),
+        (models.FeedItemChangeType.REMOVED, feed_item.id),
+    ]
+
+
+async def test_category_feed_events(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[AbstractFeedFileWriter],
+    mocked_loader: AbstractFeedFileLoader,
+    feed_item: models.FeedItem,
+) -> None:
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
+        spec=True,
+        return_value=[
+            models.FeedItemMeta(id=feed_item.id, last_modified=feed_item.published)
+        ],
+    )
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_feed_item",
+        spec=True,
+        return_value=feed_item,
+    )
+
+    mocked_hook = mocker.AsyncMock(spec=events.EventHook)
+    game_feed = feeds.GameFeed(
+        feed_meta, mocked_writers, mocked_loader, event_hooks=[mocked_hook]
+    )
+
+    feed_meta.categories = [models.FeedItemCategory.INFO]
+    mocker.patch.object(mocked_loader, "get_feed_items", return_value=[])
+
+    # no events are emitted if the feed files could not be written
+    for writer in mocked_writers:
+        mocker.patch.object(writer, "write_feed", side_effect=errors.FeedIOError)
+
+    with pytest.raises(errors.FeedIOError):
+        await game_feed.create_feed(client_session)
+
+    mocked_hook.emit.assert_not_awaited()
+
+    # events are emitted after the feed files were written
+    for writer in mocked_writers:
+        mocker.patch.object(writer, "write_feed", return_value=None)
+
+    await game_feed.create_feed(client_session)
+
+    mocked_hook.emit.assert_awaited_once()
+    emitted_events = mocked_hook.emit.call_args.args[0]
+
+    assert [e.event_type for e in emitted_events] == ["item_added"]
+    assert emitted_events[0].item == feed_item
+
+
+async def test_category_feed_unchanged(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[AbstractFeedFileWriter],
+    mocked_loader: AbstractFeedFileLoader,
+    feed_item: models.FeedItem,
+) -> None:
+    mocked_metas = mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
+        spec=True,
+        return_value=[
+            models.FeedItemMeta(
+                id=feed_item.id, last_modified=feed_item.updated or feed_item.published
+            )
+        ],
+    )
+
     mocked_item = mocker.patch(
         "hoyolabrssfeeds.feeds.HoyolabNews.get_feed_item", spec=True
     )
 
     game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
     updated_feed = await game_feed._update_category_feed(
-        client_session, models.FeedItemCategory.INFO, [feed_item]
+        client_session, models.FeedItemCategory.INFO, completed([feed_item])
     )
 
     mocked_metas.assert_awaited()
@@ -214,7 +490,7 @@ async def test_create_feed(
     mocked_update_feed = mocker.patch(
         "hoyolabrssfeeds.feeds.GameFeed._update_category_feed",
         spec=True,
-        side_effect=category_feeds,
+        side_effect=awaiting_side_effect(category_feeds),
     )
 
     mocked_was_updated = mocker.patch(
@@ -241,6 +517,50 @@ async def test_create_feed(
         writer.write_feed.assert_called_with(feed_meta, combined_feed)
 
 
+async def test_create_feed_delta(
+    mocker: pytest_mock.MockFixture,
+    tmp_path: Path,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+    category_feeds: List[List[models.FeedItem]],
+) -> None:
+    async def update_category_feed(
+        session: aiohttp.ClientSession,
+        category: models.FeedItemCategory,
+        feed_items: Awaitable[List[models.FeedItem]],
+    ) -> List[models.FeedItem]:
+        await feed_items
+        items = category_feeds[category - 1]
+        game_feed._was_updated = True
+        game_feed._changes.extend(
+            models.FeedItemChange(
+                models.FeedItemChangeType.ADDED, i.id, i.category, i.published
+            )
+            for i in items
+        )
+        return items
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.GameFeed._update_category_feed",
+        spec=True,
+        side_effect=update_category_feed,
+    )
+
+    delta_publisher = deltas.DeltaPublisher(models.FeedDeltaConfig(path=tmp_path))
+    game_feed = feeds.GameFeed(
+        feed_meta, mocked_writers, mocked_loader, delta_publisher=delta_publisher
+    )
+
+    await game_feed.create_feed()
+
+    latest = json.loads(delta_publisher.latest_path.read_text())
+    manifest = json.loads(delta_publisher.get_manifest_path(1).read_text())
+
+    assert latest["sequence"] == 1
+    assert len(manifest["added"]) == len(category_feeds)
+
+
 async def test_create_feed_unchanged(
     mocker: pytest_mock.MockFixture,
     client_session: aiohttp.ClientSession,
@@ -256,7 +576,7 @@ async def test_create_feed_unchanged(
     mocked_update_feed = mocker.patch(
         "hoyolabrssfeeds.feeds.GameFeed._update_category_feed",
         spec=True,
-        side_effect=category_feeds,
+        side_effect=awaiting_side_effect(category_feeds),
     )
 
     game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
@@ -273,6 +593,36 @@ async def test_create_feed_unchanged(
         writer.write_feed.assert_not_called()
 
 
+async def test_create_feed_recovered(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+    category_feeds: List[List[models.FeedItem]],
+    combined_feed: List[models.FeedItem],
+) -> None:
+    # the unchanged items were recovered from another output of the feed
+    mocked_loader.get_feed_items.return_value = combined_feed
+    mocked_loader.was_recovered = True
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.GameFeed._update_category_feed",
+        spec=True,
+        side_effect=awaiting_side_effect(category_feeds),
+    )
+
+    game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
+
+    await game_feed.create_feed(client_session)
+
+    assert not game_feed.was_updated
+
+    for writer in mocked_writers:
+        writer.invalidate.assert_called_once()
+        writer.write_feed.assert_awaited_once_with(feed_meta, combined_feed)
+
+
 async def test_create_feed_one_category(
     mocker: pytest_mock.MockFixture,
     client_session: aiohttp.ClientSession,
@@ -286,7 +636,7 @@ async def test_create_feed_one_category(
     mocked_update_feed = mocker.patch(
         "hoyolabrssfeeds.feeds.GameFeed._update_category_feed",
         spec=True,
-        return_value=[feed_item],
+        side_effect=awaiting_side_effect([[feed_item]]),
     )
 
     # needed for writers to trigger
@@ -308,6 +658,50 @@ async def test_create_feed_one_category(
         writer.write_feed.assert_called_with(feed_meta, [feed_item])
 
 
+async def test_category_feed_skipped_item(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[AbstractFeedFileWriter],
+    mocked_loader: AbstractFeedFileLoader,
+    feed_item: models.FeedItem,
+) -> None:
+    item_meta = models.FeedItemMeta(
+        id=feed_item.id, last_modified=datetime.now().astimezone()
+    )
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
+        spec=True,
+        return_value=[item_meta],
+    )
+
+    mocked_item = mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_feed_item",
+        spec=True,
+        side_effect=errors.HoyolabApiError("Broken post!"),
+    )
+
+    game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
+
+    for _ in range(2):
+        await game_feed._update_category_feed(
+            client_session, models.FeedItemCategory.INFO, completed([])
+        )
+
+    # the second run skips the known broken post
+    mocked_item.assert_called_once()
+    assert game_feed.skipped_ids == {feed_item.id}
+
+    # modified posts are requested again
+    item_meta.last_modified += timedelta(minutes=1)
+    await game_feed._update_category_feed(
+        client_session, models.FeedItemCategory.INFO, completed([])
+    )
+
+    assert mocked_item.call_count == 2
+
+
 def test_collection_from_config(
     feed_config: models.FeedConfig, feed_config_no_loader: models.FeedConfig
 ) -> None:
@@ -361,3 +755,613 @@ async def test_invalid_feed_collection(
             [mocked_writers],
             [mocked_loader, mocked_loader, mocked_loader],
         )
+
+
+async def test_create_feed_overlapped_loading(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+) -> None:
+    feed_meta.categories = [feed_item.category]
+    list_requested = asyncio.Event()
+
+    async def get_metas(*args: Any) -> List[models.FeedItemMeta]:
+        list_requested.set()
+        return []
+
+    async def get_items() -> List[models.FeedItem]:
+        # the list request must not wait for the local feed
+        await asyncio.wait_for(list_requested.wait(), 1)
+        return [feed_item]
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
+        spec=True,
+        side_effect=get_metas,
+    )
+    mocked_loader.get_feed_items.side_effect = get_items
+
+    game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
+    await game_feed.create_feed(client_session)
+
+    mocked_loader.get_feed_items.assert_awaited_once()
+    assert not game_feed.was_updated
+
+
+async def test_category_feed_failed_item(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[AbstractFeedFileWriter],
+    mocked_loader: AbstractFeedFileLoader,
+    feed_item: models.FeedItem,
+) -> None:
+    feed_meta.category_size = 3
+
+    outdated_item = feed_item.copy()
+    outdated_item.id += 1
+
+    new_item = feed_item.copy()
+    new_item.id += 2
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
+        spec=True,
+        return_value=[
+            models.FeedItemMeta(
+                id=new_item.id, last_modified=datetime.now().astimezone()
+            ),
+            models.FeedItemMeta(
+                id=outdated_item.id, last_modified=datetime.now().astimezone()
+            ),
+            models.FeedItemMeta(
+                id=feed_item.id, last_modified=datetime.now().astimezone()
+            ),
+        ],
+    )
+
+    async def get_feed_item(
+        session: aiohttp.ClientSession, item_id: int
+    ) -> models.FeedItem:
+        if item_id == feed_item.id:
+            raise errors.HoyolabApiError("Broken post!")
+        return new_item if item_id == new_item.id else outdated_item
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_feed_item",
+        spec=True,
+        side_effect=get_feed_item,
+    )
+
+    game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
+    updated_feed = await game_feed._update_category_feed(
+        client_session,
+        models.FeedItemCategory.INFO,
+        completed([outdated_item.copy(), feed_item]),
+    )
+
+    # the failed post keeps its previous version
+    assert updated_feed == [new_item, outdated_item, feed_item]
+    assert game_feed.failed_ids == {feed_item.id}
+    assert game_feed.was_updated
+
+
+async def test_category_feed_temporary_failures(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[AbstractFeedFileWriter],
+    mocked_loader: AbstractFeedFileLoader,
+    feed_item: models.FeedItem,
+) -> None:
+    feed_meta.category_size = 3
+    last_modified = datetime.now().astimezone()
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
+        spec=True,
+        return_value=[
+            models.FeedItemMeta(id=item_id, last_modified=last_modified)
+            for item_id in [1, 2, 3]
+        ],
+    )
+
+    failures: Dict[int, Exception] = {
+        1: errors.HoyolabApiError("Post not found!"),
+        2: errors.HoyolabTemporaryError("Server error!"),
+        3: aiohttp.ClientConnectionError("Connection reset!"),
+    }
+    mocked_get_feed_item = mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_feed_item",
+        spec=True,
+        side_effect=lambda session, item_id: failures[item_id],
+    )
+
+    negative_cache = caches.NegativeCache()
+    game_feed = feeds.GameFeed(
+        feed_meta, mocked_writers, mocked_loader, negative_cache=negative_cache
+    )
+
+    for _ in range(2):
+        await game_feed._update_category_feed(
+            client_session, models.FeedItemCategory.INFO, completed([])
+        )
+
+    # only the broken post is skipped, network errors are retried
+    fetched_ids = [call.args[1] for call in mocked_get_feed_item.call_args_list]
+    assert sorted(fetched_ids) == [1, 2, 2, 3, 3]
+    assert game_feed.failed_ids == {1, 2, 3}
+    assert len(negative_cache) == 1
+
+
+async def test_create_feed_failed_category(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+) -> None:
+    feed_meta.categories = [
+        models.FeedItemCategory.INFO,
+        models.FeedItemCategory.EVENTS,
+    ]
+
+    old_event = feed_item.copy()
+    old_event.category = models.FeedItemCategory.EVENTS
+    old_event.id -= 1
+    mocked_loader.get_feed_items.return_value = [old_event]
+
+    async def update_category_feed(
+        session: aiohttp.ClientSession,
+        category: models.FeedItemCategory,
+        feed_items: Awaitable[List[models.FeedItem]],
+    ) -> List[models.FeedItem]:
+        await feed_items
+        if category == models.FeedItemCategory.EVENTS:
+            raise errors.HoyolabApiError("Could not request!")
+        game_feed._was_updated = True
+        return [feed_item]
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.GameFeed._update_category_feed",
+        spec=True,
+        side_effect=update_category_feed,
+    )
+
+    game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
+
+    with pytest.raises(errors.HoyolabApiError):
+        await game_feed.create_feed(client_session)
+
+    # updates of the other category are saved anyway
+    for writer in mocked_writers:
+        writer.write_feed.assert_called_with(feed_meta, [feed_item, old_event])
+
+
+async def test_create_feed_collections_failed_feed(
+    mocker: pytest_mock.MockFixture,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[AbstractFeedFileWriter],
+    mocked_loader: AbstractFeedFileLoader,
+) -> None:
+    mocked_create = mocker.patch(
+        "hoyolabrssfeeds.feeds.GameFeed.create_feed",
+        spec=True,
+        side_effect=[errors.HoyolabApiError("Failed!"), None],
+    )
+
+    collection = feeds.GameFeedCollection(
+        [feed_meta, feed_meta],
+        [mocked_writers, mocked_writers],
+        [mocked_loader, mocked_loader],
+    )
+
+    with pytest.raises(errors.HoyolabApiError):
+        await collection.create_feeds()
+
+    assert mocked_create.await_count == 2
+
+
+def create_view_feed(
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+    category_feeds: Dict[models.FeedItemCategory, List[models.FeedItem]],
+) -> feeds.GameFeed:
+    game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
+    game_feed._category_feeds = category_feeds
+
+    return game_feed
+
+
+def test_view_select_items(
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+) -> None:
+    items = []
+    for i in range(6):
+        item = feed_item.copy()
+        item.id = 100 - i
+        item.category = [c for c in models.FeedItemCategory][i % 3]
+        item.published = datetime.now().astimezone() - timedelta(days=i)
+        items.append(item)
+
+    first_feed = create_view_feed(
+        feed_meta,
+        mocked_writers,
+        mocked_loader,
+        {c: [i for i in items if i.category == c] for c in models.FeedItemCategory},
+    )
+
+    other_meta = feed_meta.copy()
+    other_meta.game = models.Game.STARRAIL
+    other_feed = create_view_feed(
+        other_meta,
+        mocked_writers,
+        mocked_loader,
+        {models.FeedItemCategory.INFO: [items[0]]},
+    )
+
+    view_meta = models.FeedViewMeta(title="All")
+    view = feeds.FeedView(view_meta, mocked_writers)
+
+    # merged by id without duplicates
+    assert view.select_items([first_feed, other_feed]) == items
+
+    view_meta.games = [models.Game.STARRAIL]
+    assert view.select_items([first_feed, other_feed]) == [items[0]]
+
+    view_meta.games = []
+    view_meta.categories = [models.FeedItemCategory.NOTICES]
+    assert view.select_items([first_feed, other_feed]) == [items[0], items[3]]
+
+    view_meta.categories = []
+    view_meta.max_items = 2
+    assert view.select_items([first_feed, other_feed]) == items[:2]
+
+    view_meta.max_items = None
+    view_meta.max_age = 2
+    assert view.select_items([first_feed, other_feed]) == items[:2]
+
+
+def test_view_feed_meta(
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+) -> None:
+    game_feed = create_view_feed(feed_meta, mocked_writers, mocked_loader, {})
+    view = feeds.FeedView(models.FeedViewMeta(title="All Events!"), mocked_writers)
+
+    view_feed_meta = view.create_feed_meta([game_feed])
+
+    assert view_feed_meta.title == "All Events!"
+    assert view_feed_meta.game == feed_meta.game
+    assert view_feed_meta.language == feed_meta.language
+    assert view_feed_meta.id is not None
+    assert view_feed_meta.id.endswith("/all-events")
+
+    # the view config takes precedence over the game feeds
+    view.view_meta.games = [models.Game.STARRAIL, feed_meta.game]
+    view.view_meta.languages = [models.Language.ENGLISH, feed_meta.language]
+    view_feed_meta = view.create_feed_meta([game_feed])
+
+    assert view_feed_meta.game == models.Game.STARRAIL
+    assert view_feed_meta.language == models.Language.ENGLISH
+
+    with pytest.raises(errors.ConfigFormatError, match="does not match"):
+        view.create_feed_meta([])
+
+
+def test_view_preferred_language(
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+) -> None:
+    english_meta = feed_meta.copy()
+    english_meta.language = models.Language.ENGLISH
+    english_item = feed_item.copy()
+    english_item.title = "English"
+
+    german_feed = create_view_feed(
+        feed_meta, mocked_writers, mocked_loader, {feed_item.category: [feed_item]}
+    )
+    english_feed = create_view_feed(
+        english_meta,
+        mocked_writers,
+        mocked_loader,
+        {feed_item.category: [english_item]},
+    )
+
+    view_meta = models.FeedViewMeta(
+        title="View", languages=[models.Language.ENGLISH, models.Language.GERMAN]
+    )
+    view = feeds.FeedView(view_meta, mocked_writers)
+
+    # the same post is taken from the first language of the view
+    assert view.select_items([german_feed, english_feed]) == [english_item]
+    assert view.create_feed_meta([german_feed, english_feed]).language == (
+        models.Language.ENGLISH
+    )
+
+    view_meta.languages.reverse()
+    assert view.select_items([english_feed, german_feed]) == [feed_item]
+
+
+async def test_create_feed_collection_views(
+    mocker: pytest_mock.MockFixture,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+) -> None:
+    async def create_feed(self: feeds.GameFeed, session: Any) -> None:
+        self._category_feeds = {feed_item.category: [feed_item]}
+        self._was_updated = True
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.GameFeed.create_feed",
+        autospec=True,
+        side_effect=create_feed,
+    )
+
+    view_writer = mocker.create_autospec(AbstractFeedFileWriter, instance=True)
+    view = feeds.FeedView(models.FeedViewMeta(title="View"), [view_writer])
+
+    collection = feeds.GameFeedCollection(
+        [feed_meta], [mocked_writers], [mocked_loader], [view]
+    )
+
+    await collection.create_feeds()
+
+    view_writer.write_feed.assert_awaited_once()
+    assert view_writer.write_feed.call_args.args[1] == [feed_item]
+
+
+async def test_create_feed_collection_offloaded(
+    mocker: pytest_mock.MockFixture,
+    tmp_path: Path,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+) -> None:
+    async def create_feed(self: feeds.GameFeed, session: Any) -> None:
+        self._was_updated = True
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.GameFeed.create_feed",
+        autospec=True,
+        side_effect=create_feed,
+    )
+
+    view_writer = mocker.create_autospec(AbstractFeedFileWriter, instance=True)
+    view = feeds.FeedView(models.FeedViewMeta(title="View"), [view_writer])
+
+    collection = feeds.GameFeedCollection(
+        [feed_meta],
+        [mocked_writers],
+        [mocked_loader],
+        [view],
+        content_store=blobs.BlobStore(tmp_path / "blobs"),
+    )
+    collection.game_feeds[0]._category_feeds = {feed_item.category: [feed_item]}
+
+    # the offloaded items of the previous run are materialized for the view
+    for _ in range(2):
+        await collection.create_feeds()
+
+        assert view_writer.write_feed.call_args.args[1] == [feed_item]
+
+        offloaded_item = collection.game_feeds[0].category_feeds[feed_item.category][0]
+        assert isinstance(offloaded_item, models.OffloadedFeedItem)
+        assert offloaded_item.content == ""
+        assert offloaded_item.id == feed_item.id
+
+
+async def test_check_feed(
+    mocker: pytest_mock.MockFixture,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[AbstractFeedFileWriter],
+    mocked_loader: Any,
+    feed_item: models.FeedItem,
+) -> None:
+    assert feed_item.updated is not None
+    item_meta = models.FeedItemMeta(id=feed_item.id, last_modified=feed_item.updated)
+
+    mocked_metas = mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
+        spec=True,
+        return_value=[item_meta],
+    )
+
+    feed_index = caches.FeedIndex()
+    game_feed = feeds.GameFeed(
+        feed_meta, mocked_writers, mocked_loader, feed_index=feed_index
+    )
+
+    # feeds without index need an update without any requests
+    assert await game_feed.check_feed(client_session)
+    mocked_metas.assert_not_called()
+
+    feed_index.update([feed_item])
+    assert not await game_feed.check_feed(client_session)
+
+    item_meta.last_modified += timedelta(minutes=1)
+    assert await game_feed.check_feed(client_session)
+
+    # only the news lists are requested
+    mocked_loader.get_feed_items.assert_not_called()
+
+
+async def test_check_feed_collections(
+    mocker: pytest_mock.MockFixture,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[AbstractFeedFileWriter],
+    mocked_loader: AbstractFeedFileLoader,
+) -> None:
+    mocked_check = mocker.patch(
+        "hoyolabrssfeeds.feeds.GameFeed.check_feed", spec=True, return_value=False
+    )
+
+    collection = feeds.GameFeedCollection(
+        [feed_meta, feed_meta],
+        [mocked_writers, mocked_writers],
+        [mocked_loader, mocked_loader],
+    )
+
+    assert not await collection.check_feeds()
+    assert mocked_check.call_count == 2
+
+    # failed checks request an update
+    mocked_check.side_effect = [False, errors.HoyolabApiError("Error!")]
+    assert await collection.check_feeds()
+
+
+async def test_reload_feed_collection(
+    feed_config: models.FeedConfig,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    changed_config = feed_config.copy(
+        update={"feed_meta": feed_config.feed_meta.copy(update={"category_size": 3})}
+    )
+    other_config = feed_config.copy(
+        update={"feed_meta": feed_config.feed_meta.copy(update={"title": "Other"})}
+    )
+    view_config = models.FeedViewConfig(
+        view_meta=models.FeedViewMeta(title="View"),
+        writer_configs=[json_feed_file_writer_config],
+    )
+    hook_config = models.EventHookConfig(command=["true"])
+
+    collection = feeds.GameFeedCollection.from_configs([feed_config, other_config])
+    unchanged_feed, removed_feed = collection.game_feeds
+
+    changed_feeds = await collection.reload_configs(
+        [feed_config, changed_config], [view_config], [hook_config]
+    )
+
+    # unchanged feeds keep their instance (and with it their state)
+    assert collection.game_feeds[0] is unchanged_feed
+    assert removed_feed not in collection.game_feeds
+    assert changed_feeds == [collection.game_feeds[1]]
+    assert changed_feeds[0].feed_meta.category_size == 3
+
+    assert len(collection._feed_views) == 1
+
+    # the reloaded hooks are shared by all feeds
+    for feed in collection.game_feeds:
+        assert len(feed.event_hooks) == 1
+        assert feed.event_hooks is collection.game_feeds[0].event_hooks
+
+    assert (
+        await collection.reload_configs(
+            [feed_config, changed_config], [view_config], [hook_config]
+        )
+        == []
+    )
+
+
+async def test_reload_views_of_collection(
+    mocker: pytest_mock.MockFixture,
+    tmp_path: Path,
+    client_session: aiohttp.ClientSession,
+    feed_config: models.FeedConfig,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    view_configs = [
+        models.FeedViewConfig(
+            view_meta=models.FeedViewMeta(title=name),
+            writer_configs=[
+                json_feed_file_writer_config.copy(
+                    update={"path": tmp_path / "{}.json".format(name)}
+                )
+            ],
+        )
+        for name in ("unchanged", "changed")
+    ]
+    changed_config = view_configs[1].copy(
+        update={"view_meta": models.FeedViewMeta(title="Changed", max_items=3)}
+    )
+
+    for view_config in view_configs:
+        view_config.writer_configs[0].path.write_text("{}")
+
+    collection = feeds.GameFeedCollection.from_configs([feed_config], view_configs)
+    unchanged_view = collection._feed_views[0]
+
+    # flag of a previous run
+    collection.game_feeds[0]._was_updated = True
+
+    mocked_write = mocker.patch(
+        "hoyolabrssfeeds.writers.JSONFeedFileWriter.write_feed", autospec=True
+    )
+
+    await collection.reload_configs([feed_config], [view_configs[0], changed_config])
+    await collection.create_feeds(client_session, [])
+
+    # only the changed view is written again
+    assert collection._feed_views[0] is unchanged_view
+    mocked_write.assert_called_once()
+    assert mocked_write.call_args.args[0] is collection._feed_views[1].feed_writers[0]
+
+    await collection.create_feeds(client_session, [])
+
+    mocked_write.assert_called_once()
+
+
+async def test_create_some_feeds_of_collection(
+    mocker: pytest_mock.MockFixture,
+    feed_meta: models.FeedMeta,
+    mocked_writers: List[AbstractFeedFileWriter],
+    mocked_loader: AbstractFeedFileLoader,
+) -> None:
+    mocked_create = mocker.patch(
+        "hoyolabrssfeeds.feeds.GameFeed.create_feed", autospec=True
+    )
+
+    collection = feeds.GameFeedCollection(
+        [feed_meta, feed_meta],
+        [mocked_writers, mocked_writers],
+        [mocked_loader, mocked_loader],
+    )
+
+    await collection.create_feeds(game_feeds=collection.game_feeds[1:])
+
+    mocked_create.assert_called_once()
+    assert mocked_create.call_args.args[0] is collection.game_feeds[1]
+
+
+# ---- HELPER FUNCTIONS ----
+
+
+def completed(items: List[models.FeedItem]) -> "asyncio.Future[List[models.FeedItem]]":
+    future: asyncio.Future[List[models.FeedItem]] = (
+        asyncio.get_running_loop().create_future()
+    )
+    future.set_result(items)
+
+    return future
+
+
+def awaiting_side_effect(
+    category_feeds: List[List[models.FeedItem]],
+) -> Callable[..., Coroutine[Any, Any, List[models.FeedItem]]]:
+    feeds_iter = iter(category_feeds)
+
+    async def update_category_feed(
+        session: aiohttp.ClientSession,
+        category: models.FeedItemCategory,
+        feed_items: Awaitable[List[models.FeedItem]],
+    ) -> List[models.FeedItem]:
+        await feed_items
+        return next(feeds_iter)
+
+    return update_category_feed
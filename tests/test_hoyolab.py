@@ -134,6 +134,21 @@ async def test_get_latest_item_metas(
     assert metas == expected
 
 
+async def test_get_invalid_item_metas(
+    mocker: pytest_mock.MockFixture, client_session: aiohttp.ClientSession
+) -> None:
+    mocker.patch(
+        "hoyolabrssfeeds.hoyolab.HoyolabNews.get_news_list",
+        spec=True,
+        return_value=[{"post": {"post_id": "abc", "created_at": 0}}],
+    )
+
+    api = hoyolab.HoyolabNews(models.Game.GENSHIN)
+
+    with pytest.raises(errors.HoyolabApiError, match="Unexpected"):
+        await api.get_latest_item_metas(client_session, models.FeedItemCategory.INFO)
+
+
 async def test_get_feed_item(
     mocker: pytest_mock.MockFixture,
     feed_item: models.FeedItem,
@@ -0,0 +1,88 @@
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+from typing import Tuple
+
+import pytest
+
+import hoyolabrssfeeds
+from hoyolabrssfeeds import feeds
+
+# modules which are too heavy for the startup of the cli
+HEAVY_MODULES = ("aiohttp", "pydantic", "aiofiles", "xml.etree.ElementTree")
+
+# cumulative import time of the cli module (generous for slow ci runners)
+IMPORT_BUDGET_SECONDS = 0.5
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+# ---- IMPORT TESTS ----
+
+
+def test_lazy_attributes() -> None:
+    assert hoyolabrssfeeds.GameFeed is feeds.GameFeed
+    assert hoyolabrssfeeds.feeds is feeds
+    assert set(hoyolabrssfeeds.__all__) <= set(dir(hoyolabrssfeeds))
+
+    with pytest.raises(AttributeError, match="has no attribute"):
+        _ = hoyolabrssfeeds.unknown
+
+
+def test_development_modules() -> None:
+    from hoyolabrssfeeds import simulator
+
+    assert simulator.__name__ == "hoyolabrssfeeds.simulator"
+    assert "simulator" not in hoyolabrssfeeds.__all__
+    assert "benchmarks" not in hoyolabrssfeeds.__all__
+
+
+@pytest.mark.parametrize(
+    ["args", "heavy_modules"],
+    [
+        (["--help"], HEAVY_MODULES),
+        (["-c", "{tmp_path}/config.toml"], ("aiohttp", "xml.etree.ElementTree")),
+    ],
+    ids=["help", "default_config"],
+)
+def test_cli_startup_imports(
+    tmp_path: Path, args: List[str], heavy_modules: Tuple[str, ...]
+) -> None:
+    argv = ["hoyolabrssfeeds"] + [arg.format(tmp_path=tmp_path) for arg in args]
+    code = (
+        "import sys\n"
+        "sys.argv = {!r}\n"
+        "from hoyolabrssfeeds.__main__ import cli\n"
+        "try:\n"
+        "    cli()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(','.join(sys.modules))\n"
+    ).format(argv)
+
+    modules = run_python(code).stdout.strip().splitlines()[-1].split(",")
+
+    assert [module for module in heavy_modules if module in modules] == []
+
+
+def test_cli_import_budget() -> None:
+    result = run_python("import hoyolabrssfeeds.__main__", "-X", "importtime")
+
+    # stderr lines: "import time: self [us] | cumulative | imported package"
+    match = re.search(
+        r"^import time:\s+\d+ \|\s+(\d+) \| hoyolabrssfeeds\.__main__$",
+        result.stderr,
+        re.MULTILINE,
+    )
+
+    assert match is not None
+    assert int(match.group(1)) / 1e6 < IMPORT_BUDGET_SECONDS
@@ -100,6 +100,26 @@ async def test_json_feed_loader(
     assert loaded_items == feed_item_list
 
 
+async def test_paged_json_feed_loader(
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    json_feed_file_config: models.FeedFileConfig,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+) -> None:
+    json_feed_file_writer_config.page_size = 2
+    feed_items = [feed_item.copy(update={"id": i}) for i in range(6, 0, -1)]
+
+    await writers.JSONFeedFileWriter(json_feed_file_writer_config).write_feed(
+        feed_meta, feed_items
+    )
+
+    loader = loaders.JSONFeedFileLoader(json_feed_file_config)
+    loaded_items = await loader.get_feed_items()
+
+    # archive pages are not loaded (their items are known from the page index)
+    assert [item.id for item in loaded_items] == [6, 5]
+
+
 async def test_invalid_json_feed_values(
     mocker: pytest_mock.MockFixture,
     json_feed_items: Dict[str, Any],
@@ -310,3 +330,76 @@ async def test_load_atom_file_io_error(
 
     with pytest.raises(errors.FeedIOError, match="Could not read"):
         await loader._load_from_file()
+
+
+# ---- FALLBACK LOADER TESTS ----
+
+
+def test_factory_create_fallback_loader(
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    atom_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    json_writer = writers.JSONFeedFileWriter(json_feed_file_writer_config)
+    atom_writer = writers.AtomFeedFileWriter(atom_feed_file_writer_config)
+
+    factory = loaders.FeedFileLoaderFactory()
+    loader = factory.create_fallback_loader([atom_writer, json_writer])
+
+    assert loader.config.path == json_feed_file_writer_config.path
+    assert [type(lo) for lo in loader.loaders] == [
+        loaders.JSONFeedFileLoader,
+        loaders.AtomFeedFileLoader,
+    ]
+
+
+async def test_fallback_loader_recovery(
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    atom_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item_list: List[models.FeedItem],
+) -> None:
+    json_feed_file_writer_config.compress = True
+    json_writer = writers.JSONFeedFileWriter(json_feed_file_writer_config)
+    atom_writer = writers.AtomFeedFileWriter(atom_feed_file_writer_config)
+
+    for writer in [json_writer, atom_writer]:
+        await writer.write_feed(feed_meta, feed_item_list)
+
+    loader = loaders.FeedFileLoaderFactory().create_fallback_loader(
+        [json_writer, atom_writer]
+    )
+
+    assert await loader.get_feed_items() == feed_item_list
+    assert not loader.was_recovered
+
+    # valid JSON, but not the written feed
+    json_path = json_feed_file_writer_config.path
+    json_path.write_text(json.dumps({"items": []}))
+
+    assert await loader.get_feed_items() == feed_item_list
+    assert loader.was_recovered
+
+    json_path.unlink()
+    json_path.with_name(json_path.name + ".gz").write_bytes(b"broken")
+
+    recovered_items = await loader.get_feed_items()
+
+    assert loader.was_recovered
+    assert [item.id for item in recovered_items] == [i.id for i in feed_item_list]
+
+
+async def test_fallback_loader_broken_files(
+    json_feed_file_config: models.FeedFileConfig,
+) -> None:
+    loader = loaders.FallbackFeedFileLoader(
+        [loaders.JSONFeedFileLoader(json_feed_file_config)]
+    )
+
+    assert await loader.get_feed_items() == []
+
+    json_feed_file_config.path.write_text("Not JS0N!")
+
+    with pytest.raises(errors.FeedFormatError, match="Could not decode"):
+        await loader.get_feed_items()
+
+    assert not loader.was_recovered
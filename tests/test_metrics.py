@@ -0,0 +1,182 @@
+from pathlib import Path
+from typing import Any
+from typing import Generator
+from typing import List
+
+import aiohttp
+import pytest
+import pytest_mock
+
+from hoyolabrssfeeds import errors
+from hoyolabrssfeeds import feeds
+from hoyolabrssfeeds import metrics
+from hoyolabrssfeeds import models
+from hoyolabrssfeeds import writers
+
+
+@pytest.fixture
+def registry() -> metrics.MetricsRegistry:
+    registry = metrics.MetricsRegistry()
+    registry.enabled = True
+    return registry
+
+
+@pytest.fixture
+def enabled_metrics() -> Generator[metrics.MetricsRegistry, Any, None]:
+    metrics.REGISTRY.enabled = True
+    yield metrics.REGISTRY
+    metrics.REGISTRY.enabled = False
+    metrics.REGISTRY.clear()
+
+
+# ---- METRICS TESTS ----
+
+
+def test_disabled_metrics() -> None:
+    registry = metrics.MetricsRegistry()
+    counter = metrics.Counter("test", "Test counter.", registry=registry)
+    histogram = metrics.Histogram("test_seconds", "Test.", registry=registry)
+
+    counter.inc()
+    histogram.observe(1)
+
+    # disabled timers are a shared no-op
+    assert histogram.time() is histogram.time()
+    assert counter.get() == 0
+    assert histogram.get_count() == 0
+
+
+def test_counter(registry: metrics.MetricsRegistry) -> None:
+    counter = metrics.Counter(
+        "requests", "Requests.", ("endpoint", "status"), registry=registry
+    )
+
+    counter.inc("getPostFull", "200")
+    counter.inc("getPostFull", "200", amount=2)
+    counter.inc('say "hi"', "500")
+
+    assert counter.get("getPostFull", "200") == 3
+    assert registry.render().splitlines() == [
+        "# HELP hoyolabrssfeeds_requests Requests.",
+        "# TYPE hoyolabrssfeeds_requests counter",
+        'hoyolabrssfeeds_requests_total{endpoint="getPostFull",status="200"} 3',
+        'hoyolabrssfeeds_requests_total{endpoint="say \\"hi\\"",status="500"} 1',
+    ]
+
+
+def test_histogram(registry: metrics.MetricsRegistry) -> None:
+    histogram = metrics.Histogram(
+        "duration_seconds", "Duration.", registry=registry, buckets=(0.5, 1)
+    )
+
+    histogram.observe(0.25)
+    histogram.observe(0.75)
+    histogram.observe(2)
+
+    with histogram.time():
+        pass
+
+    assert histogram.get_count() == 4
+
+    samples: List[str] = registry.render().splitlines()[2:]
+
+    assert samples == [
+        'hoyolabrssfeeds_duration_seconds_bucket{le="0.5"} 2',
+        'hoyolabrssfeeds_duration_seconds_bucket{le="1"} 3',
+        'hoyolabrssfeeds_duration_seconds_bucket{le="+Inf"} 4',
+        samples[3],
+        "hoyolabrssfeeds_duration_seconds_count 4",
+    ]
+    assert samples[3].startswith("hoyolabrssfeeds_duration_seconds_sum 3.0")
+
+
+async def test_write_textfile(
+    tmp_path: Path, registry: metrics.MetricsRegistry
+) -> None:
+    metrics.Counter("runs", "Runs.", registry=registry).inc()
+    path = tmp_path / "hoyolab.prom"
+
+    await registry.write_textfile(path)
+
+    assert "hoyolabrssfeeds_runs_total 1" in path.read_text()
+
+
+async def test_writer_metrics(
+    enabled_metrics: metrics.MetricsRegistry,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item_list: List[models.FeedItem],
+) -> None:
+    writer = writers.JSONFeedFileWriter(json_feed_file_writer_config)
+
+    await writer.write_feed(feed_meta, feed_item_list)
+
+    written_bytes = json_feed_file_writer_config.path.stat().st_size
+
+    assert metrics.FEED_WRITTEN_BYTES.get("json") == written_bytes
+    assert metrics.FEED_ENCODE_SECONDS.get_count("json") == 1
+    assert metrics.FEED_WRITE_SECONDS.get_count("json") == 1
+
+
+def test_feed_item_metrics(
+    enabled_metrics: metrics.MetricsRegistry,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+) -> None:
+    game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
+    change = models.FeedItemChange(
+        models.FeedItemChangeType.ADDED,
+        feed_item.id,
+        feed_item.category,
+        feed_item.published,
+    )
+
+    game_feed._count_items(feed_item.category, [change], 3)
+
+    labels = ("genshin", "de-de", "info")
+
+    assert metrics.FEED_ITEMS.get(*labels, "new") == 1
+    assert metrics.FEED_ITEMS.get(*labels, "updated") == 0
+    assert metrics.FEED_ITEMS.get(*labels, "unchanged") == 2
+
+
+async def test_failed_item_metrics(
+    mocker: pytest_mock.MockFixture,
+    enabled_metrics: metrics.MetricsRegistry,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+    mocked_writers: List[Any],
+    mocked_loader: Any,
+) -> None:
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_latest_item_metas",
+        spec=True,
+        return_value=[
+            models.FeedItemMeta(id=feed_item.id, last_modified=feed_item.published)
+        ],
+    )
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.HoyolabNews.get_feed_item",
+        spec=True,
+        side_effect=errors.HoyolabApiError("Broken post!"),
+    )
+
+    async def no_items() -> List[models.FeedItem]:
+        return []
+
+    game_feed = feeds.GameFeed(feed_meta, mocked_writers, mocked_loader)
+
+    # the second run skips the known broken post
+    for _ in range(2):
+        await game_feed._update_category_feed(
+            client_session, models.FeedItemCategory.INFO, no_items()
+        )
+
+    labels = ("genshin", "de-de", "info")
+
+    assert metrics.FEED_ITEMS.get(*labels, "failed") == 1
+    assert metrics.FEED_ITEMS.get(*labels, "skipped") == 1
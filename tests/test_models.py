@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from hoyolabrssfeeds import models
 import pytest
 
@@ -22,3 +24,32 @@ def test_game_from_str(game: models.Game) -> None:
 def test_invalid_game_str() -> None:
     with pytest.raises(ValueError):
         models.Game.from_str("Invalid")
+
+
+def test_item_from_trusted(feed_item: models.FeedItem) -> None:
+    item = models.FeedItem.from_trusted(feed_item.dict())
+
+    assert item == feed_item
+
+
+def test_item_fingerprint(feed_item: models.FeedItem) -> None:
+    touched_item = feed_item.copy()
+    touched_item.updated = datetime.now().astimezone()
+    touched_item.title = " Test  Article\n"
+
+    edited_item = feed_item.copy()
+    edited_item.summary = "Bye!"
+
+    assert touched_item.get_fingerprint() == feed_item.get_fingerprint()
+    assert edited_item.get_fingerprint() != feed_item.get_fingerprint()
+
+
+def test_item_meta_equality() -> None:
+    now = datetime.now()
+
+    assert models.FeedItemMeta(id=1, last_modified=now) == models.FeedItemMeta(
+        id=1, last_modified=now
+    )
+    assert models.FeedItemMeta(id=1, last_modified=now) != models.FeedItemMeta(
+        id=2, last_modified=now
+    )
@@ -0,0 +1,62 @@
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from hoyolabrssfeeds import errors
+from hoyolabrssfeeds import pages
+
+# ---- PAGE INDEX TESTS ----
+
+
+def test_page_index_paths(json_path: Path) -> None:
+    page_index = pages.FeedPageIndex(json_path)
+
+    assert page_index.path.name == ".{}.pages.json".format(json_path.name)
+    assert page_index.get_archive_path(3).name == "{}.page-3{}".format(
+        json_path.stem, json_path.suffix
+    )
+
+
+async def test_page_index_save_load(json_path: Path) -> None:
+    page_index = pages.FeedPageIndex(json_path)
+
+    assert not await page_index.exists()
+    assert page_index.add_page([2, 1]) == 1
+    assert page_index.add_page([4, 3]) == 2
+
+    await page_index.save()
+
+    loaded_index = pages.FeedPageIndex(json_path)
+    await loaded_index.load()
+
+    assert len(loaded_index) == 2
+    assert loaded_index.pages == [[2, 1], [4, 3]]
+    assert loaded_index.archived_ids == {1, 2, 3, 4}
+
+
+async def test_page_index_revisions(json_path: Path) -> None:
+    revision = datetime(2022, 10, 3, 18).astimezone()
+
+    page_index = pages.FeedPageIndex(json_path)
+    page_index.add_page([2, 1], {2: revision})
+    await page_index.save()
+
+    loaded_index = pages.FeedPageIndex(json_path)
+    await loaded_index.load()
+
+    assert loaded_index.is_archived(2, revision)
+    assert not loaded_index.is_archived(2, revision + timedelta(seconds=1))
+    assert not loaded_index.is_archived(3, revision)
+
+    # items without revision (e.g. of older indexes) are never outdated
+    assert loaded_index.is_archived(1, revision + timedelta(days=1))
+
+
+async def test_page_index_invalid_file(json_path: Path) -> None:
+    page_index = pages.FeedPageIndex(json_path)
+    page_index.path.write_text('{"pages": [["invalid"]]}')
+
+    with pytest.raises(errors.FeedFormatError, match="Could not load page index"):
+        await page_index.load()
@@ -0,0 +1,114 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from hoyolabrssfeeds import loaders
+from hoyolabrssfeeds import models
+from hoyolabrssfeeds import profiling
+from hoyolabrssfeeds import writers
+
+
+async def profile_feed(
+    profiler: profiling.Profiler,
+    config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_items: List[models.FeedItem],
+    fallback: bool = True,
+) -> None:
+    writer = writers.JSONFeedFileWriter(config)
+    loader: loaders.AbstractFeedFileLoader
+
+    # feeds use the fallback loader by default
+    if fallback:
+        loader = loaders.FeedFileLoaderFactory().create_fallback_loader([writer])
+    else:
+        loader = loaders.JSONFeedFileLoader(
+            models.FeedFileConfig(feed_type=models.FeedType.JSON, path=config.path)
+        )
+
+    profiler.start()
+
+    try:
+        await writer.write_feed(feed_meta, feed_items)
+        await loader.get_feed_items()
+    finally:
+        profiler.stop()
+
+
+# ---- PROFILER TESTS ----
+
+
+def test_profiler_not_stopped() -> None:
+    with pytest.raises(RuntimeError):
+        profiling.Profiler().get_phase_times()
+
+
+@pytest.mark.parametrize("fallback", [True, False])
+async def test_phase_times(
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item_list: List[models.FeedItem],
+    fallback: bool,
+) -> None:
+    profiler = profiling.Profiler()
+
+    await profile_feed(
+        profiler, json_feed_file_writer_config, feed_meta, feed_item_list, fallback
+    )
+
+    phase_times = profiler.get_phase_times()
+
+    assert list(phase_times) == list(profiling.PHASE_FUNCTIONS)
+    assert phase_times["write"] > 0
+    assert phase_times["feed load"] > 0
+    assert phase_times["fetch"] == 0
+
+
+async def test_collapsed_stacks(
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item_list: List[models.FeedItem],
+) -> None:
+    profiler = profiling.Profiler()
+
+    await profile_feed(
+        profiler, json_feed_file_writer_config, feed_meta, feed_item_list
+    )
+
+    stacks = profiler.get_collapsed_stacks()
+    write_stacks = [s for s in stacks if "write_feed (writers.py:" in s]
+
+    assert len(write_stacks) > 0
+    assert all(seconds > 0 for seconds in stacks.values())
+
+    # frames of nested calls follow their callers
+    encode_stacks = [s for s in write_stacks if "encode_feed" in s]
+    assert len(encode_stacks) > 0
+    assert all(s.index("write_feed") < s.index("encode_feed") for s in encode_stacks)
+
+
+async def test_write_results(
+    tmp_path: Path,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item_list: List[models.FeedItem],
+) -> None:
+    profiler = profiling.Profiler(memory=True)
+
+    await profile_feed(
+        profiler, json_feed_file_writer_config, feed_meta, feed_item_list
+    )
+
+    paths = profiler.write_results(tmp_path / "run")
+
+    assert [p.name for p in paths] == ["run.pstats", "run.collapsed", "run.txt"]
+
+    report = paths[2].read_text()
+    assert "feed load" in report
+    assert "Peak traced memory" in report
+
+    for line in paths[1].read_text().splitlines():
+        stack, _, microseconds = line.rpartition(" ")
+        assert len(stack) > 0
+        assert int(microseconds) > 0
@@ -0,0 +1,240 @@
+import gzip
+import json
+import threading
+from email.utils import format_datetime
+from typing import Any
+from typing import AsyncGenerator
+from typing import Dict
+from typing import List
+
+import pytest
+import pytest_mock
+from aiohttp.test_utils import TestClient
+from aiohttp.test_utils import TestServer
+
+from hoyolabrssfeeds import compressors
+from hoyolabrssfeeds import metrics
+from hoyolabrssfeeds import models
+from hoyolabrssfeeds import pages
+from hoyolabrssfeeds import servers
+from hoyolabrssfeeds import writers
+
+
+@pytest.fixture
+def json_writer(
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> writers.JSONFeedFileWriter:
+    json_feed_file_writer_config.url = None
+    return writers.JSONFeedFileWriter(json_feed_file_writer_config)
+
+
+@pytest.fixture
+def feed_server(json_writer: writers.JSONFeedFileWriter) -> servers.FeedServer:
+    return servers.FeedServer([json_writer])
+
+
+@pytest.fixture
+async def feed_client(
+    feed_server: servers.FeedServer,
+) -> AsyncGenerator[TestClient[Any, Any], Any]:
+    async with TestClient(TestServer(feed_server.create_app())) as client:
+        yield client
+
+
+def test_routes(
+    json_writer: writers.JSONFeedFileWriter,
+    atom_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    atom_feed_file_writer_config.url = "https://example.org/feeds/atom.xml"  # type: ignore
+    atom_writer = writers.AtomFeedFileWriter(atom_feed_file_writer_config)
+
+    server = servers.FeedServer([json_writer, atom_writer])
+
+    assert server.routes == ["/" + json_writer.config.path.name, "/feeds/atom.xml"]
+
+
+async def test_serve_feed(
+    feed_server: servers.FeedServer,
+    feed_client: TestClient[Any, Any],
+    json_writer: writers.JSONFeedFileWriter,
+    feed_meta: models.FeedMeta,
+    feed_item_list: List[models.FeedItem],
+) -> None:
+    route = feed_server.routes[0]
+
+    response = await feed_client.get(route)
+    assert response.status == 404
+
+    await json_writer.write_feed(feed_meta, feed_item_list)
+    await feed_server.refresh()
+
+    response = await feed_client.get(route, headers={"Accept-Encoding": "identity"})
+    assert response.status == 200
+    assert response.content_type == "application/feed+json"
+    assert await response.read() == json_writer.feed_bytes
+
+    # conditional requests
+    etag = response.headers["ETag"]
+    response = await feed_client.get(route, headers={"If-None-Match": etag})
+    assert response.status == 304
+
+    last_modified = response.headers["Last-Modified"]
+    response = await feed_client.get(
+        route, headers={"If-Modified-Since": last_modified}
+    )
+    assert response.status == 304
+
+    # body is swapped after a new write
+    await json_writer.write_feed(feed_meta, feed_item_list[:1])
+    await feed_server.refresh()
+
+    response = await feed_client.get(route, headers={"If-None-Match": etag})
+    assert response.status == 200
+
+
+async def test_serve_compressed_feed(
+    mocker: pytest_mock.MockFixture,
+    feed_server: servers.FeedServer,
+    json_writer: writers.JSONFeedFileWriter,
+    feed_client: TestClient[Any, Any],
+    feed_meta: models.FeedMeta,
+    feed_item_list: List[models.FeedItem],
+) -> None:
+    compress_threads = []
+
+    def compress_all(data: bytes) -> Dict[str, bytes]:
+        compress_threads.append(threading.get_ident())
+        return compressors.compress_all(data)
+
+    mocker.patch("hoyolabrssfeeds.servers.compress_all", compress_all)
+
+    await json_writer.write_feed(feed_meta, feed_item_list)
+    await feed_server.refresh()
+
+    # the event loop is not blocked by the compression
+    assert len(compress_threads) == 1
+    assert threading.get_ident() not in compress_threads
+
+    response = await feed_client.get(
+        feed_server.routes[0],
+        headers={"Accept-Encoding": "gzip"},
+        auto_decompress=False,
+    )
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(await response.read()) == json_writer.feed_bytes
+
+
+async def test_load_feed_files(
+    feed_server: servers.FeedServer,
+    feed_client: TestClient[Any, Any],
+    json_writer: writers.JSONFeedFileWriter,
+) -> None:
+    json_writer.config.path.write_bytes(b"{}")
+    await feed_server.load_files()
+
+    response = await feed_client.get(feed_server.routes[0])
+
+    assert await response.read() == b"{}"
+
+
+async def test_serve_archive_pages(
+    feed_server: servers.FeedServer,
+    feed_client: TestClient[Any, Any],
+    json_writer: writers.JSONFeedFileWriter,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+) -> None:
+    json_writer.config.page_size = 2
+    feed_items = [feed_item.copy(update={"id": i}) for i in range(5, 0, -1)]
+
+    await json_writer.write_feed(feed_meta, feed_items)
+    await feed_server.refresh()
+
+    response = await feed_client.get(feed_server.routes[0])
+    next_url = json.loads(await response.read())["next_url"]
+
+    response = await feed_client.get("/" + next_url)
+    page_path = pages.FeedPageIndex(json_writer.config.path).get_archive_path(1)
+
+    assert response.status == 200
+    assert response.content_type == "application/feed+json"
+    assert await response.read() == page_path.read_bytes()
+
+    # archive pages of a previous process are loaded from the files
+    new_server = servers.FeedServer([json_writer])
+    await new_server.load_files()
+
+    async with TestClient(TestServer(new_server.create_app())) as new_client:
+        response = await new_client.get("/" + next_url)
+        assert await response.read() == page_path.read_bytes()
+
+    # archive pages are removed with their feed
+    feed_server.set_writers([])
+
+    response = await feed_client.get("/" + next_url)
+    assert response.status == 404
+
+
+async def test_set_writers(
+    feed_server: servers.FeedServer,
+    feed_client: TestClient[Any, Any],
+    json_writer: writers.JSONFeedFileWriter,
+    atom_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    json_writer.config.path.write_bytes(b"{}")
+    await feed_server.load_files()
+
+    atom_feed_file_writer_config.url = None
+    atom_writer = writers.AtomFeedFileWriter(atom_feed_file_writer_config)
+    atom_writer.config.path.write_bytes(b"<feed/>")
+
+    json_route = feed_server.routes[0]
+    feed_server.set_writers([atom_writer])
+    await feed_server.load_files()
+
+    assert feed_server.routes == ["/" + atom_writer.config.path.name]
+
+    response = await feed_client.get(json_route)
+    assert response.status == 404
+
+    response = await feed_client.get(feed_server.routes[0])
+    assert await response.read() == b"<feed/>"
+
+
+def test_select_encoding() -> None:
+    available = {"gzip", "zstd"}
+
+    assert servers.FeedServer._select_encoding("gzip, zstd", available) == "zstd"
+    assert servers.FeedServer._select_encoding("gzip, zstd;q=0", available) == "gzip"
+    assert servers.FeedServer._select_encoding("*", {"gzip"}) == "gzip"
+    assert servers.FeedServer._select_encoding("br", available) is None
+
+
+def test_feed_body_etags() -> None:
+    body = servers.FeedBody(b"{}", "application/feed+json", {"gzip": b""})
+
+    assert body.get_etag().startswith('"')
+    assert body.get_etag("gzip").endswith('-gzip"')
+    assert format_datetime(body.last_modified, usegmt=True).endswith("GMT")
+
+
+async def test_metrics_route(json_writer: writers.JSONFeedFileWriter) -> None:
+    registry = metrics.MetricsRegistry()
+    registry.enabled = True
+    metrics.Counter("runs", "Runs.", registry=registry).inc()
+
+    server = servers.FeedServer([json_writer], metrics_registry=registry)
+
+    async with TestClient(TestServer(server.create_app())) as client:
+        response = await client.get("/metrics")
+
+        assert response.status == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert "hoyolabrssfeeds_runs_total 1" in await response.text()
+
+    # metrics are not served by default
+    async with TestClient(TestServer(servers.FeedServer([]).create_app())) as client:
+        response = await client.get("/metrics")
+
+        assert response.status == 404
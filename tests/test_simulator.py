@@ -0,0 +1,209 @@
+from pathlib import Path
+from typing import Any
+from typing import AsyncGenerator
+from typing import Callable
+from typing import Coroutine
+from typing import List
+
+import aiohttp
+import pytest
+from aiohttp.test_utils import TestServer
+
+from hoyolabrssfeeds import errors
+from hoyolabrssfeeds import feeds
+from hoyolabrssfeeds import hoyolab
+from hoyolabrssfeeds import models
+from hoyolabrssfeeds import simulator
+from hoyolabrssfeeds import writers
+from .conftest import validate_hoyolab_post
+
+SimulatedApi = Callable[..., Coroutine[Any, Any, hoyolab.HoyolabNews]]
+
+
+@pytest.fixture
+async def simulated_api() -> AsyncGenerator[SimulatedApi, Any]:
+    servers = []
+
+    async def start(
+        sim: simulator.HoyolabSimulator, game: models.Game = models.Game.GENSHIN
+    ) -> hoyolab.HoyolabNews:
+        server = TestServer(sim.create_app())
+        await server.start_server()
+        servers.append(server)
+
+        return hoyolab.HoyolabNews(
+            game, base_url=str(server.make_url(simulator.API_PATH))
+        )
+
+    yield start
+
+    for server in servers:
+        await server.close()
+
+
+# ---- SIMULATOR TESTS ----
+
+
+def test_deterministic_posts() -> None:
+    first = simulator.HoyolabSimulator(posts_per_category=5, seed=42)
+    second = simulator.HoyolabSimulator(posts_per_category=5, seed=42)
+
+    assert first.get_posts(models.Game.GENSHIN) == second.get_posts(models.Game.GENSHIN)
+    assert len(first.get_posts(models.Game.STARRAIL)) == 15
+
+    view_types = {
+        post["post"]["view_type"]
+        for game in models.Game
+        for post in first.get_posts(game).values()
+    }
+
+    assert view_types == {1, 2, 5}
+
+
+async def test_simulated_posts(
+    client_session: aiohttp.ClientSession, simulated_api: SimulatedApi
+) -> None:
+    sim = simulator.HoyolabSimulator(posts_per_category=10)
+    api = await simulated_api(sim)
+
+    for category in models.FeedItemCategory:
+        news_list = await api.get_news_list(client_session, category, 10)
+
+        assert len(news_list) == 10
+
+        for news in news_list:
+            validate_hoyolab_post(news, is_full_post=False)
+
+            post_id = int(news["post"]["post_id"])
+            post = await api.get_post(client_session, post_id)
+            validate_hoyolab_post(post, is_full_post=True)
+
+            # all kinds of content are transformed to html
+            item = await api.get_feed_item(client_session, post_id)
+            assert item.category == category
+            assert "hoyolab-upload-private" not in item.content
+            assert "<iframe" not in item.content
+
+    assert sim.requests["getNewsList"] == 3
+
+
+async def test_pagination(client_session: aiohttp.ClientSession) -> None:
+    sim = simulator.HoyolabSimulator(posts_per_category=5)
+    server_url = simulator.API_PATH + "getNewsList"
+
+    post_ids: List[int] = []
+    last_id = ""
+
+    async with TestServer(sim.create_app()) as server:
+        while True:
+            params = {"gids": "2", "type": "1", "page_size": "2", "last_id": last_id}
+            async with client_session.get(
+                server.make_url(server_url), params=params
+            ) as response:
+                data = (await response.json())["data"]
+
+            post_ids.extend(int(news["post"]["post_id"]) for news in data["list"])
+            last_id = data["last_id"]
+
+            if data["is_last"]:
+                break
+
+    assert len(post_ids) == 5
+    assert post_ids == sorted(post_ids, reverse=True)
+
+
+async def test_injected_errors(
+    client_session: aiohttp.ClientSession, simulated_api: SimulatedApi
+) -> None:
+    category = models.FeedItemCategory.INFO
+
+    server_error_api = await simulated_api(
+        simulator.HoyolabSimulator(error_rate=1, error_burst=2)
+    )
+    with pytest.raises(errors.HoyolabApiError, match="Could not request"):
+        await server_error_api.get_news_list(client_session, category)
+
+    retcode_api = await simulated_api(simulator.HoyolabSimulator(retcode_rate=1))
+    with pytest.raises(errors.HoyolabApiError, match="Simulated error"):
+        await retcode_api.get_news_list(client_session, category)
+
+    missing_api = await simulated_api(simulator.HoyolabSimulator())
+    with pytest.raises(errors.HoyolabApiError, match="Post not found"):
+        await missing_api.get_post(client_session, 1)
+
+
+async def test_rate_limit(
+    client_session: aiohttp.ClientSession, simulated_api: SimulatedApi
+) -> None:
+    api = await simulated_api(simulator.HoyolabSimulator(rate_limit=2))
+    category = models.FeedItemCategory.INFO
+
+    await api.get_news_list(client_session, category)
+    await api.get_news_list(client_session, category)
+
+    with pytest.raises(errors.HoyolabTemporaryError, match="Could not request"):
+        await api.get_news_list(client_session, category)
+
+
+async def test_base_url_env(
+    monkeypatch: pytest.MonkeyPatch,
+    client_session: aiohttp.ClientSession,
+    tmp_path: Path,
+    feed_meta: models.FeedMeta,
+) -> None:
+    sim = simulator.HoyolabSimulator(posts_per_category=3)
+
+    async with TestServer(sim.create_app()) as server:
+        monkeypatch.setenv(
+            hoyolab.API_BASE_URL_ENV, str(server.make_url(simulator.API_PATH))
+        )
+
+        writer = writers.JSONFeedFileWriter(
+            models.FeedFileWriterConfig(
+                feed_type=models.FeedType.JSON, path=tmp_path / "feed.json"
+            )
+        )
+        game_feed = feeds.GameFeed(feed_meta, [writer])
+
+        await game_feed.create_feed(client_session)
+
+        post_id = sim.add_post(feed_meta.game, models.FeedItemCategory.INFO)
+        await game_feed.create_feed(client_session)
+
+    assert game_feed.was_updated
+    assert [
+        c.id
+        for c in game_feed.changes
+        if c.change_type == models.FeedItemChangeType.ADDED
+    ] == [post_id]
+    assert sum(len(items) for items in game_feed.category_feeds.values()) == 3
+
+
+async def test_check_feed(
+    client_session: aiohttp.ClientSession,
+    simulated_api: SimulatedApi,
+    tmp_path: Path,
+    feed_meta: models.FeedMeta,
+) -> None:
+    sim = simulator.HoyolabSimulator(posts_per_category=3)
+    api = await simulated_api(sim)
+
+    writer = writers.JSONFeedFileWriter(
+        models.FeedFileWriterConfig(
+            feed_type=models.FeedType.JSON, path=tmp_path / "feed.json"
+        )
+    )
+    game_feed = feeds.GameFeed(feed_meta, [writer])
+    game_feed._hoyolab = api
+
+    assert await game_feed.check_feed(client_session)
+
+    await game_feed.create_feed(client_session)
+    requests = sim.requests["getPostFull"]
+
+    assert not await game_feed.check_feed(client_session)
+
+    sim.add_post(feed_meta.game, models.FeedItemCategory.INFO)
+
+    assert await game_feed.check_feed(client_session)
+    assert sim.requests["getPostFull"] == requests
@@ -0,0 +1,145 @@
+import asyncio
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from typing import Dict
+from typing import Generator
+from typing import List
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from yarl import URL
+
+from hoyolabrssfeeds import tracing
+
+
+@pytest.fixture
+def tracer() -> Generator[tracing.Tracer, Any, None]:
+    yield tracing.enable()
+    tracing.disable()
+
+
+def get_spans(tracer: tracing.Tracer) -> Dict[str, Dict[str, Any]]:
+    return {event["name"]: event for event in tracer.events if event["ph"] == "X"}
+
+
+# ---- TRACING TESTS ----
+
+
+def test_disabled_tracing() -> None:
+    # disabled spans are a shared no-op
+    assert tracing.get_tracer() is None
+    assert tracing.span("test") is tracing.span("other")
+    assert tracing.get_trace_configs() == []
+
+
+async def test_nested_spans(tracer: tracing.Tracer) -> None:
+    async def update_category(category: str) -> None:
+        with tracing.span("update_category", category=category):
+            await asyncio.sleep(0)
+
+    with tracing.span("create_feed", feed="genshin/en-us"):
+        await asyncio.gather(update_category("info"), update_category("notices"))
+
+    spans: List[Dict[str, Any]] = [e for e in tracer.events if e["ph"] == "X"]
+    feed_span = spans[-1]
+
+    assert feed_span["name"] == "create_feed"
+    assert feed_span["args"] == {"feed": "genshin/en-us"}
+
+    # concurrent tasks are recorded on their own tracks
+    category_spans = spans[:-1]
+    assert {s["args"]["category"] for s in category_spans} == {"info", "notices"}
+    assert len({s["tid"] for s in spans}) == 3
+
+    for category_span in category_spans:
+        assert category_span["args"]["feed"] == "genshin/en-us"
+        assert category_span["ts"] >= feed_span["ts"]
+        assert (
+            category_span["ts"] + category_span["dur"]
+            <= feed_span["ts"] + feed_span["dur"]
+        )
+
+    track_names = [e["args"]["name"] for e in tracer.events if e["ph"] == "M"]
+    assert sorted(name.rpartition(" #")[0] for name in track_names) == [
+        "genshin/en-us",
+        "genshin/en-us info",
+        "genshin/en-us notices",
+    ]
+
+
+def test_span_error(tracer: tracing.Tracer) -> None:
+    with pytest.raises(ValueError), tracing.span("failing"):
+        raise ValueError("broken")
+
+    assert get_spans(tracer)["failing"]["args"]["error"] == "ValueError('broken')"
+
+
+async def test_request_phases(tracer: tracing.Tracer) -> None:
+    async def handle(request: web.Request) -> web.Response:
+        return web.json_response({"retcode": 0})
+
+    app = web.Application()
+    app.router.add_get("/getPostFull", handle)
+
+    async with (
+        TestServer(app) as server,
+        aiohttp.ClientSession(trace_configs=tracing.get_trace_configs()) as session,
+    ):
+        with tracing.span("getPostFull", "hoyolab", category="info"):
+            async with session.get(server.make_url("/getPostFull")) as response:
+                await response.read()
+
+    spans = get_spans(tracer)
+    request_span = spans["getPostFull"]
+
+    for phase in ["connect", "ttfb", "body"]:
+        assert spans[phase]["cat"] == "network"
+        assert spans[phase]["tid"] == request_span["tid"]
+        assert spans[phase]["args"]["category"] == "info"
+        assert spans[phase]["ts"] >= request_span["ts"]
+
+    assert spans["ttfb"]["args"]["status"] == 200
+    assert spans["body"]["args"]["bytes"] > 0
+    assert spans["body"]["ts"] >= spans["ttfb"]["ts"] + spans["ttfb"]["dur"]
+
+
+async def test_request_body_chunks(
+    tracer: tracing.Tracer, client_session: aiohttp.ClientSession
+) -> None:
+    trace_config = tracing.create_trace_config(tracer)
+    on_chunk_received = trace_config.on_response_chunk_received[0]
+    ctx = SimpleNamespace(headers_received=tracer.now())
+
+    for _ in range(3):
+        await on_chunk_received(
+            client_session,
+            ctx,
+            aiohttp.TraceResponseChunkReceivedParams(
+                "GET", URL("https://example.org/"), b"x" * 1024
+            ),
+        )
+
+    # a single span for all chunks of a body
+    body_spans = [e for e in tracer.events if e.get("name") == "body"]
+
+    assert len(body_spans) == 1
+    assert body_spans[0]["ts"] == ctx.headers_received
+    assert body_spans[0]["args"]["bytes"] == 3 * 1024
+
+
+def test_write_trace(tmp_path: Path, tracer: tracing.Tracer) -> None:
+    trace_path = tmp_path / "trace.json"
+
+    with tracing.span("create_feeds"):
+        pass
+
+    tracer.write(trace_path)
+
+    trace = json.loads(trace_path.read_text())
+
+    assert trace["displayTimeUnit"] == "ms"
+    assert [e["name"] for e in trace["traceEvents"]] == ["thread_name", "create_feeds"]
@@ -0,0 +1,161 @@
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+
+import aiohttp
+import pydantic
+import pytest
+import pytest_mock
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from hoyolabrssfeeds import feeds
+from hoyolabrssfeeds import models
+from hoyolabrssfeeds import websub
+from hoyolabrssfeeds import writers
+
+
+class HubStandIn:
+    """Local hub which records the pings and fails for the first requests."""
+
+    def __init__(self, failures: int = 0, status: int = 503) -> None:
+        self.pings: List[Dict[str, Any]] = []
+        self.failures = failures
+        self.status = status
+
+    async def handle(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        self.pings.append(
+            {"mode": form.get("hub.mode"), "urls": form.getall("hub.url", [])}
+        )
+
+        if len(self.pings) <= self.failures:
+            return web.Response(status=self.status)
+
+        return web.Response(status=204)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/hub", self.handle)
+        return app
+
+
+def create_writer(path: Path, url: str, hub: str) -> writers.JSONFeedFileWriter:
+    config = models.FeedFileWriterConfig(
+        feed_type=models.FeedType.JSON,
+        path=path,
+        url=pydantic.parse_obj_as(pydantic.HttpUrl, url),
+        hubs=[hub],
+    )
+
+    return writers.JSONFeedFileWriter(config)
+
+
+# ---- WEBSUB PUBLISHER TESTS ----
+
+
+async def test_publish_batched(
+    tmp_path: Path, client_session: aiohttp.ClientSession, feed_meta: models.FeedMeta
+) -> None:
+    hub = HubStandIn(failures=1)
+
+    async with TestServer(hub.create_app()) as server:
+        hub_url = str(server.make_url("/hub"))
+        feed_writers = [
+            create_writer(tmp_path / "a.json", "https://example.org/a.json", hub_url),
+            create_writer(tmp_path / "b.json", "https://example.org/b.json", hub_url),
+            create_writer(tmp_path / "c.json", "https://example.org/c.json", hub_url),
+        ]
+
+        # unchanged feeds are not pinged
+        for writer in feed_writers[:2]:
+            await writer.write_feed(feed_meta, [])
+
+        publisher = websub.WebSubPublisher(retries=2, backoff=0)
+        await publisher.publish(client_session, feed_writers)
+
+    # first ping failed and was retried
+    assert len(hub.pings) == 2
+    assert hub.pings[1] == {
+        "mode": "publish",
+        "urls": ["https://example.org/a.json", "https://example.org/b.json"],
+    }
+
+
+async def test_publish_failed(
+    caplog: pytest.LogCaptureFixture,
+    tmp_path: Path,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+) -> None:
+    hub = HubStandIn(failures=10, status=400)
+
+    async with TestServer(hub.create_app()) as server:
+        writer = create_writer(
+            tmp_path / "a.json",
+            "https://example.org/a.json",
+            str(server.make_url("/hub")),
+        )
+        await writer.write_feed(feed_meta, [])
+
+        publisher = websub.WebSubPublisher(retries=2, backoff=0)
+        await publisher.publish(client_session, [writer])
+
+    # client errors are not retried
+    assert len(hub.pings) == 1
+    assert "Could not ping hub" in caplog.text
+
+
+async def test_publish_collection_runs(
+    mocker: pytest_mock.MockFixture,
+    tmp_path: Path,
+    client_session: aiohttp.ClientSession,
+    feed_meta: models.FeedMeta,
+    mocked_loader: Any,
+) -> None:
+    hub = HubStandIn()
+
+    runs: List[feeds.GameFeed] = []
+
+    async def create_feed(self: feeds.GameFeed, session: Any) -> None:
+        # only the first run has changes, so the writer is skipped afterwards
+        if len(runs) == 0:
+            await self.feed_writers[0].write_feed(feed_meta, [])
+
+        runs.append(self)
+
+    mocker.patch(
+        "hoyolabrssfeeds.feeds.GameFeed.create_feed",
+        autospec=True,
+        side_effect=create_feed,
+    )
+
+    async with TestServer(hub.create_app()) as server:
+        writer = create_writer(
+            tmp_path / "a.json",
+            "https://example.org/a.json",
+            str(server.make_url("/hub")),
+        )
+        collection = feeds.GameFeedCollection([feed_meta], [[writer]], [mocked_loader])
+
+        # two runs of the daemon with the same collection
+        await collection.create_feeds(client_session)
+        await collection.create_feeds(client_session)
+
+    assert len(hub.pings) == 1
+
+
+def test_hub_topics_without_url(
+    caplog: pytest.LogCaptureFixture,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+) -> None:
+    json_feed_file_writer_config.url = None
+    json_feed_file_writer_config.hubs = [
+        pydantic.parse_obj_as(pydantic.AnyHttpUrl, "http://localhost/hub")
+    ]
+    writer = writers.JSONFeedFileWriter(json_feed_file_writer_config)
+    writer._was_written = True
+
+    assert websub.WebSubPublisher.get_hub_topics([writer]) == {}
+    assert "without feed URL" in caplog.text
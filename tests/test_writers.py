@@ -1,14 +1,21 @@
+import gzip
+import hashlib
 import json
+import logging
+from datetime import timedelta
 from platform import system
 from stat import S_IREAD
 from typing import List
 
 import aiofiles
 import atoma  # type: ignore
+import pydantic
 import pytest
+import pytest_mock
 
 from hoyolabrssfeeds import errors
 from hoyolabrssfeeds import models
+from hoyolabrssfeeds import pages
 from hoyolabrssfeeds import writers
 
 # ---- FACTORY TESTS ----
@@ -84,6 +91,191 @@ async def test_write_json_feed_io_error(
         await writer.write_feed(feed_meta, [])
 
 
+async def test_json_feed_writer_compressed(
+    mocker: pytest_mock.MockFixture,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item_list: List[models.FeedItem],
+) -> None:
+    json_feed_file_writer_config.compress = True
+    writer = writers.JSONFeedFileWriter(json_feed_file_writer_config)
+
+    await writer.write_feed(feed_meta, feed_item_list)
+
+    gzip_path = writer.compressed_paths["gzip"]
+    assert gzip_path.name == json_feed_file_writer_config.path.name + ".gz"
+    assert gzip.decompress(gzip_path.read_bytes()) == writer.feed_bytes
+
+    for path in writer.compressed_paths.values():
+        assert path.exists()
+
+    # unchanged feeds are not written again
+    spy = mocker.spy(writers.AbstractFeedFileWriter, "_publish_files")
+    await writers.JSONFeedFileWriter(json_feed_file_writer_config).write_feed(
+        feed_meta, feed_item_list
+    )
+
+    spy.assert_not_called()
+
+    # no temporary files are left
+    assert len(list(json_feed_file_writer_config.path.parent.glob(".*.tmp"))) == 0
+
+
+async def test_feed_writer_checksum(
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item_list: List[models.FeedItem],
+) -> None:
+    writer = writers.JSONFeedFileWriter(json_feed_file_writer_config)
+    await writer.write_feed(feed_meta, feed_item_list)
+
+    checksum_path = writer.get_checksum_path(json_feed_file_writer_config.path)
+    assert checksum_path.name == ".{}.sha256".format(
+        json_feed_file_writer_config.path.name
+    )
+    assert writer.feed_bytes is not None
+    assert checksum_path.read_text() == hashlib.sha256(writer.feed_bytes).hexdigest()
+
+    # a missing checksum (e.g. of an older version) is written again
+    checksum_path.unlink()
+    await writer.write_feed(feed_meta, feed_item_list)
+
+    assert writer.was_written
+    assert checksum_path.exists()
+
+
+async def test_json_feed_writer_compact(
+    mocker: pytest_mock.MockFixture,
+    caplog: pytest.LogCaptureFixture,
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+) -> None:
+    json_feed_file_writer_config.compact = True
+    writer = writers.JSONFeedFileWriter(json_feed_file_writer_config)
+    feed_item = feed_item.copy(
+        update={"title": "原神 Ü", "content": "<p>Hello  World!</p>\n<p>&nbsp;</p>"}
+    )
+
+    mocked_encode = mocker.spy(writers.JSONFeedFileWriter, "encode_feed")
+
+    # the size is only compared if debug logs are enabled
+    with caplog.at_level(logging.INFO):
+        await writer.write_feed(feed_meta, [feed_item])
+
+    assert mocked_encode.call_count == 1
+    assert "Compact" not in caplog.text
+
+    with caplog.at_level(logging.DEBUG):
+        await writers.JSONFeedFileWriter(json_feed_file_writer_config).write_feed(
+            feed_meta, [feed_item]
+        )
+
+    feed_bytes = json_feed_file_writer_config.path.read_bytes()
+    feed = json.loads(feed_bytes)
+
+    assert "原神 Ü".encode() in feed_bytes
+    assert b'", "' not in feed_bytes
+    assert feed["items"][0]["content_html"] == "<p>Hello World!</p>"
+    assert "Compact" in caplog.text
+
+
+async def test_json_feed_writer_paged(
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+) -> None:
+    json_feed_file_writer_config.page_size = 2
+    json_feed_file_writer_config.url = pydantic.parse_obj_as(
+        pydantic.HttpUrl, "https://example.org/feeds/genshin.json"
+    )
+    writer = writers.JSONFeedFileWriter(json_feed_file_writer_config)
+    feed_items = [feed_item.copy(update={"id": i}) for i in range(7, 0, -1)]
+
+    await writer.write_feed(feed_meta, feed_items)
+
+    page_index = pages.FeedPageIndex(json_feed_file_writer_config.path)
+    head = json.loads(json_feed_file_writer_config.path.read_bytes())
+    first_page = page_index.get_archive_path(1).read_bytes()
+    second_page = json.loads(page_index.get_archive_path(2).read_bytes())
+
+    assert [item["id"] for item in head["items"]] == ["7", "6", "5"]
+    assert head["next_url"] == "https://example.org/feeds/" + (
+        page_index.get_archive_path(2).name
+    )
+    assert [item["id"] for item in second_page["items"]] == ["4", "3"]
+    assert second_page["next_url"] == "https://example.org/feeds/" + (
+        page_index.get_archive_path(1).name
+    )
+    assert "next_url" not in json.loads(first_page)
+
+    # archive pages are never rewritten
+    new_item = feed_item.copy(update={"id": 8})
+    await writers.JSONFeedFileWriter(json_feed_file_writer_config).write_feed(
+        feed_meta, [new_item] + feed_items
+    )
+
+    head = json.loads(json_feed_file_writer_config.path.read_bytes())
+
+    assert [item["id"] for item in head["items"]] == ["8", "7"]
+    assert page_index.get_archive_path(1).read_bytes() == first_page
+    assert page_index.get_archive_path(3).exists()
+
+    # updated archived items are moved back to the head page
+    assert feed_item.updated is not None
+    updated_item = feed_item.copy(
+        update={"id": 1, "updated": feed_item.updated + timedelta(hours=1)}
+    )
+    await writers.JSONFeedFileWriter(json_feed_file_writer_config).write_feed(
+        feed_meta, [new_item] + feed_items[:-1] + [updated_item]
+    )
+
+    head = json.loads(json_feed_file_writer_config.path.read_bytes())
+
+    assert [item["id"] for item in head["items"]] == ["8", "7", "1"]
+    assert page_index.get_archive_path(1).read_bytes() == first_page
+
+
+async def test_feed_writers_hubs(
+    json_feed_file_writer_config: models.FeedFileWriterConfig,
+    atom_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+) -> None:
+    hub = pydantic.parse_obj_as(pydantic.AnyHttpUrl, "http://localhost:8000/hub")
+    json_feed_file_writer_config.hubs = [hub]
+    atom_feed_file_writer_config.hubs = [hub]
+
+    json_writer = writers.JSONFeedFileWriter(json_feed_file_writer_config)
+    atom_writer = writers.AtomFeedFileWriter(atom_feed_file_writer_config)
+
+    json_feed = json.loads(json_writer.encode_feed(feed_meta, []))
+    atom_feed = atoma.parse_atom_bytes(atom_writer.encode_feed(feed_meta, []))
+
+    assert json_feed["hubs"] == [{"type": "WebSub", "url": hub}]
+    assert {link.rel: link.href for link in atom_feed.links}["hub"] == hub
+
+    # was_written is only set if the feed was changed
+    await json_writer.write_feed(feed_meta, [])
+    assert json_writer.was_written
+
+    await json_writer.write_feed(feed_meta, [])
+    assert not json_writer.was_written
+
+
+@pytest.mark.parametrize(
+    "html, expected",
+    [
+        ("<p>Hello  World!</p>\n\n<p>Foo</p>", "<p>Hello World!</p><p>Foo</p>"),
+        ('<p style="">Foo</p><p>&nbsp;</p><p><br></p>', "<p>Foo</p>"),
+        ("<p>Foo<br/></p>", "<p>Foo</p>"),
+        ("<p>Foo\u00a0Bar</p>", "<p>Foo\u00a0Bar</p>"),
+        ("<pre>a\n  b</pre> <p> c </p>", "<pre>a\n  b</pre> <p> c </p>"),
+    ],
+)
+def test_minify_html(html: str, expected: str) -> None:
+    assert writers.AbstractFeedFileWriter.minify_html(html) == expected
+
+
 # ---- ATOM WRITER TESTS ----
 
 
@@ -114,6 +306,59 @@ async def test_atom_feed_writer(
 
     assert len(feed.entries) == len(feed_item_list)
     assert feed.title.value == feed_meta.title
+    assert feed.updated == max(
+        item.updated or item.published for item in feed_item_list
+    )
+
+
+async def test_atom_feed_writer_unchanged(
+    mocker: pytest_mock.MockFixture,
+    atom_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item_list: List[models.FeedItem],
+) -> None:
+    await writers.AtomFeedFileWriter(atom_feed_file_writer_config).write_feed(
+        feed_meta, feed_item_list
+    )
+
+    # unchanged feeds are not written again
+    spy = mocker.spy(writers.AbstractFeedFileWriter, "_publish_files")
+    writer = writers.AtomFeedFileWriter(atom_feed_file_writer_config)
+    await writer.write_feed(feed_meta, feed_item_list)
+
+    spy.assert_not_called()
+    assert not writer.was_written
+
+
+async def test_atom_feed_writer_paged(
+    atom_feed_file_writer_config: models.FeedFileWriterConfig,
+    feed_meta: models.FeedMeta,
+    feed_item: models.FeedItem,
+) -> None:
+    atom_feed_file_writer_config.page_size = 1
+    atom_feed_file_writer_config.url = None
+    writer = writers.AtomFeedFileWriter(atom_feed_file_writer_config)
+    feed_items = [feed_item.copy(update={"id": i}) for i in range(3, 0, -1)]
+
+    await writer.write_feed(feed_meta, feed_items)
+
+    page_index = pages.FeedPageIndex(atom_feed_file_writer_config.path)
+    head = atoma.parse_atom_bytes(atom_feed_file_writer_config.path.read_bytes())
+    archive = atoma.parse_atom_bytes(page_index.get_archive_path(2).read_bytes())
+    archive_xml = page_index.get_archive_path(2).read_text()
+
+    assert len(head.entries) == 1
+    assert {link.rel: link.href for link in head.links}["prev-archive"] == (
+        page_index.get_archive_path(2).name
+    )
+
+    archive_links = {link.rel: link.href for link in archive.links}
+
+    assert len(archive.entries) == 1
+    assert archive_links["current"] == atom_feed_file_writer_config.path.name
+    assert archive_links["prev-archive"] == page_index.get_archive_path(1).name
+    assert writers.ATOM_HISTORY_NAMESPACE in archive_xml
+    assert "fh:archive" in archive_xml
 
 
 @pytest.mark.skipif(system() == "Windows", reason="Currently not working on Windows")